@@ -9,9 +9,18 @@
 - examples: 示例和演示模块
 """
 
-# 从子包导入主要类
-from .core import DocumentProcessor, VectorStore, RAGSystem
-from .services import EmbeddingService, Reranker, Generator, DeepSeekGenerator
+import importlib
+
+# 主要类在首次访问时才从子包导入
+_LAZY_IMPORTS = {
+    'DocumentProcessor': '.core',
+    'VectorStore': '.core',
+    'RAGSystem': '.core',
+    'EmbeddingService': '.services',
+    'Reranker': '.services',
+    'Generator': '.services',
+    'DeepSeekGenerator': '.services'
+}
 
 __version__ = "1.0.0"
 __author__ = "MyRAG Team"
@@ -25,4 +34,14 @@ __all__ = [
     'Generator',
     'DeepSeekGenerator',
     'RAGSystem'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name: str):
+    """按需导入子模块，避免导入包时加载chromadb、sentence_transformers等重量级依赖"""
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""级联重排序的延迟与召回基准测试
+
+对文档块截取前若干字作为查询，先向量检索 retrieve_k 个候选，再分别：
+- 总是对全部候选重排序（基线）；
+- 按 CascadePolicy 跳过或缩小重排序。
+报告不同 margin_threshold 下的跳过比例、重排序阶段的平均耗时，
+以及相对基线 top rerank_k 的召回率。重排序分数缓存已关闭，避免影响计时。
+
+用法:
+    python benchmarks/bench_cascade.py --queries 200 --margins 0.02 0.05 0.1 --cutoff 0.6
+"""
+
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.cascade import CascadePolicy
+from core.document_processor import DocumentProcessor
+from core.vector_store import create_vector_store
+from services.embedding_service import EmbeddingService
+from services.reranker import Reranker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="级联重排序基准测试")
+    parser.add_argument("--doc", default=os.path.join(ROOT, "doc.md"))
+    parser.add_argument("--model", default="shibing624/text2vec-base-chinese")
+    parser.add_argument("--rerank-model", default="cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--query-length", type=int, default=12, help="截取文档块前N个字作为查询")
+    parser.add_argument("--retrieve-k", type=int, default=20)
+    parser.add_argument("--rerank-k", type=int, default=3)
+    parser.add_argument("--margins", type=float, nargs="+", default=[0.02, 0.05, 0.1])
+    parser.add_argument("--cutoff", type=float, default=None, help="参与重排序的候选的最大距离")
+    args = parser.parse_args()
+
+    chunks = DocumentProcessor().split_into_chunks(args.doc)
+    embedder = EmbeddingService(args.model)
+    reranker = Reranker(args.rerank_model, score_cache_size=0)
+    reranker.warmup()
+
+    store = create_vector_store("numpy", "bench-cascade")
+    store.add_documents(chunks, embedder.embed_batch_array(chunks))
+
+    queries = [chunks[i % len(chunks)][:args.query_length] for i in range(args.queries)]
+    query_embeddings = embedder.embed_batch_array(queries)
+    results = store.search_batch(query_embeddings, args.retrieve_k)
+    candidates = list(zip(queries, results["documents"], results["distances"]))
+
+    baseline = []
+    start = time.perf_counter()
+    for query, documents, _ in candidates:
+        baseline.append(reranker.rerank(query, documents, args.rerank_k))
+    baseline_ms = (time.perf_counter() - start) / len(candidates) * 1000
+
+    print(f"查询数: {len(candidates)}, retrieve_k: {args.retrieve_k}, rerank_k: {args.rerank_k}, "
+          f"cutoff: {args.cutoff}")
+    print(f"{'策略':<16}{'跳过比例':>10}{'重排序(ms)':>12}{'节省':>8}{'召回率':>8}")
+    print(f"{'always-rerank':<16}{0.0:>10.1%}{baseline_ms:>12.2f}{0.0:>8.1%}{1.0:>8.1%}")
+
+    for margin in args.margins:
+        policy = CascadePolicy(margin_threshold=margin, distance_cutoff=args.cutoff)
+        hits = 0
+        total = 0
+        start = time.perf_counter()
+        for (query, documents, distances), expected in zip(candidates, baseline):
+            count = policy.plan(distances, args.rerank_k)
+            if count == 0:
+                selected = documents[:args.rerank_k]
+            else:
+                selected = reranker.rerank(query, documents[:count], args.rerank_k)
+            hits += len(set(selected) & set(expected))
+            total += len(expected)
+        cascade_ms = (time.perf_counter() - start) / len(candidates) * 1000
+        stats = policy.get_stats()
+        print(f"{f'margin={margin}':<16}{stats['skip_rate']:>10.1%}{cascade_ms:>12.2f}"
+              f"{1 - cascade_ms / baseline_ms:>8.1%}{hits / max(total, 1):>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
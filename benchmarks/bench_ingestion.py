@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""文档导入吞吐量与峰值内存基准测试
+
+对比三种导入路径：
+- legacy: 整体调用 encode 后逐行 .tolist()，再写入向量存储（改造前的行为）
+- array: 一次编码为连续float32矩阵，直接写入向量存储
+- streaming: 经 IngestionPipeline 按批流式嵌入和写入，文本块由生成器产出，不整体驻留内存
+
+每种模式在独立子进程中运行，以便分别统计峰值RSS。
+
+用法:
+    python benchmarks/bench_ingestion.py --doc doc.md --repeat 20
+"""
+
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MODES = ["legacy", "array", "streaming"]
+
+
+def _peak_rss_mb() -> float:
+    """获取当前进程的峰值RSS（MB）"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(args) -> dict:
+    """在当前进程中运行单个模式并返回统计结果"""
+    from core.document_processor import DocumentProcessor
+    from core.ingestion import IngestionPipeline
+    from core.vector_store import VectorStore
+    from services.embedding_service import EmbeddingService
+
+    base_chunks = DocumentProcessor().split_into_chunks(args.doc)
+    # 每次重复加上编号，避免相同内容被按内容哈希去重
+    repeated = (f"{chunk}（{r}）" for r in range(args.repeat) for chunk in base_chunks)
+    total = len(base_chunks) * args.repeat
+    service = EmbeddingService(args.model, batch_size=args.batch_size)
+    store = VectorStore(f"bench_{args.mode}")
+    service.embed_text("预热")
+    baseline_rss = _peak_rss_mb()
+
+    start = time.perf_counter()
+    if args.mode == "streaming":
+        IngestionPipeline(service, store, batch_size=args.ingest_batch_size).run(repeated)
+    else:
+        chunks = list(repeated)
+        if args.mode == "legacy":
+            embeddings = service.model.encode(chunks, normalize_embeddings=True)
+            embeddings = [embedding.tolist() for embedding in embeddings]
+        else:
+            embeddings = service.embed_batch_array(chunks)
+        store.add_documents(chunks, embeddings)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "mode": args.mode,
+        "chunks": total,
+        "seconds": elapsed,
+        "chunks_per_second": total / elapsed,
+        "peak_rss_mb": _peak_rss_mb(),
+        "ingest_rss_delta_mb": _peak_rss_mb() - baseline_rss
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文档导入基准测试")
+    parser.add_argument("--doc", default=os.path.join(ROOT, "doc.md"))
+    parser.add_argument("--model", default="shibing624/text2vec-base-chinese")
+    parser.add_argument("--repeat", type=int, default=10, help="将文档块重复N次以模拟更大语料")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--ingest-batch-size", type=int, default=256, help="streaming模式每批的文本块数量")
+    parser.add_argument("--mode", choices=MODES, help="仅在子进程中使用")
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args)))
+        return
+
+    results = []
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--mode", mode,
+             "--doc", args.doc, "--model", args.model,
+             "--repeat", str(args.repeat), "--batch-size", str(args.batch_size),
+             "--ingest-batch-size", str(args.ingest_batch_size)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'模式':<10}{'块数':>8}{'耗时(s)':>10}{'块/秒':>10}{'峰值RSS(MB)':>14}{'导入增量(MB)':>14}")
+    for result in results:
+        print(f"{result['mode']:<10}{result['chunks']:>8}{result['seconds']:>10.2f}"
+              f"{result['chunks_per_second']:>10.1f}{result['peak_rss_mb']:>14.1f}"
+              f"{result['ingest_rss_delta_mb']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
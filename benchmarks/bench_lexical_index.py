@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""BM25倒排索引的写入与检索延迟基准测试
+
+把文档块重复N次（每次加编号）写入 BM25Index，报告单个文档的平均写入耗时，
+以及用文档块前若干字作为查询时的p50/p99检索延迟。
+
+用法:
+    python benchmarks/bench_lexical_index.py --doc doc.md --repeat 500
+"""
+
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.document_processor import DocumentProcessor
+from core.lexical_index import BM25Index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BM25索引基准测试")
+    parser.add_argument("--doc", default=os.path.join(ROOT, "doc.md"))
+    parser.add_argument("--repeat", type=int, default=500, help="将文档块重复N次以模拟更大语料")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--tokenizer", default="bigram", choices=["bigram", "jieba"])
+    args = parser.parse_args()
+
+    chunks = DocumentProcessor().split_into_chunks(args.doc)
+    documents = [f"{chunk}（{r}）" for r in range(args.repeat) for chunk in chunks]
+    index = BM25Index(args.tokenizer)
+
+    start = time.perf_counter()
+    for offset in range(0, len(documents), args.batch_size):
+        batch = documents[offset:offset + args.batch_size]
+        index.add([str(offset + i) for i in range(len(batch))], batch)
+    add_seconds = time.perf_counter() - start
+
+    latencies = []
+    for i in range(args.queries):
+        query = chunks[i % len(chunks)][:12]
+        start = time.perf_counter()
+        index.search(query, top_k=20)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    print(f"文档数: {len(documents)}, 分词: {args.tokenizer}")
+    print(f"平均写入耗时: {add_seconds / len(documents) * 1e6:.1f} µs/文档")
+    print(f"检索延迟: p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+          f"p99 {latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""int8量化ONNX后端的导出、一致性校验与延迟对比
+
+首次运行会把嵌入模型和重排序模型导出到 --output-dir，之后可离线加载：
+    EmbeddingService("models/embedding-onnx", backend="onnx", local_files_only=True)
+    Reranker("models/reranker-onnx", backend="onnx", local_files_only=True)
+
+用法:
+    python benchmarks/bench_onnx_backend.py --output-dir models --quantization avx512_vnni
+"""
+
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.document_processor import DocumentProcessor
+from services.embedding_service import EmbeddingService
+from services.reranker import Reranker
+from services.onnx_backend import (
+    QUANTIZATION_CONFIGS, export_quantized_onnx, find_quantized_onnx_file,
+    check_embedding_parity, check_reranker_parity
+)
+
+
+def _timeit(func, repeat: int) -> float:
+    """返回多次调用的平均耗时（毫秒）"""
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="量化ONNX后端基准测试")
+    parser.add_argument("--embedding-model", default="shibing624/text2vec-base-chinese")
+    parser.add_argument("--rerank-model", default="cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+    parser.add_argument("--output-dir", default=os.path.join(ROOT, "models"))
+    parser.add_argument("--quantization", choices=QUANTIZATION_CONFIGS, default="avx512_vnni")
+    parser.add_argument("--doc", default=os.path.join(ROOT, "doc.md"))
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    embedding_dir = os.path.join(args.output_dir, "embedding-onnx")
+    reranker_dir = os.path.join(args.output_dir, "reranker-onnx")
+    for model_name, model_dir, model_type in ((args.embedding_model, embedding_dir, "embedding"),
+                                              (args.rerank_model, reranker_dir, "reranker")):
+        if find_quantized_onnx_file(model_dir, args.quantization) is None:
+            print(f"正在导出 {model_name} -> {model_dir}")
+            export_quantized_onnx(model_name, model_dir, model_type, args.quantization)
+
+    torch_embedder = EmbeddingService(args.embedding_model)
+    onnx_embedder = EmbeddingService(embedding_dir, backend="onnx", local_files_only=True,
+                                     onnx_file_name=find_quantized_onnx_file(embedding_dir, args.quantization))
+    torch_reranker = Reranker(args.rerank_model)
+    onnx_reranker = Reranker(reranker_dir, backend="onnx", local_files_only=True,
+                             onnx_file_name=find_quantized_onnx_file(reranker_dir, args.quantization))
+
+    chunks = DocumentProcessor().split_into_chunks(args.doc)
+    query = "哆啦A梦有什么道具？"
+
+    print("\n=== 一致性校验 ===")
+    print(f"嵌入: {check_embedding_parity(torch_embedder, onnx_embedder, chunks + [query])}")
+    print(f"重排序: {check_reranker_parity(torch_reranker, onnx_reranker, query, chunks)}")
+
+    print("\n=== 单次查询延迟(ms) ===")
+    print(f"{'组件':<12}{'torch':>10}{'onnx-int8':>12}")
+    embed_torch = _timeit(lambda: torch_embedder.embed_text(query), args.repeat)
+    embed_onnx = _timeit(lambda: onnx_embedder.embed_text(query), args.repeat)
+    print(f"{'embedding':<12}{embed_torch:>10.2f}{embed_onnx:>12.2f}")
+    rerank_torch = _timeit(lambda: torch_reranker.rerank(query, chunks, 3), args.repeat)
+    rerank_onnx = _timeit(lambda: onnx_reranker.rerank(query, chunks, 3), args.repeat)
+    print(f"{'rerank':<12}{rerank_torch:>10.2f}{rerank_onnx:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
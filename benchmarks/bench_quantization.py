@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""向量量化基准测试
+
+在同一批向量上对比精确检索与 int8 / PQ 量化检索（含与不含float32重打分），
+报告向量部分的常驻内存、相对精确检索的 recall@k 以及每个查询的平均延迟。
+量化存储持久化到临时目录，float32矩阵以mmap按需读入，常驻内存只有量化编码。
+默认使用带聚类结构的合成向量；指定 --texts 时用真实嵌入模型编码文本文件中的每一行。
+
+用法:
+    python benchmarks/bench_quantization.py --size 50000 --top-k 10
+    python benchmarks/bench_quantization.py --texts data/lines.txt
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.numpy_vector_store import NumpyVectorStore, recall_at_k
+
+
+def synthetic_vectors(size: int, queries: int, dimension: int, seed: int = 0):
+    """生成围绕若干聚类中心分布的向量，近似真实语料的嵌入分布"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, size // 100), dimension)).astype(np.float32)
+
+    def sample(n):
+        noise = 0.8 * rng.standard_normal((n, dimension)).astype(np.float32)
+        return centers[rng.integers(0, len(centers), n)] + noise
+
+    return sample(size), sample(queries)
+
+
+def text_vectors(path: str, queries: int, model_name: str):
+    """用嵌入模型编码文本文件，随机抽取其中若干行作为查询"""
+    from services.embedding_service import EmbeddingService
+
+    with open(path, 'r', encoding='utf-8') as file:
+        lines = [line.strip() for line in file if line.strip()]
+    vectors = EmbeddingService(model_name).embed_batch_array(lines)
+    picked = np.random.default_rng(0).choice(len(lines), min(queries, len(lines)), replace=False)
+    return vectors, vectors[picked]
+
+
+def run(store: NumpyVectorStore, queries: np.ndarray, top_k: int):
+    """返回检索结果id与每个查询的平均延迟（秒）"""
+    start = time.perf_counter()
+    ids = store.search_batch(queries, top_k=top_k)["ids"]
+    return ids, (time.perf_counter() - start) / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="向量量化基准测试")
+    parser.add_argument("--size", type=int, default=50000, help="合成向量数量")
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--pq-subspaces", type=int, default=96)
+    parser.add_argument("--texts", help="每行一段文本的文件，指定后用真实嵌入代替合成向量")
+    parser.add_argument("--model", default="shibing624/text2vec-base-chinese")
+    args = parser.parse_args()
+
+    if args.texts:
+        vectors, queries = text_vectors(args.texts, args.queries, args.model)
+    else:
+        vectors, queries = synthetic_vectors(args.size, args.queries, args.dimension)
+    documents = [str(i) for i in range(len(vectors))]
+
+    exact = NumpyVectorStore("exact")
+    exact.add_documents(documents, vectors)
+    reference, exact_latency = run(exact, queries, args.top_k)
+    float32_bytes = exact.get_memory_usage()["float32_bytes"]
+
+    print(f"向量: {vectors.shape[0]} x {vectors.shape[1]}, 查询: {len(queries)}, top_k={args.top_k}")
+    print(f"{'方式':<22}{'向量内存(MB)':>14}{'压缩比':>8}{'recall@k':>10}{'延迟(ms)':>10}{'训练(s)':>9}")
+    print(f"{'float32 精确':<22}{float32_bytes / 2**20:>14.1f}{1.0:>8.1f}{1.0:>10.3f}"
+          f"{exact_latency * 1000:>10.2f}{0.0:>9.1f}")
+
+    for quantization in ("int8", "pq"):
+        for rescore_factor in (0, args.rescore_factor):
+            with tempfile.TemporaryDirectory() as directory:
+                store = NumpyVectorStore(quantization, directory, quantization=quantization,
+                                         rescore_factor=rescore_factor, pq_subspaces=args.pq_subspaces)
+                store.add_documents(documents, vectors)
+                start = time.perf_counter()
+                store.train_quantizer()
+                train_seconds = time.perf_counter() - start
+
+                ids, latency = run(store, queries, args.top_k)
+                usage = store.get_memory_usage()
+            name = f"{quantization} 重打分x{rescore_factor}" if rescore_factor else f"{quantization} 仅近似"
+            print(f"{name:<22}{usage['resident_bytes'] / 2**20:>14.1f}{usage['compression_ratio']:>8.1f}"
+                  f"{recall_at_k(ids, reference, args.top_k):>10.3f}{latency * 1000:>10.2f}"
+                  f"{train_seconds:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
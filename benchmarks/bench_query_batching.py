@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""并发查询嵌入的吞吐量与延迟基准测试
+
+对比每个查询单独调用 embed_text 与经过 QueryBatcher 微批合并两种方式，
+报告QPS以及p50/p99延迟。
+
+用法:
+    python benchmarks/bench_query_batching.py --threads 32 --queries 20
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.embedding_service import EmbeddingService
+from services.query_batcher import QueryBatcher
+
+
+def run_load(embed, threads: int, queries_per_thread: int) -> dict:
+    """用多个线程并发发起查询并统计延迟"""
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(worker_id: int):
+        local = []
+        for i in range(queries_per_thread):
+            start = time.perf_counter()
+            embed(f"哆啦A梦有什么道具？{worker_id}-{i}")
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "qps": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查询微批处理基准测试")
+    parser.add_argument("--model", default="shibing624/text2vec-base-chinese")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--queries", type=int, default=20, help="每个线程发起的查询数")
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    service = EmbeddingService(args.model)
+    service.embed_text("预热")
+
+    direct = run_load(service.embed_text, args.threads, args.queries)
+
+    batcher = QueryBatcher(service, max_batch_size=args.max_batch_size, max_wait_ms=args.max_wait_ms)
+    batched = run_load(batcher.embed, args.threads, args.queries)
+    stats = batcher.get_stats()
+    batcher.close()
+
+    print(f"{'模式':<10}{'QPS':>10}{'p50(ms)':>10}{'p99(ms)':>10}")
+    for name, result in (("direct", direct), ("batched", batched)):
+        print(f"{name:<10}{result['qps']:>10.1f}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}")
+    print(f"平均批大小: {stats['average_batch_size']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""分片向量存储检索延迟基准测试
+
+在同一批合成向量上对比不分片与不同分片数量时的单查询平均延迟，
+并用不分片的精确检索结果校验合并后的 recall@k。
+
+用法:
+    python benchmarks/bench_sharding.py --size 200000 --shards 1 2 4 8
+    python benchmarks/bench_sharding.py --backend chroma --size 50000
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.vector_store import create_vector_store
+from core.sharded_vector_store import ShardedVectorStore
+from core.numpy_vector_store import recall_at_k
+
+
+def build(store, vectors: np.ndarray, batch_size: int = 5000):
+    """分批写入向量，避免单次写入超过chroma的批量上限"""
+    for start in range(0, len(vectors), batch_size):
+        block = vectors[start:start + batch_size]
+        store.add_documents([str(start + i) for i in range(len(block))], block,
+                            ids=[str(start + i) for i in range(len(block))])
+    return store
+
+
+def measure(store, queries: np.ndarray, top_k: int):
+    """逐条检索，返回结果id与平均延迟（毫秒）"""
+    ids = []
+    start = time.perf_counter()
+    for query in queries:
+        ids.extend(store.search_batch(query[None, :], top_k)["ids"])
+    return ids, (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分片向量存储基准测试")
+    parser.add_argument("--backend", default="numpy", choices=["numpy", "chroma"])
+    parser.add_argument("--size", type=int, default=200000)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.size, args.dimension)).astype(np.float32)
+    queries = rng.standard_normal((args.queries, args.dimension)).astype(np.float32)
+
+    reference = None
+    print(f"后端: {args.backend}, 向量: {args.size} x {args.dimension}, top_k={args.top_k}")
+    print(f"{'分片数':>6}{'平均延迟(ms)':>14}{'recall@k':>10}")
+    for num_shards in args.shards:
+        if num_shards == 1:
+            store = create_vector_store(args.backend, "bench-single")
+        else:
+            store = ShardedVectorStore(args.backend, f"bench-{num_shards}", num_shards=num_shards)
+        build(store, vectors)
+        ids, latency = measure(store, queries, args.top_k)
+        if reference is None:
+            reference = ids
+        print(f"{num_shards:>6}{latency:>14.2f}{recall_at_k(ids, reference, args.top_k):>10.3f}")
+        store.clear()
+
+
+if __name__ == "__main__":
+    main()
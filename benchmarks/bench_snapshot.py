@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""集合快照导出/导入基准测试
+
+用合成向量构建一个NumPy向量存储，分别以float32和float16导出快照，
+报告文件大小、导出耗时、mmap打开耗时以及导入到新存储的耗时。
+
+用法:
+    python benchmarks/bench_snapshot.py --size 200000 --dimension 768
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from core.numpy_vector_store import NumpyVectorStore
+from core.snapshot import Snapshot
+
+
+def timed(function):
+    """执行函数并返回 (结果, 耗时秒数)"""
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="集合快照基准测试")
+    parser.add_argument("--size", type=int, default=200000)
+    parser.add_argument("--dimension", type=int, default=768)
+    parser.add_argument("--page-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as directory:
+        store = NumpyVectorStore("bench", directory)
+        for start in range(0, args.size, args.page_size):
+            count = min(args.page_size, args.size - start)
+            store.add_documents([f"第{start + i}段文本，用于模拟文档块内容。" for i in range(count)],
+                                rng.standard_normal((count, args.dimension)).astype(np.float32),
+                                [{"source": "bench.md"} for _ in range(count)])
+
+        print(f"文档: {args.size}, 维度: {args.dimension}")
+        print(f"{'精度':<10}{'文件(MB)':>10}{'导出(s)':>10}{'打开(ms)':>10}{'导入(s)':>10}")
+        for dtype in ("float32", "float16"):
+            path = os.path.join(directory, f"{dtype}.snap")
+            _, export_seconds = timed(lambda: store.snapshot(path, dtype, args.page_size))
+            snapshot, open_seconds = timed(lambda: Snapshot(path))
+            snapshot.close()
+
+            target = NumpyVectorStore(f"restore_{dtype}", directory)
+            _, restore_seconds = timed(lambda: target.restore(path, args.page_size))
+            print(f"{dtype:<10}{os.path.getsize(path) / 2**20:>10.1f}{export_seconds:>10.2f}"
+                  f"{open_seconds * 1000:>10.2f}{restore_seconds:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""启动耗时基准测试
+
+在全新的子进程中分别测量导入包、构造 RAGSystem 以及 warmup() 的进程总耗时（含解释器启动，取中位数），
+用于确认命令行工具和批量导入任务的启动开销。
+
+用法:
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --warmup   # 额外测量加载全部模型的耗时
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPET_TEMPLATE = """
+import sys
+sys.path.insert(0, {root!r})
+{body}
+"""
+
+SCENARIOS = {
+    "python空进程": "pass",
+    "import core": "import core",
+    "import RAGSystem": "from core.rag_system import RAGSystem",
+    "RAGSystem()": "from core.rag_system import RAGSystem\nrag = RAGSystem()",
+}
+
+WARMUP_SCENARIO = ("RAGSystem().warmup()",
+                   "from core.rag_system import RAGSystem\nrag = RAGSystem()\nrag.warmup(include_generator=False)")
+
+
+def measure(body: str, runs: int) -> float:
+    """在子进程中运行代码片段多次，返回进程总耗时中位数（秒）"""
+    code = SNIPPET_TEMPLATE.format(root=ROOT, body=body)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, cwd=ROOT)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动耗时基准测试")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", action="store_true", help="同时测量 warmup() 的耗时")
+    args = parser.parse_args()
+
+    scenarios = list(SCENARIOS.items())
+    if args.warmup:
+        scenarios.append(WARMUP_SCENARIO)
+
+    print(f"{'场景':<24}{'中位耗时(ms)':>14}")
+    for name, body in scenarios:
+        print(f"{name:<24}{measure(body, args.runs) * 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
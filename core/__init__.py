@@ -3,15 +3,55 @@
 包含RAG系统的核心组件：
 - document_processor: 文档处理
 - vector_store: 向量存储
+- numpy_vector_store: NumPy精确检索向量存储
+- sharded_vector_store: 分片向量存储
+- snapshot: 集合快照的导出与导入
+- lexical_index: BM25倒排索引
+- semantic_cache: 语义查询缓存
+- answer_cache: 端到端回答缓存
+- cascade: 按检索置信度跳过或缩小重排序的级联策略
 - rag_system: RAG系统主类
+- async_rag_system: asyncio版RAG系统
 """
 
-from .document_processor import DocumentProcessor
-from .vector_store import VectorStore
-from .rag_system import RAGSystem
+import importlib
+
+_LAZY_IMPORTS = {
+    'DocumentProcessor': '.document_processor',
+    'VectorStore': '.vector_store',
+    'NumpyVectorStore': '.numpy_vector_store',
+    'ShardedVectorStore': '.sharded_vector_store',
+    'Snapshot': '.snapshot',
+    'BM25Index': '.lexical_index',
+    'SemanticCache': '.semantic_cache',
+    'AnswerCache': '.answer_cache',
+    'CascadePolicy': '.cascade',
+    'create_vector_store': '.vector_store',
+    'RAGSystem': '.rag_system',
+    'AsyncRAGSystem': '.async_rag_system'
+}
 
 __all__ = [
     'DocumentProcessor',
-    'VectorStore', 
-    'RAGSystem'
-]
\ No newline at end of file
+    'VectorStore',
+    'NumpyVectorStore',
+    'ShardedVectorStore',
+    'Snapshot',
+    'BM25Index',
+    'SemanticCache',
+    'AnswerCache',
+    'CascadePolicy',
+    'create_vector_store',
+    'RAGSystem',
+    'AsyncRAGSystem'
+]
+
+
+def __getattr__(name: str):
+    """首次访问时再导入对应模块"""
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
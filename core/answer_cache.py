@@ -0,0 +1,156 @@
+from typing import Optional
+from collections import OrderedDict
+import os
+import json
+import hashlib
+import threading
+import unicodedata
+from services.sqlite_lru import SqliteLRU
+
+
+def normalize_question(question: str) -> str:
+    """规范化问题文本：NFKC（统一全角半角）、折叠空白、忽略大小写
+
+    Args:
+        question: 原始问题
+
+    Returns:
+        规范化后的问题
+    """
+    return " ".join(unicodedata.normalize("NFKC", question).split()).casefold()
+
+
+class AnswerCache:
+    """端到端回答缓存：内存LRU，可选SQLite磁盘层
+
+    键由规范化后的问题、检索参数、生成模型名称、语料标识和语料版本号共同决定，
+    语料变化或重建后旧回答自然不再命中，不同集合共用磁盘层时也不会互相命中。命中内存层时只需一次哈希和一次字典查找；
+    磁盘层命中后会回填内存层，进程重启后仍可复用。
+    """
+
+    def __init__(self, max_entries: int = 1024, cache_dir: Optional[str] = None,
+                 max_disk_entries: int = 100000):
+        """初始化回答缓存
+
+        Args:
+            max_entries: 内存层的最大条目数
+            cache_dir: 磁盘缓存目录，为None时只使用内存
+            max_disk_entries: 磁盘层的最大条目数，超过后淘汰最久未访问的条目
+        """
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._disk: Optional[SqliteLRU] = None
+        self.cache_path: Optional[str] = None
+
+        if cache_dir:
+            self.cache_path = os.path.join(cache_dir, "answers.sqlite3")
+            self._disk = SqliteLRU(self.cache_path, "answers", ["answer TEXT NOT NULL"], max_disk_entries)
+
+    @staticmethod
+    def make_key(question: str, retrieve_k: int, rerank_k: int, model_name: str,
+                 corpus_version, mode: str = "dense", corpus_id: Optional[str] = None) -> str:
+        """生成缓存键
+
+        Args:
+            question: 用户问题（内部会规范化）
+            retrieve_k: 检索的文档数量
+            rerank_k: 重排序后保留的文档数量
+            model_name: 生成模型名称
+            corpus_version: 语料版本号
+            mode: 检索方式
+            corpus_id: 语料标识（如 vector_store.get_corpus_id()），区分不同集合和重建前后的语料
+
+        Returns:
+            缓存键（SHA-256十六进制串）
+        """
+        raw = json.dumps([normalize_question(question), retrieve_k, rerank_k, model_name,
+                          corpus_id, corpus_version, mode], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存的回答
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            回答，未命中时返回None
+        """
+        with self._lock:
+            answer = self._memory.get(key)
+            if answer is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return answer
+
+            if self._disk is not None:
+                row = self._disk.get(key)
+                if row is not None:
+                    self._remember(key, row[0])
+                    self.hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, answer: str) -> None:
+        """写入回答
+
+        Args:
+            key: 缓存键
+            answer: 回答文本
+        """
+        with self._lock:
+            self._remember(key, answer)
+            if self._disk is not None:
+                self._disk.put(key, (answer,))
+
+    def _remember(self, key: str, answer: str) -> None:
+        """写入内存层并按LRU淘汰"""
+        self._memory[key] = answer
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            if self._disk is not None:
+                return len(self._disk)
+            return len(self._memory)
+
+    def get_stats(self) -> dict:
+        """获取缓存统计信息
+
+        Returns:
+            统计信息字典
+        """
+        total = self.hits + self.misses
+        return {
+            "cache_path": self.cache_path,
+            "entries": len(self),
+            "memory_entries": len(self._memory),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._memory.clear()
+            if self._disk is not None:
+                self._disk.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def close(self) -> None:
+        """关闭磁盘缓存连接"""
+        with self._lock:
+            if self._disk is not None:
+                self._disk.close()
+                self._disk = None
@@ -0,0 +1,181 @@
+from typing import Any, Callable, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+from .rag_system import RAGSystem
+from services.generator import TokenStream
+
+
+class AsyncRAGSystem:
+    """asyncio版RAG系统，适合在一个进程内同时处理大量问题
+
+    嵌入、检索和重排序是CPU密集的同步调用，放到有界线程池中执行；
+    生成阶段主要在等待LLM的HTTP响应，使用生成器的异步接口（agenerate_answer），
+    等待期间不占用线程。全局信号量限制同时处理的问题数，
+    因此几百个进行中的问题只需要 max_workers 个线程。提示词构建（上下文打包可能调用分词器）
+    和SQLite缓存读写也在该线程池中执行，不阻塞事件循环。
+
+    信号量和 in_flight 计数属于单个事件循环：一个实例只能在首次使用它的事件循环中使用，
+    在其他事件循环中调用会抛出 RuntimeError；需要多个事件循环时为每个循环各创建一个实例。
+    """
+
+    def __init__(self, rag: Optional[RAGSystem] = None,
+                 max_concurrency: int = 256,
+                 max_workers: int = 4,
+                 **rag_options):
+        """初始化异步RAG系统
+
+        Args:
+            rag: 复用的RAGSystem，为None时用 rag_options 创建
+            max_concurrency: 同时处理的最大问题数，超出的问题排队等待
+            max_workers: 执行嵌入、检索和重排序的线程数
+            **rag_options: 创建RAGSystem时的参数
+        """
+        if max_concurrency < 1 or max_workers < 1:
+            raise ValueError("max_concurrency 和 max_workers 必须大于0")
+        self.rag = rag if rag is not None else RAGSystem(**rag_options)
+        self.max_concurrency = max_concurrency
+        self.max_workers = max_workers
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="async-rag")
+        self.in_flight = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _check_loop(self) -> None:
+        """记录首次使用的事件循环，拒绝在其他事件循环中使用"""
+        loop = asyncio.get_running_loop()
+        if self._loop is None:
+            self._loop = loop
+        elif self._loop is not loop:
+            raise RuntimeError("AsyncRAGSystem 只能在同一个事件循环中使用，请为每个事件循环创建单独的实例")
+
+    async def _run(self, func: Callable, *args) -> Any:
+        """在有界线程池中执行同步调用"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def query(self, question: str,
+                    retrieve_k: int = 5,
+                    rerank_k: int = 3,
+                    show_prompt: bool = False,
+                    mode: Optional[str] = None,
+                    pack_stats: Optional[dict] = None) -> str:
+        """查询系统并生成回答
+
+        Args:
+            question: 用户问题
+            retrieve_k: 检索的文档数量
+            rerank_k: 重排序后保留的文档数量
+            show_prompt: 是否显示生成提示词
+            mode: 检索方式，为None时使用 rag.retrieval_mode
+            pack_stats: 可选的字典，启用上下文打包时写入本次查询的打包统计
+
+        Returns:
+            生成的回答
+        """
+        self._check_loop()
+        rag = self.rag
+        mode = mode or rag.retrieval_mode
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                answer_key = await self._run(rag._answer_key, question, retrieve_k, rerank_k, mode)
+                if answer_key is not None:
+                    answer = await self._run(rag.answer_cache.get, answer_key)
+                    if answer is not None:
+                        return answer
+
+                chunks = await self._run(rag._prepare_context, question, retrieve_k, rerank_k, mode)
+                generator = rag.generator
+                options = rag._pack_options(pack_stats)
+                if hasattr(generator, "agenerate_answer"):
+                    answer = await generator.agenerate_answer(question, chunks, show_prompt,
+                                                              executor=self._executor, **options)
+                else:
+                    answer = await self._run(functools.partial(generator.generate_answer, question, chunks,
+                                                               show_prompt, **options))
+
+                if answer_key is not None:
+                    await self._run(rag.answer_cache.put, answer_key, answer)
+                return answer
+            finally:
+                self.in_flight -= 1
+
+    async def query_stream(self, question: str,
+                           retrieve_k: int = 5,
+                           rerank_k: int = 3,
+                           show_prompt: bool = False,
+                           mode: Optional[str] = None,
+                           pack_stats: Optional[dict] = None) -> TokenStream:
+        """查询系统并流式生成回答
+
+        检索和重排序在有界线程池中完成后返回；用 async for 迭代时，
+        阻塞的读取同样在该线程池中进行，不占用事件循环的默认线程池。
+
+        Args:
+            question: 用户问题
+            retrieve_k: 检索的文档数量
+            rerank_k: 重排序后保留的文档数量
+            show_prompt: 是否显示生成提示词
+            mode: 检索方式，为None时使用 rag.retrieval_mode
+            pack_stats: 可选的字典，启用上下文打包时写入本次查询的打包统计
+
+        Returns:
+            TokenStream
+        """
+        self._check_loop()
+        async with self._semaphore:
+            return await self._run(functools.partial(self.rag.query_stream, question, retrieve_k, rerank_k,
+                                                     show_prompt, mode, executor=self._executor,
+                                                     pack_stats=pack_stats))
+
+    async def query_many(self, questions: List[str], **options) -> List[str]:
+        """并发处理多个问题，实际并发数受 max_concurrency 限制
+
+        Args:
+            questions: 问题列表
+            **options: 传给 query() 的参数
+
+        Returns:
+            与问题一一对应的回答列表
+        """
+        return list(await asyncio.gather(*(self.query(question, **options) for question in questions)))
+
+    async def retrieve(self, query: str, top_k: int = 5, mode: Optional[str] = None) -> List[str]:
+        """检索相关文档
+
+        Args:
+            query: 查询文本
+            top_k: 返回的文档数量
+            mode: 检索方式，为None时使用 rag.retrieval_mode
+
+        Returns:
+            检索到的文档列表
+        """
+        self._check_loop()
+        async with self._semaphore:
+            return await self._run(self.rag.retrieve, query, top_k, mode)
+
+    def get_stats(self) -> dict:
+        """获取并发统计信息
+
+        Returns:
+            包含并发上限、线程数和进行中问题数的字典
+        """
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_workers": self.max_workers,
+            "in_flight": self.in_flight
+        }
+
+    async def aclose(self) -> None:
+        """关闭线程池和生成器的异步HTTP客户端"""
+        generator = self.rag._generator
+        if generator is not None and hasattr(generator, "aclose"):
+            await generator.aclose()
+        self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
@@ -0,0 +1,58 @@
+from typing import List, Optional
+import threading
+
+
+class CascadePolicy:
+    """根据向量检索的置信度决定是否重排序以及重排序多少候选
+
+    距离越小越相似（向量已归一化时为平方欧氏距离，范围 [0, 4]）。
+    - 第一名与第二名的距离差不小于 margin_threshold 时，认为结果已足够明确，跳过重排序；
+    - 否则只把距离不超过 distance_cutoff 的候选交给重排序器，但至少保留 rerank_k 个。
+    """
+
+    def __init__(self, margin_threshold: float = 0.1, distance_cutoff: Optional[float] = None):
+        """初始化级联策略
+
+        Args:
+            margin_threshold: 跳过重排序所需的第一名领先距离
+            distance_cutoff: 参与重排序的候选的最大距离，为None时不按距离裁剪
+        """
+        self.margin_threshold = margin_threshold
+        self.distance_cutoff = distance_cutoff
+        self._lock = threading.Lock()
+        self._counts = {"skipped": 0, "shrunk": 0, "full": 0}
+
+    def plan(self, distances: List[float], rerank_k: int) -> int:
+        """给出需要重排序的候选数量
+
+        Args:
+            distances: 按升序排列的候选距离
+            rerank_k: 重排序后保留的文档数量
+
+        Returns:
+            交给重排序器的前若干个候选的数量，为0时跳过重排序、直接取向量检索的前 rerank_k 个
+        """
+        total = len(distances)
+        if total <= 1 or distances[1] - distances[0] >= self.margin_threshold:
+            decision, count = "skipped", 0
+        else:
+            count = total
+            if self.distance_cutoff is not None:
+                within = sum(1 for distance in distances if distance <= self.distance_cutoff)
+                count = min(total, max(rerank_k, within))
+            decision = "shrunk" if count < total else "full"
+        with self._lock:
+            self._counts[decision] += 1
+        return count
+
+    def get_stats(self) -> dict:
+        """获取决策统计信息
+
+        Returns:
+            包含跳过、裁剪、完整重排序次数以及跳过比例的字典
+        """
+        with self._lock:
+            stats = dict(self._counts)
+        total = sum(stats.values())
+        stats["skip_rate"] = stats["skipped"] / total if total else 0.0
+        return stats
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Iterator, List
 
 
 class DocumentProcessor:
@@ -16,12 +16,34 @@ class DocumentProcessor:
         Returns:
             文档块列表
         """
-        with open(doc_file, 'r', encoding='utf-8') as file:
-            content = file.read()
-        
-        return [chunk.strip() for chunk in content.split("\n\n") if chunk.strip()]
+        return list(self.iter_chunks(doc_file))
         # return [chunk.strip() for chunk in content.split("\n") if chunk.strip()]
 
+    def iter_chunks(self, doc_file: str) -> Iterator[str]:
+        """逐行读取文档并按空行切分，逐块产出，内存占用与文件大小无关
+        
+        切分结果与 split_into_chunks 一致（以连续两个换行为分隔）。
+        
+        Args:
+            doc_file: 文档文件路径
+            
+        Yields:
+            去除首尾空白后的非空文档块
+        """
+        with open(doc_file, 'r', encoding='utf-8') as file:
+            lines: List[str] = []
+            for line in file:
+                if line == "\n":
+                    chunk = "".join(lines).strip()
+                    if chunk:
+                        yield chunk
+                    lines = []
+                else:
+                    lines.append(line)
+            chunk = "".join(lines).strip()
+            if chunk:
+                yield chunk
+
     def split_by_sentences(self, text: str, max_length: int = 500) -> List[str]:
         """按句子分割文本，控制每块的最大长度
         
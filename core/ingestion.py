@@ -0,0 +1,146 @@
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+import queue
+import threading
+from .vector_store import make_chunk_id
+
+_STOP = object()
+
+
+class IngestionPipeline:
+    """流式导入流水线：文本块按固定大小分批，依次经过去重、嵌入和写入
+
+    读取与嵌入在调用线程中进行，写入向量存储在后台线程中进行，两者之间是有界队列：
+    写入跟不上时嵌入会阻塞等待（背压），因此内存中最多同时存在
+    max_pending_batches + 2 个批次，与输入总量无关。
+    未指定来源时只在批内去重，跨批的重复块由存储按ID覆盖写入；指定来源时为了删除
+    该来源中已不存在的旧块，会记录本次出现过的块ID（每块几十字节，只与该来源的块数有关）。
+    """
+
+    def __init__(self, embedding_service, vector_store,
+                 batch_size: int = 256,
+                 max_pending_batches: int = 2,
+                 progress_callback: Optional[Callable[[dict], None]] = None,
+                 lexical_index=None):
+        """初始化导入流水线
+
+        Args:
+            embedding_service: 嵌入服务，需提供 embed_batch_array()
+            vector_store: 向量存储，需提供 add_documents()、get_existing_ids() 等增量接口
+            batch_size: 每批的文本块数量；嵌入服务启用多进程编码时至少为其 pool_min_texts
+            max_pending_batches: 已嵌入、等待写入的最大批次数
+            progress_callback: 每写完一批后调用，参数为当前统计字典的副本
+            lexical_index: 可选的 BM25Index，写入向量存储的同时同步添加和删除
+        """
+        if batch_size < 1 or max_pending_batches < 1:
+            raise ValueError("batch_size 和 max_pending_batches 必须大于0")
+
+        # 批次小于多进程编码的启用阈值时，流式导入永远不会用到工作进程
+        if getattr(embedding_service, "num_workers", 0) > 1:
+            batch_size = max(batch_size, getattr(embedding_service, "pool_min_texts", 0))
+
+        self.embedding_service = embedding_service
+        self.vector_store = vector_store
+        self.batch_size = batch_size
+        self.max_pending_batches = max_pending_batches
+        self.progress_callback = progress_callback
+        self.lexical_index = lexical_index
+
+    def _batches(self, chunks: Iterable[str], source: Optional[str],
+                 seen: Optional[set], stats: dict) -> Iterator[Tuple[List[str], List[str]]]:
+        """把文本块流切分为 (ids, texts) 批次，跳过 seen（为None时为当前批）中已出现过的块"""
+        ids: List[str] = []
+        texts: List[str] = []
+        batch_seen: set = set()
+        for text in chunks:
+            stats["chunks"] += 1
+            chunk_id = make_chunk_id(text, source)
+            if chunk_id in batch_seen or (seen is not None and chunk_id in seen):
+                continue
+            batch_seen.add(chunk_id)
+            if seen is not None:
+                seen.add(chunk_id)
+            ids.append(chunk_id)
+            texts.append(text)
+            if len(ids) >= self.batch_size:
+                yield ids, texts
+                ids, texts = [], []
+                batch_seen = set()
+        if ids:
+            yield ids, texts
+
+    def _write_loop(self, pending: queue.Queue, stats: dict, lock: threading.Lock, errors: list) -> None:
+        """后台写入线程：出错后继续取出批次但不再写入，保证生产者不会被阻塞"""
+        while True:
+            item = pending.get()
+            if item is _STOP:
+                return
+            if errors:
+                continue
+            try:
+                texts, embeddings, metadata, ids = item
+                if texts:
+                    self.vector_store.add_documents(texts, embeddings, metadata, ids=ids)
+                    if self.lexical_index is not None:
+                        self.lexical_index.add(ids, texts)
+                with lock:
+                    stats["added"] += len(texts)
+                    snapshot = dict(stats)
+                if self.progress_callback is not None:
+                    self.progress_callback(snapshot)
+            except Exception as error:
+                errors.append(error)
+
+    def run(self, chunks: Iterable[str], source: Optional[str] = None) -> dict:
+        """执行导入
+
+        Args:
+            chunks: 文本块的可迭代对象，可以是生成器（如 DocumentProcessor.iter_chunks()）
+            source: 文本来源，写入元数据的 "source" 字段；指定时会删除该来源下本次未出现的旧块
+
+        Returns:
+            统计字典，包含 chunks（读取的块数）、total（去重后的块数，未指定来源时只在批内去重）、
+            added、skipped、removed
+        """
+        stats = {"chunks": 0, "total": 0, "added": 0, "skipped": 0, "removed": 0}
+        lock = threading.Lock()
+        errors: list = []
+        # 只有删除旧块时需要记住本次出现过的全部ID
+        seen: Optional[set] = set() if source is not None else None
+        pending: queue.Queue = queue.Queue(maxsize=self.max_pending_batches)
+        writer = threading.Thread(target=self._write_loop, args=(pending, stats, lock, errors),
+                                  name="ingestion-writer", daemon=True)
+        writer.start()
+
+        try:
+            for ids, texts in self._batches(chunks, source, seen, stats):
+                if errors:
+                    break
+                existing = self.vector_store.get_existing_ids(ids)
+                new_indices = [i for i, chunk_id in enumerate(ids) if chunk_id not in existing]
+                with lock:
+                    stats["total"] += len(ids)
+                    stats["skipped"] += len(ids) - len(new_indices)
+
+                new_ids = [ids[i] for i in new_indices]
+                new_texts = [texts[i] for i in new_indices]
+                embeddings = self.embedding_service.embed_batch_array(new_texts) if new_texts else None
+                metadata = [{"source": source} for _ in new_ids] if source is not None and new_ids else None
+                # 队列已满时阻塞，直到写入线程取走一批
+                pending.put((new_texts, embeddings, metadata, new_ids))
+        finally:
+            pending.put(_STOP)
+            writer.join()
+
+        if errors:
+            raise errors[0]
+
+        if source is not None:
+            stale = [chunk_id for chunk_id in self.vector_store.get_ids_by_source(source)
+                     if chunk_id not in seen]
+            for start in range(0, len(stale), self.batch_size):
+                self.vector_store.delete(stale[start:start + self.batch_size])
+            if self.lexical_index is not None:
+                self.lexical_index.remove(stale)
+            stats["removed"] = len(stale)
+
+        return stats
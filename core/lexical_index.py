@@ -0,0 +1,238 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import re
+import math
+import threading
+import numpy as np
+
+# 连续的汉字（含扩展A区）、连续的字母数字下划线
+_CJK_RUN = re.compile(r"[㐀-䶿一-鿿]+")
+_WORD = re.compile(r"[0-9a-z_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """默认分词：英文数字按单词切分，连续汉字切分为字符二元组（单个汉字保留为一元组）
+
+    二元组不依赖词典，对产品名、道具名等未登录词也能精确匹配。
+
+    Args:
+        text: 输入文本
+
+    Returns:
+        词项列表
+    """
+    text = text.lower()
+    tokens = _WORD.findall(text)
+    for run in _CJK_RUN.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def jieba_tokenize(text: str) -> List[str]:
+    """使用jieba搜索引擎模式分词（需要安装jieba）
+
+    Args:
+        text: 输入文本
+
+    Returns:
+        词项列表
+    """
+    import jieba
+
+    return [token for token in jieba.lcut_for_search(text.lower()) if token.strip()]
+
+
+TOKENIZERS = {"bigram": tokenize, "jieba": jieba_tokenize}
+
+
+class BM25Index:
+    """进程内的BM25倒排索引，支持增量添加和删除
+
+    每个词项对应一个倒排列表（文档下标、词频）；每个文档的长度归一化项
+    k1·(1 - b + b·dl/avgdl) 预先计算并缓存，只在平均文档长度变化后的首次检索时重新计算。
+    删除只标记文档，检索时跳过；已删除文档的比例超过 compact_threshold 时
+    自动调用 compact() 从倒排列表中清除它们并重新编号。
+    """
+
+    def __init__(self, tokenizer: str = "bigram", k1: float = 1.5, b: float = 0.75,
+                 compact_threshold: Optional[float] = 0.25):
+        """初始化索引
+
+        Args:
+            tokenizer: 分词方式，"bigram"（字符二元组，无额外依赖）或 "jieba"（需要安装jieba）
+            k1: BM25词频饱和参数
+            b: BM25文档长度归一化参数
+            compact_threshold: 已删除文档占全部行的比例超过该值时自动压缩，为None时不自动压缩
+        """
+        if tokenizer not in TOKENIZERS:
+            raise ValueError(f"不支持的分词方式: {tokenizer}")
+        self.tokenizer = tokenizer
+        self._tokenize = TOKENIZERS[tokenizer]
+        self.k1 = k1
+        self.b = b
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self) -> None:
+        """清空索引"""
+        with self._lock:
+            self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+            self._ids: List[str] = []
+            self._documents: List[Optional[str]] = []
+            self._lengths: List[int] = []
+            self._row_of: Dict[str, int] = {}
+            self._total_length = 0
+            self._norms: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def add(self, ids: List[str], documents: List[str]) -> None:
+        """添加文档，ID已存在时替换旧内容
+
+        Args:
+            ids: 文档ID列表
+            documents: 文档文本列表
+        """
+        tokenized = [self._tokenize(document) for document in documents]
+        with self._lock:
+            self._remove_locked(ids)
+            for doc_id, document, tokens in zip(ids, documents, tokenized):
+                row = len(self._ids)
+                self._ids.append(doc_id)
+                self._documents.append(document)
+                self._lengths.append(len(tokens))
+                self._row_of[doc_id] = row
+                self._total_length += len(tokens)
+
+                counts: Dict[str, int] = {}
+                for token in tokens:
+                    counts[token] = counts.get(token, 0) + 1
+                for token, count in counts.items():
+                    rows, frequencies = self._postings.setdefault(token, ([], []))
+                    rows.append(row)
+                    frequencies.append(count)
+            self._norms = None
+
+    def remove(self, ids: Iterable[str]) -> None:
+        """删除文档，不存在的ID会被忽略
+
+        Args:
+            ids: 待删除的文档ID
+        """
+        with self._lock:
+            self._remove_locked(ids)
+
+    def _remove_locked(self, ids: Iterable[str]) -> None:
+        for doc_id in ids:
+            row = self._row_of.pop(doc_id, None)
+            if row is not None:
+                self._total_length -= self._lengths[row]
+                self._documents[row] = None
+                self._norms = None
+
+        deleted = len(self._ids) - len(self._row_of)
+        if (self.compact_threshold is not None and deleted
+                and deleted > self.compact_threshold * len(self._ids)):
+            self._compact_locked()
+
+    def compact(self) -> int:
+        """从倒排列表中清除已删除的文档，并把剩余文档按原顺序重新编号
+
+        Returns:
+            清除的文档数
+        """
+        with self._lock:
+            return self._compact_locked()
+
+    def _compact_locked(self) -> int:
+        removed = len(self._ids) - len(self._row_of)
+        if not removed:
+            return 0
+        alive = np.sort(np.fromiter(self._row_of.values(), dtype=np.int64, count=len(self._row_of)))
+        new_rows = np.full(len(self._ids), -1, dtype=np.int64)
+        new_rows[alive] = np.arange(len(alive))
+
+        postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        for token, (rows, frequencies) in self._postings.items():
+            mapped = new_rows[rows]
+            keep = mapped >= 0
+            if keep.any():
+                postings[token] = (mapped[keep].tolist(), np.asarray(frequencies)[keep].tolist())
+        self._postings = postings
+
+        self._ids = [self._ids[row] for row in alive]
+        self._documents = [self._documents[row] for row in alive]
+        self._lengths = [self._lengths[row] for row in alive]
+        self._row_of = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._norms = None
+        return removed
+
+    def _compute_norms(self) -> np.ndarray:
+        """计算每个文档的长度归一化项，已删除的文档为无穷大（得分为0）"""
+        lengths = np.asarray(self._lengths, dtype=np.float32)
+        average = self._total_length / len(self._row_of) if self._row_of else 1.0
+        norms = self.k1 * (1.0 - self.b + self.b * lengths / max(average, 1e-6))
+        alive = np.zeros(len(self._ids), dtype=bool)
+        alive[list(self._row_of.values())] = True
+        norms[~alive] = np.inf
+        return norms
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[str, str, float]]:
+        """检索与查询最相关的文档
+
+        Args:
+            query: 查询文本
+            top_k: 返回的文档数量
+
+        Returns:
+            按得分降序排列的 (文档ID, 文档文本, BM25得分) 列表，只包含得分大于0的文档
+        """
+        terms = set(self._tokenize(query))
+        with self._lock:
+            if not self._row_of or not terms:
+                return []
+            if self._norms is None:
+                self._norms = self._compute_norms()
+
+            total = len(self._row_of)
+            scores = np.zeros(len(self._ids), dtype=np.float32)
+            for term in terms:
+                posting = self._postings.get(term)
+                if posting is None:
+                    continue
+                rows = np.asarray(posting[0])
+                frequencies = np.asarray(posting[1], dtype=np.float32)
+                norms = self._norms[rows]
+                live = np.isfinite(norms)
+                document_frequency = int(live.sum())
+                if document_frequency == 0:
+                    continue
+                idf = math.log(1.0 + (total - document_frequency + 0.5) / (document_frequency + 0.5))
+                scores[rows[live]] += idf * frequencies[live] * (self.k1 + 1.0) / (frequencies[live] + norms[live])
+
+            candidates = np.flatnonzero(scores > 0)
+            if len(candidates) > top_k:
+                candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+            ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+            return [(self._ids[row], self._documents[row], float(scores[row])) for row in ranked]
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """倒数排名融合（RRF）：score(d) = Σ 1 / (k + rank_i(d))，rank从1开始
+
+    Args:
+        rankings: 多个按相关性降序排列的ID列表
+        k: 平滑常数，越大越弱化头部排名的差异
+
+    Returns:
+        按融合得分降序排列的 (ID, 得分) 列表
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,726 @@
+from typing import Dict, Iterator, List, Optional, Set, Union
+import os
+import json
+import uuid
+import threading
+import numpy as np
+from .quantization import create_quantizer
+from .vector_store import resolve_ids
+
+
+class NumpyVectorStore:
+    """基于NumPy的精确检索向量存储，归一化后的float32向量以内存映射文件持久化
+
+    接口与 VectorStore 一致，检索时对全部向量做一次矩阵乘法并用 argpartition 取top-k，
+    结果为精确检索，可作为近似检索召回率的基准。返回的距离与chromadb默认的
+    平方L2距离一致（对单位向量即 2 - 2·cos）。
+
+    启用量化（quantization="int8" 或 "pq"）后，检索先在常驻内存的量化编码上近似打分，
+    再从mmap中读取候选的float32向量重新打分；float32矩阵只按需分页读入。
+
+    行只追加不修改：覆盖已有ID时追加新行并把旧行记入墓碑文件，删除同样只写墓碑，
+    检索时跳过已删除的行；compact() 把存活的行写成新一代数据文件，清单切换到新一代后
+    再删除旧文件，以回收已删除的行。
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    CODES_FILE = "codes.bin"
+    QUANTIZER_FILE = "quantizer.npz"
+    RECORDS_FILE = "records.jsonl"
+    MANIFEST_FILE = "manifest.json"
+    TOMBSTONES_FILE = "tombstones.txt"
+
+    def __init__(self, collection_name: str = "default", persist_directory: Optional[str] = None,
+                 initial_capacity: int = 1024,
+                 quantization: Optional[str] = None,
+                 rescore_factor: int = 4,
+                 min_train_size: int = 1024,
+                 pq_subspaces: int = 96):
+        """初始化向量存储
+
+        Args:
+            collection_name: 集合名称
+            persist_directory: 持久化目录，如果为None则使用内存存储
+            initial_capacity: 向量矩阵的初始容量（行数），不足时按倍数扩容
+            quantization: 量化方式，None（不量化）、"int8"（标量量化）或 "pq"（乘积量化）
+            rescore_factor: 量化检索时取 top_k * rescore_factor 个候选用float32重新打分，0表示不重打分
+            min_train_size: 文档数达到该值后才训练量化器，之前使用精确检索
+            pq_subspaces: 乘积量化的子空间数量，需整除向量维度
+        """
+        self.collection_name = collection_name
+        self.initial_capacity = initial_capacity
+        self.directory = os.path.join(persist_directory, collection_name) if persist_directory else None
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self.min_train_size = min_train_size
+        self.pq_subspaces = pq_subspaces
+
+        self._lock = threading.RLock()
+        # 内容版本号，每次写入、删除或清空时递增，随清单持久化
+        self._version = 0
+        self._reset_state()
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self._load()
+
+    def _reset_state(self) -> None:
+        """重置内存中的状态"""
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[Optional[dict]] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._codes: Optional[np.ndarray] = None
+        self._dimension: Optional[int] = None
+        self._size = 0
+        self._row_of: Dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._num_deleted = 0
+        # 数据文件的代数，compact() 写出新一代文件后由清单切换，0表示不带代数后缀
+        self._generation = 0
+        # 内存存储从快照恢复时，向量矩阵是快照mmap上的只读视图，需保持快照打开
+        self._snapshot = None
+        # 语料标识，集合新建或清空时重新生成，随清单持久化
+        self._corpus_id = uuid.uuid4().hex
+        self.quantizer = None
+        if self.quantization:
+            options = {"num_subspaces": self.pq_subspaces} if self.quantization == "pq" else {}
+            self.quantizer = create_quantizer(self.quantization, **options)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _data_file(self, name: str, generation: Optional[int] = None) -> str:
+        """数据文件（向量、量化编码、记录、墓碑）在指定代数（默认当前代数）下的文件名"""
+        generation = self._generation if generation is None else generation
+        if not generation:
+            return name
+        root, ext = os.path.splitext(name)
+        return f"{root}.{generation}{ext}"
+
+    def _open_matrix(self, file_name: str, width: int, dtype) -> np.ndarray:
+        """以mmap方式打开已有的矩阵文件，行数由文件大小推算"""
+        row_bytes = width * np.dtype(dtype).itemsize
+        capacity = os.path.getsize(self._path(file_name)) // row_bytes
+        return np.memmap(self._path(file_name), dtype=dtype, mode='r+', shape=(capacity, width))
+
+    def _grow_matrix(self, matrix: Optional[np.ndarray], file_name: str,
+                     capacity: int, width: int, dtype) -> np.ndarray:
+        """把矩阵扩容到 capacity 行，持久化时直接扩展文件并重新映射"""
+        if self.directory:
+            if matrix is not None:
+                matrix.flush()
+            with open(self._path(file_name), 'ab') as file:
+                file.truncate(capacity * width * np.dtype(dtype).itemsize)
+            return self._open_matrix(file_name, width, dtype)
+
+        grown = np.empty((capacity, width), dtype=dtype)
+        if matrix is not None:
+            grown[:self._size] = matrix[:self._size]
+        return grown
+
+    def _load(self) -> None:
+        """从持久化目录加载：向量和量化编码通过mmap映射，不读入内存"""
+        if not os.path.exists(self._path(self.MANIFEST_FILE)):
+            return
+
+        with open(self._path(self.MANIFEST_FILE), 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+        self._dimension = manifest["dimension"]
+        self._size = manifest["size"]
+        self._version = manifest.get("version", 0)
+        self._corpus_id = manifest.get("corpus_id", self._corpus_id)
+        self._generation = manifest.get("generation", 0)
+        if not self._size:
+            return
+
+        if self._dimension:
+            self._vectors = self._open_matrix(self._data_file(self.VECTORS_FILE), self._dimension, np.float32)
+
+        if (self.quantizer is not None and manifest.get("quantization") == self.quantization
+                and os.path.exists(self._path(self.QUANTIZER_FILE))):
+            with np.load(self._path(self.QUANTIZER_FILE)) as state:
+                self.quantizer.load_state(dict(state))
+            width = self.quantizer.code_width(self._dimension)
+            self._codes = self._open_matrix(self._data_file(self.CODES_FILE), width, self._code_dtype())
+
+        # 清单中的size是提交点，之后追加的残缺记录会被截掉
+        with open(self._path(self._data_file(self.RECORDS_FILE)), 'rb+') as file:
+            for row in range(self._size):
+                record = json.loads(file.readline())
+                self._ids.append(record["id"])
+                self._documents.append(record["document"])
+                self._metadatas.append(record["metadata"])
+                self._row_of[record["id"]] = row
+            file.truncate(file.tell())
+
+        self._alive = np.zeros(self._vectors.shape[0] if self._vectors is not None else 0, dtype=bool)
+        self._alive[:self._size] = True
+        self._num_deleted = manifest.get("deleted", 0)
+        if self._num_deleted:
+            with open(self._path(self._data_file(self.TOMBSTONES_FILE)), 'rb+') as file:
+                for _ in range(self._num_deleted):
+                    self._alive[int(file.readline())] = False
+                file.truncate(file.tell())
+            for doc_id, row in list(self._row_of.items()):
+                if not self._alive[row]:
+                    del self._row_of[doc_id]
+
+    def _write_manifest(self) -> None:
+        """写入清单文件（先写临时文件再原子替换）"""
+        manifest = {"dimension": self._dimension, "size": self._size, "deleted": self._num_deleted,
+                    "version": self._version, "corpus_id": self._corpus_id, "generation": self._generation}
+        if self._codes is not None:
+            manifest["quantization"] = self.quantization
+        temp_path = self._path(self.MANIFEST_FILE + ".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(manifest, file)
+        os.replace(temp_path, self._path(self.MANIFEST_FILE))
+
+    def _code_dtype(self):
+        return np.int8 if self.quantization == "int8" else np.uint8
+
+    def _ensure_capacity(self, required: int) -> None:
+        """确保向量矩阵（以及量化编码矩阵）至少能容纳 required 行"""
+        capacity = 0 if self._vectors is None else self._vectors.shape[0]
+        if required <= capacity:
+            return
+
+        new_capacity = max(self.initial_capacity, capacity * 2, required)
+        alive = np.zeros(new_capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._alive = alive
+        self._vectors = self._grow_matrix(self._vectors, self._data_file(self.VECTORS_FILE), new_capacity,
+                                          self._dimension, np.float32)
+        # 扩容后矩阵已复制到内存，不再引用快照
+        self._snapshot = None
+        if self._codes is not None:
+            self._codes = self._grow_matrix(self._codes, self._data_file(self.CODES_FILE), new_capacity,
+                                            self.quantizer.code_width(self._dimension), self._code_dtype())
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """对向量做L2归一化"""
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def add_documents(self, documents: List[str],
+                      embeddings: Union[List[List[float]], np.ndarray],
+                      metadata: Optional[List[dict]] = None,
+                      ids: Optional[List[str]] = None) -> None:
+        """添加文档到向量存储，ID已存在时覆盖（upsert）
+
+        Args:
+            documents: 文档列表
+            embeddings: 对应的嵌入向量列表，或形状为 (n, dim) 的float32矩阵
+            metadata: 可选的元数据列表
+            ids: 可选的文档ID列表，为None时由 make_chunk_id 按来源和内容生成
+        """
+        if not documents:
+            return
+
+        vectors = self._normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(documents), -1))
+        ids, keep = resolve_ids(documents, metadata, ids)
+        metadata = metadata or [None] * len(documents)
+        if len(keep) < len(ids):
+            vectors = vectors[keep]
+            documents = [documents[i] for i in keep]
+            metadata = [metadata[i] for i in keep]
+            ids = [ids[i] for i in keep]
+
+        with self._lock:
+            if self._dimension is None:
+                self._dimension = vectors.shape[1]
+            elif vectors.shape[1] != self._dimension:
+                raise ValueError(f"向量维度不匹配: 期望 {self._dimension}，实际 {vectors.shape[1]}")
+
+            start = self._size
+            self._ensure_capacity(start + len(documents))
+            replaced = [self._row_of[doc_id] for doc_id in ids if doc_id in self._row_of]
+            self._vectors[start:start + len(documents)] = vectors
+            if self._codes is not None:
+                self._codes[start:start + len(documents)] = self.quantizer.encode(vectors)
+
+            if self.directory:
+                self._vectors.flush()
+                if self._codes is not None:
+                    self._codes.flush()
+                with open(self._path(self._data_file(self.RECORDS_FILE)), 'a', encoding='utf-8') as file:
+                    for doc_id, document, meta in zip(ids, documents, metadata):
+                        file.write(json.dumps({"id": doc_id, "document": document, "metadata": meta},
+                                              ensure_ascii=False) + "\n")
+                self._append_tombstones(replaced)
+
+            self._ids.extend(ids)
+            self._documents.extend(documents)
+            self._metadatas.extend(metadata)
+            self._alive[replaced] = False
+            self._alive[start:start + len(documents)] = True
+            self._num_deleted += len(replaced)
+            for offset, doc_id in enumerate(ids):
+                self._row_of[doc_id] = start + offset
+            self._size += len(documents)
+            self._version += 1
+
+            if self.directory:
+                self._write_manifest()
+
+    def _append_tombstones(self, rows: List[int]) -> None:
+        """把已删除的行号追加到墓碑文件，清单更新后才生效"""
+        if rows:
+            with open(self._path(self._data_file(self.TOMBSTONES_FILE)), 'a', encoding='utf-8') as file:
+                file.writelines(f"{row}\n" for row in rows)
+
+    def get_existing_ids(self, ids: List[str]) -> Set[str]:
+        """查询哪些ID已在集合中
+
+        Args:
+            ids: 待查询的ID列表
+
+        Returns:
+            已存在的ID集合
+        """
+        with self._lock:
+            return {doc_id for doc_id in ids if doc_id in self._row_of}
+
+    def get_ids_by_source(self, source: str) -> List[str]:
+        """获取某个来源的全部文档ID
+
+        Args:
+            source: 文档来源（元数据中的 "source"）
+
+        Returns:
+            ID列表
+        """
+        with self._lock:
+            return [doc_id for doc_id, row in self._row_of.items()
+                    if (self._metadatas[row] or {}).get("source") == source]
+
+    def delete(self, ids: List[str]) -> None:
+        """按ID删除文档，不存在的ID会被忽略
+
+        Args:
+            ids: 待删除的ID列表
+        """
+        with self._lock:
+            rows = [self._row_of.pop(doc_id) for doc_id in set(ids) if doc_id in self._row_of]
+            if not rows:
+                return
+            if self.directory:
+                self._append_tombstones(rows)
+            self._alive[rows] = False
+            self._num_deleted += len(rows)
+            self._version += 1
+            if self.directory:
+                self._write_manifest()
+
+    def compact(self, block_size: int = 65536) -> int:
+        """回收已删除（含被覆盖）的行：按原顺序重写向量、量化编码和记录，清空墓碑
+
+        持久化时把存活的行写成新一代数据文件，清单原子替换为指向新一代后才删除旧文件；
+        清单写入前中断时仍使用旧一代文件。进行中的检索继续使用旧的矩阵和列表。
+
+        Args:
+            block_size: 复制矩阵时每块的行数
+
+        Returns:
+            回收的行数
+        """
+        with self._lock:
+            if not self._num_deleted:
+                return 0
+            rows = np.flatnonzero(self._alive[:self._size])
+            removed = self._size - len(rows)
+            old_generation, generation = self._generation, self._generation + 1
+
+            matrices = [(self.VECTORS_FILE, self._vectors)]
+            if self._codes is not None:
+                matrices.append((self.CODES_FILE, self._codes))
+            compacted = []
+            for file_name, matrix in matrices:
+                if self.directory:
+                    file_name = self._data_file(file_name, generation)
+                    with open(self._path(file_name), 'wb') as file:
+                        for start in range(0, len(rows), block_size):
+                            file.write(np.ascontiguousarray(matrix[rows[start:start + block_size]]).tobytes())
+                    compacted.append((file_name, matrix.shape[1], matrix.dtype))
+                else:
+                    compacted.append(np.array(matrix[rows]))
+
+            ids = [self._ids[row] for row in rows]
+            documents = [self._documents[row] for row in rows]
+            metadatas = [self._metadatas[row] for row in rows]
+
+            if self.directory:
+                with open(self._path(self._data_file(self.RECORDS_FILE, generation)), 'w', encoding='utf-8') as file:
+                    for doc_id, document, meta in zip(ids, documents, metadatas):
+                        file.write(json.dumps({"id": doc_id, "document": document, "metadata": meta},
+                                              ensure_ascii=False) + "\n")
+                # 上次中断的压缩可能留下同代的墓碑文件，新一代从空墓碑开始
+                tombstones_path = self._path(self._data_file(self.TOMBSTONES_FILE, generation))
+                if os.path.exists(tombstones_path):
+                    os.remove(tombstones_path)
+                compacted = [self._open_matrix(file_name, width, dtype)
+                             for file_name, width, dtype in compacted]
+
+            self._vectors = compacted[0]
+            self._codes = compacted[1] if len(compacted) > 1 else None
+            self._snapshot = None
+            self._ids, self._documents, self._metadatas = ids, documents, metadatas
+            self._row_of = {doc_id: row for row, doc_id in enumerate(ids)}
+            self._size = len(ids)
+            self._alive = np.zeros(self._vectors.shape[0], dtype=bool)
+            self._alive[:self._size] = True
+            self._num_deleted = 0
+            self._generation = generation
+
+            if self.directory:
+                # 清单是提交点：替换后新一代生效，旧一代文件可以删除
+                self._write_manifest()
+                self._remove_data_files(old_generation)
+            return removed
+
+    def _remove_data_files(self, generation: int) -> None:
+        """删除指定代数的数据文件"""
+        for name in (self.VECTORS_FILE, self.CODES_FILE, self.RECORDS_FILE, self.TOMBSTONES_FILE):
+            path = self._path(self._data_file(name, generation))
+            if os.path.exists(path):
+                os.remove(path)
+
+    def train_quantizer(self) -> None:
+        """用当前已有的向量训练量化器，并为所有向量生成量化编码"""
+        if self.quantizer is None:
+            raise ValueError("未启用量化，无法训练量化器")
+
+        with self._lock:
+            if self._size == 0:
+                return
+            self.quantizer.train(self._vectors[:self._size])
+
+            width = self.quantizer.code_width(self._dimension)
+            capacity = self._vectors.shape[0]
+            codes_file = self._data_file(self.CODES_FILE)
+            if self.directory and os.path.exists(self._path(codes_file)):
+                os.remove(self._path(codes_file))
+            codes = self._grow_matrix(None, codes_file, capacity, width, self._code_dtype())
+            for start in range(0, self._size, 65536):
+                end = min(start + 65536, self._size)
+                codes[start:end] = self.quantizer.encode(self._vectors[start:end])
+            self._codes = codes
+
+            if self.directory:
+                self._codes.flush()
+                np.savez(self._path(self.QUANTIZER_FILE), **self.quantizer.state())
+                self._write_manifest()
+
+    def _maybe_train_quantizer(self) -> None:
+        """启用量化且文档数量足够时，首次检索前自动训练量化器"""
+        if (self.quantizer is not None and self._codes is None
+                and self._size >= max(self.min_train_size, 1)):
+            self.train_quantizer()
+
+    def search(self, query_embedding: List[float], top_k: int = 5) -> dict:
+        """搜索相似文档
+
+        Args:
+            query_embedding: 查询向量
+            top_k: 返回的文档数量
+
+        Returns:
+            搜索结果字典，格式与chromadb的query结果一致
+        """
+        return self.search_batch([query_embedding], top_k)
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """按行取分数最高的k个下标（降序）"""
+        if k < scores.shape[1]:
+            indices = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            indices = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+        order = np.argsort(-np.take_along_axis(scores, indices, axis=1), axis=1, kind="stable")
+        return np.take_along_axis(indices, order, axis=1)
+
+    def search_batch(self, query_embeddings: Union[List[List[float]], np.ndarray], top_k: int = 5) -> dict:
+        """批量搜索相似文档，所有查询共用一次矩阵乘法
+
+        Args:
+            query_embeddings: 查询向量列表，或形状为 (m, dim) 的矩阵
+            top_k: 每个查询返回的文档数量
+
+        Returns:
+            搜索结果字典，每个键对应一个按查询顺序排列的列表
+        """
+        with self._lock:
+            self._maybe_train_quantizer()
+            size = self._size
+            live = size - self._num_deleted
+            dead = ~self._alive[:size] if self._num_deleted else None
+            vectors = self._vectors
+            codes = self._codes
+            # 追加只扩展列表，清空和压缩会替换为新列表，持有当前列表即可在锁外安全读取前 size 行
+            ids, documents, metadatas = self._ids, self._documents, self._metadatas
+
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1)
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        if live == 0 or top_k <= 0:
+            for values in results.values():
+                values.extend([] for _ in range(len(queries)))
+            return results
+
+        queries = self._normalize(queries)
+        k = min(top_k, live)
+
+        if codes is None:
+            scores = queries @ vectors[:size].T
+            if dead is not None:
+                scores[:, dead] = -np.inf
+            top_indices = self._top_k(scores, k)
+            top_scores = np.take_along_axis(scores, top_indices, axis=1)
+        else:
+            approximate = self.quantizer.scores(codes[:size], queries)
+            if dead is not None:
+                approximate[:, dead] = -np.inf
+            if self.rescore_factor > 0:
+                # 在量化候选上用float32向量精确重打分，只读取候选所在的行
+                candidates = self._top_k(approximate, min(size, k * self.rescore_factor))
+                candidate_vectors = vectors[candidates.ravel()].reshape(*candidates.shape, -1)
+                exact = np.einsum("qcd,qd->qc", candidate_vectors, queries)
+                if dead is not None:
+                    exact[dead[candidates]] = -np.inf
+                order = self._top_k(exact, k)
+                top_indices = np.take_along_axis(candidates, order, axis=1)
+                top_scores = np.take_along_axis(exact, order, axis=1)
+            else:
+                top_indices = self._top_k(approximate, k)
+                top_scores = np.take_along_axis(approximate, top_indices, axis=1)
+
+        for indices, row_scores in zip(top_indices, top_scores):
+            results["ids"].append([ids[i] for i in indices])
+            results["documents"].append([documents[i] for i in indices])
+            results["metadatas"].append([metadatas[i] for i in indices])
+            results["distances"].append((2.0 - 2.0 * row_scores).tolist())
+        return results
+
+    def get_memory_usage(self) -> dict:
+        """获取向量数据的内存占用
+
+        float32矩阵只有以mmap持久化时才按需分页读入；内存存储（persist_directory=None）时
+        它与量化编码一起常驻内存，用于重打分，此时量化并不能减少常驻内存。
+
+        Returns:
+            包含float32向量字节数、float32矩阵是否常驻内存（float32_resident）、
+            量化编码字节数、实际常驻字节数（resident_bytes）和压缩比的字典；
+            压缩比为float32字节数与常驻字节数之比
+        """
+        float32_bytes = self._size * (self._dimension or 0) * 4
+        float32_resident = not isinstance(self._vectors, np.memmap) and self._snapshot is None
+        info = {"float32_bytes": float32_bytes, "float32_resident": float32_resident}
+        if self._codes is not None:
+            quantizer_bytes = sum(np.asarray(value).nbytes for value in self.quantizer.state().values())
+            quantized_bytes = self._size * self._codes.shape[1] * self._codes.itemsize + quantizer_bytes
+            resident_bytes = quantized_bytes + (float32_bytes if float32_resident else 0)
+            info["quantized_bytes"] = quantized_bytes
+            info["resident_bytes"] = resident_bytes
+            info["compression_ratio"] = float32_bytes / resident_bytes if resident_bytes else 0.0
+        return info
+
+    def get_documents(self) -> List[str]:
+        """获取所有文档
+
+        Returns:
+            文档列表
+        """
+        with self._lock:
+            return [document for document, alive in zip(self._documents, self._alive) if alive]
+
+    def iter_documents(self, page_size: int = 1000, include_embeddings: bool = False) -> Iterator[dict]:
+        """按固定大小分页遍历集合，嵌入直接从mmap中按页读取
+
+        Args:
+            page_size: 每页最多返回的文档数量（已删除的行不计入）
+            include_embeddings: 是否同时返回嵌入向量（存储的是归一化后的向量）
+
+        Yields:
+            包含 ids、documents、metadatas（以及 embeddings，形状为 (n, dim) 的矩阵）的字典
+        """
+        with self._lock:
+            size = self._size
+        start = 0
+        while start < size:
+            with self._lock:
+                end = min(start + page_size, size)
+                rows = np.flatnonzero(self._alive[start:end]) + start
+                page = {
+                    "ids": [self._ids[row] for row in rows],
+                    "documents": [self._documents[row] for row in rows],
+                    "metadatas": [self._metadatas[row] for row in rows]
+                }
+                if include_embeddings:
+                    page["embeddings"] = np.array(self._vectors[rows], dtype=np.float32)
+            start = end
+            if page["ids"]:
+                yield page
+
+    def snapshot(self, path: str, dtype: str = "float32", page_size: int = 1000) -> int:
+        """导出为紧凑的二进制快照文件，见 core.snapshot
+
+        Args:
+            path: 快照文件路径
+            dtype: 嵌入矩阵的存储精度，"float32" 或 "float16"
+            page_size: 每页读取的文档数量
+
+        Returns:
+            导出的文档数量
+        """
+        from .snapshot import export_snapshot
+        return export_snapshot(self, path, dtype, page_size)
+
+    def restore(self, path: str, page_size: int = 1000) -> int:
+        """从快照文件导入文档和嵌入，无需重新嵌入
+
+        集合为空且快照是归一化的float32矩阵时直接使用快照中的矩阵：内存存储把快照mmap上的视图
+        作为向量矩阵（零拷贝，首次追加时才复制），持久化存储把矩阵段按字节复制为向量文件后映射；
+        否则按页调用 add_documents() 导入。
+
+        Args:
+            path: 快照文件路径
+            page_size: 每页写入的文档数量
+
+        Returns:
+            导入的文档数量
+        """
+        from .snapshot import Snapshot, import_snapshot
+
+        with self._lock:
+            if self._size == 0:
+                snapshot = Snapshot(path)
+                if self._restore_snapshot(snapshot, page_size):
+                    return len(snapshot)
+                snapshot.close()
+        return import_snapshot(self, path, page_size)
+
+    @staticmethod
+    def _is_normalized(matrix: np.ndarray, block_size: int = 65536) -> bool:
+        """分块检查矩阵的每一行是否为单位向量"""
+        for start in range(0, len(matrix), block_size):
+            norms = np.linalg.norm(matrix[start:start + block_size], axis=1)
+            if not np.allclose(norms, 1.0, atol=1e-4):
+                return False
+        return True
+
+    def _restore_snapshot(self, snapshot, page_size: int) -> bool:
+        """把快照直接作为空集合的内容，快照不满足条件时返回False"""
+        if (not snapshot.count or snapshot.dtype != "float32"
+                or not self._is_normalized(snapshot.embeddings)):
+            return False
+
+        ids: List[str] = []
+        documents: List[str] = []
+        metadatas: List[Optional[dict]] = []
+        for page in snapshot.iter_pages(page_size, include_embeddings=False):
+            ids.extend(page["ids"])
+            documents.extend(page["documents"])
+            metadatas.extend(page["metadatas"])
+        if len(set(ids)) != len(ids):
+            return False
+
+        if self.directory:
+            self._write_snapshot_files(snapshot, ids, documents, metadatas)
+            snapshot.close()
+            self._reset_state()
+            self._load()
+            return True
+
+        self._dimension = snapshot.dimension
+        self._vectors = snapshot.embeddings
+        self._snapshot = snapshot
+        self._ids, self._documents, self._metadatas = ids, documents, metadatas
+        self._row_of = {doc_id: row for row, doc_id in enumerate(ids)}
+        self._alive = np.ones(len(ids), dtype=bool)
+        self._size = len(ids)
+        self._version += 1
+        return True
+
+    def _write_snapshot_files(self, snapshot, ids: List[str], documents: List[str],
+                              metadatas: List[Optional[dict]]) -> None:
+        """把快照的矩阵段按字节复制为向量文件，并写入记录和清单"""
+        for name in (self._data_file(self.CODES_FILE), self.QUANTIZER_FILE, self._data_file(self.TOMBSTONES_FILE)):
+            if os.path.exists(self._path(name)):
+                os.remove(self._path(name))
+
+        start, length = snapshot.section("embeddings")
+        with open(snapshot.path, 'rb') as source, open(self._path(self._data_file(self.VECTORS_FILE)), 'wb') as target:
+            source.seek(start)
+            while length:
+                block = source.read(min(length, 1 << 20))
+                target.write(block)
+                length -= len(block)
+        with open(self._path(self._data_file(self.RECORDS_FILE)), 'w', encoding='utf-8') as file:
+            for doc_id, document, meta in zip(ids, documents, metadatas):
+                file.write(json.dumps({"id": doc_id, "document": document, "metadata": meta},
+                                      ensure_ascii=False) + "\n")
+
+        self._dimension = snapshot.dimension
+        self._size = len(ids)
+        self._num_deleted = 0
+        self._codes = None
+        self._version += 1
+        self._write_manifest()
+
+    def clear(self) -> None:
+        """清空集合"""
+        with self._lock:
+            if self.directory:
+                self._remove_data_files(self._generation)
+                for name in (self.QUANTIZER_FILE, self.MANIFEST_FILE):
+                    if os.path.exists(self._path(name)):
+                        os.remove(self._path(name))
+            self._reset_state()
+            # 版本号在清空后继续递增，避免与清空前缓存的版本重复
+            self._version += 1
+            if self.directory:
+                self._write_manifest()
+
+    def get_version(self) -> int:
+        """获取内容版本号，集合内容变化后一定不同，可用于使缓存失效
+
+        Returns:
+            版本号
+        """
+        return self._version
+
+    def get_corpus_id(self) -> str:
+        """获取语料标识，与版本号一起区分不同存储和重建前后的语料
+
+        Returns:
+            "集合名称:随机标识"，标识在集合新建或清空时生成
+        """
+        return f"{self.collection_name}:{self._corpus_id}"
+
+    def count(self) -> int:
+        """获取文档数量
+
+        Returns:
+            文档数量
+        """
+        return self._size - self._num_deleted
+
+
+def recall_at_k(retrieved_ids: List[List[str]], reference_ids: List[List[str]], k: int) -> float:
+    """计算召回率@k，reference_ids 通常取自 NumpyVectorStore 的精确检索结果
+
+    Args:
+        retrieved_ids: 待评估检索的每个查询的结果ID列表
+        reference_ids: 精确检索的每个查询的结果ID列表
+        k: 截断位置
+
+    Returns:
+        平均召回率
+    """
+    recalls: List[float] = []
+    for retrieved, reference in zip(retrieved_ids, reference_ids):
+        expected = set(reference[:k])
+        if expected:
+            recalls.append(len(expected & set(retrieved[:k])) / len(expected))
+    return float(np.mean(recalls)) if recalls else 0.0
@@ -0,0 +1,208 @@
+from typing import Optional
+import numpy as np
+
+# 近似打分时每块处理的行数，限制反量化产生的临时内存
+SCORE_BLOCK_ROWS = 65536
+
+
+class ScalarQuantizer:
+    """int8标量量化，按维度的最大绝对值把分量线性缩放到 [-127, 127]"""
+
+    kind = "int8"
+
+    def __init__(self):
+        self.scale: Optional[np.ndarray] = None
+
+    @property
+    def is_trained(self) -> bool:
+        return self.scale is not None
+
+    def train(self, vectors: np.ndarray) -> None:
+        """根据样本向量确定每个维度的缩放系数
+
+        Args:
+            vectors: 形状为 (n, dim) 的float32样本
+        """
+        max_abs = np.zeros(vectors.shape[1], dtype=np.float32)
+        for start in range(0, len(vectors), SCORE_BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+            max_abs = np.maximum(max_abs, np.max(np.abs(block), axis=0))
+        self.scale = (np.maximum(max_abs, 1e-6) / 127.0).astype(np.float32)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """量化向量，超出训练范围的分量被截断
+
+        Args:
+            vectors: 形状为 (n, dim) 的float32向量
+
+        Returns:
+            形状为 (n, dim) 的int8编码
+        """
+        return np.clip(np.rint(vectors / self.scale), -127, 127).astype(np.int8)
+
+    def code_width(self, dimension: int) -> int:
+        """每个向量的编码字节数"""
+        return dimension
+
+    def scores(self, codes: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """计算查询与编码向量的近似内积
+
+        Args:
+            codes: 形状为 (n, dim) 的int8编码
+            queries: 形状为 (m, dim) 的float32查询
+
+        Returns:
+            形状为 (m, n) 的近似内积
+        """
+        scaled_queries = (queries * self.scale).T
+        output = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+            block = codes[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+            output[:, start:start + len(block)] = (block @ scaled_queries).T
+        return output
+
+    def state(self) -> dict:
+        return {"scale": self.scale}
+
+    def load_state(self, state: dict) -> None:
+        self.scale = state["scale"]
+
+
+class ProductQuantizer:
+    """乘积量化，把向量切分为若干子空间，每个子空间用256个质心的码本编码为1个字节"""
+
+    kind = "pq"
+
+    def __init__(self, num_subspaces: int = 96, num_centroids: int = 256,
+                 iterations: int = 10, max_train_size: int = 10000, seed: int = 0):
+        """初始化乘积量化器
+
+        Args:
+            num_subspaces: 子空间数量，需整除向量维度
+            num_centroids: 每个子空间的质心数量（不超过256）
+            iterations: k-means迭代次数
+            max_train_size: 训练时最多采样的向量数
+            seed: 随机种子
+        """
+        self.num_subspaces = num_subspaces
+        self.num_centroids = num_centroids
+        self.iterations = iterations
+        self.max_train_size = max_train_size
+        self.seed = seed
+        self.codebooks: Optional[np.ndarray] = None
+
+    @property
+    def is_trained(self) -> bool:
+        return self.codebooks is not None
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, dim) -> (num_subspaces, n, sub_dim)"""
+        n, dimension = vectors.shape
+        if dimension % self.num_subspaces:
+            raise ValueError(f"向量维度 {dimension} 不能被子空间数量 {self.num_subspaces} 整除")
+        return vectors.reshape(n, self.num_subspaces, -1).transpose(1, 0, 2)
+
+    def train(self, vectors: np.ndarray) -> None:
+        """对每个子空间运行k-means训练码本
+
+        Args:
+            vectors: 形状为 (n, dim) 的float32样本
+        """
+        rng = np.random.default_rng(self.seed)
+        if len(vectors) > self.max_train_size:
+            vectors = vectors[np.sort(rng.choice(len(vectors), self.max_train_size, replace=False))]
+        vectors = np.asarray(vectors, dtype=np.float32)
+
+        num_centroids = min(self.num_centroids, len(vectors))
+        subspaces = self._split(vectors)
+        codebooks = np.empty((self.num_subspaces, self.num_centroids, subspaces.shape[2]), dtype=np.float32)
+
+        for j, points in enumerate(subspaces):
+            centroids = points[rng.choice(len(points), num_centroids, replace=False)].copy()
+            for _ in range(self.iterations):
+                assignments = self._assign(points, centroids)
+                counts = np.bincount(assignments, minlength=num_centroids)
+                sums = np.stack([np.bincount(assignments, weights=points[:, d], minlength=num_centroids)
+                                 for d in range(points.shape[1])], axis=1).astype(np.float32)
+                empty = counts == 0
+                centroids[~empty] = sums[~empty] / counts[~empty, None]
+                # 空簇重新用随机样本初始化
+                if empty.any():
+                    centroids[empty] = points[rng.choice(len(points), int(empty.sum()))]
+            codebooks[j, :num_centroids] = centroids
+            # 样本不足256个时，多余的质心复制已有质心，不会被选中
+            codebooks[j, num_centroids:] = centroids[0]
+
+        self.codebooks = codebooks
+
+    @staticmethod
+    def _assign(points: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """把每个点分配给最近的质心"""
+        distances = (
+            np.sum(centroids * centroids, axis=1)[None, :]
+            - 2.0 * points @ centroids.T
+        )
+        return np.argmin(distances, axis=1)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        """量化向量
+
+        Args:
+            vectors: 形状为 (n, dim) 的float32向量
+
+        Returns:
+            形状为 (n, num_subspaces) 的uint8编码
+        """
+        subspaces = self._split(np.asarray(vectors, dtype=np.float32))
+        codes = np.empty((len(vectors), self.num_subspaces), dtype=np.uint8)
+        for j, points in enumerate(subspaces):
+            codes[:, j] = self._assign(points, self.codebooks[j])
+        return codes
+
+    def code_width(self, dimension: int) -> int:
+        """每个向量的编码字节数"""
+        return self.num_subspaces
+
+    def scores(self, codes: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """用非对称距离计算（查表）得到查询与编码向量的近似内积
+
+        Args:
+            codes: 形状为 (n, num_subspaces) 的uint8编码
+            queries: 形状为 (m, dim) 的float32查询
+
+        Returns:
+            形状为 (m, n) 的近似内积
+        """
+        # tables[q, j, c] = 查询q在子空间j上与质心c的内积
+        tables = np.einsum("qjd,jcd->qjc", self._split(queries).transpose(1, 0, 2), self.codebooks)
+        output = np.zeros((len(queries), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+            block = np.asarray(codes[start:start + SCORE_BLOCK_ROWS])
+            for q, table in enumerate(tables):
+                row = output[q, start:start + len(block)]
+                for j in range(self.num_subspaces):
+                    row += table[j][block[:, j]]
+        return output
+
+    def state(self) -> dict:
+        return {"codebooks": self.codebooks}
+
+    def load_state(self, state: dict) -> None:
+        self.codebooks = state["codebooks"]
+
+
+def create_quantizer(kind: str, **options):
+    """按名称创建量化器
+
+    Args:
+        kind: "int8" 或 "pq"
+        **options: 传给量化器构造函数的参数
+
+    Returns:
+        量化器实例
+    """
+    if kind == "int8":
+        return ScalarQuantizer()
+    if kind == "pq":
+        return ProductQuantizer(**options)
+    raise ValueError(f"不支持的量化方式: {kind}")
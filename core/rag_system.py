@@ -1,9 +1,21 @@
-from typing import List, Optional
+from typing import Callable, Iterable, List, Optional, Tuple
+import os
+import time
+import threading
+from .answer_cache import AnswerCache
+from .cascade import CascadePolicy
 from .document_processor import DocumentProcessor
-from .vector_store import VectorStore
+from .ingestion import IngestionPipeline
+from .lexical_index import BM25Index, reciprocal_rank_fusion
+from .semantic_cache import SemanticCache
+from .vector_store import VectorStore, create_vector_store
 from services.embedding_service import EmbeddingService
+from services.embedding_cache import EmbeddingCache
+from services.query_batcher import QueryBatcher
 from services.reranker import Reranker
-from services.generator import Generator, DeepSeekGenerator
+from services.generator import Generator, DeepSeekGenerator, TokenStream
+from services.context_packer import ContextPacker
+from services.llm_cache import LLMCache
 
 
 class RAGSystem:
@@ -14,7 +26,26 @@ class RAGSystem:
                  rerank_model: str = 'cross-encoder/mmarco-mMiniLMv2-L12-H384-v1',
                  generation_model: str = "deepseek-chat",
                  collection_name: str = "default",
-                 persist_directory: Optional[str] = None):
+                 persist_directory: Optional[str] = None,
+                 embedding_cache_dir: Optional[str] = None,
+                 embedding_workers: int = 0,
+                 query_batching: bool = False,
+                 model_backend: str = "torch",
+                 vector_backend: str = "chroma",
+                 vector_store_options: Optional[dict] = None,
+                 num_shards: int = 1,
+                 retrieval_mode: str = "dense",
+                 lexical_tokenizer: str = "bigram",
+                 semantic_cache_threshold: Optional[float] = None,
+                 answer_cache: Optional[AnswerCache] = None,
+                 rerank_cache_size: int = 10000,
+                 cascade_policy: Optional[CascadePolicy] = None,
+                 context_token_budget: Optional[int] = None,
+                 context_tokenizer: Optional[str] = None,
+                 llm_cache_dir: Optional[str] = None,
+                 embedding_onnx_file_name: Optional[str] = None,
+                 rerank_onnx_file_name: Optional[str] = None,
+                 local_files_only: bool = False):
         """初始化RAG系统
         
         Args:
@@ -23,16 +54,117 @@ class RAGSystem:
             generation_model: 生成模型名称
             collection_name: 向量存储集合名称
             persist_directory: 向量存储持久化目录
+            embedding_cache_dir: 嵌入缓存目录，为None时不启用缓存
+            embedding_workers: 大批量导入时的嵌入工作进程数，小于2时不启用多进程
+            query_batching: 是否将并发查询的嵌入合并为微批处理，适用于多线程服务场景
+            model_backend: 嵌入模型与重排序模型的推理后端，"torch" 或 "onnx"
+            vector_backend: 向量存储后端，"chroma" 或 "numpy"
+            vector_store_options: 传给向量存储的额外参数，如 {"quantization": "int8"}
+            num_shards: 向量存储的分片数量，大于1时按文档ID哈希分片并并行检索
+            retrieval_mode: 默认检索方式，"dense"（向量）、"lexical"（BM25）或 "hybrid"（两者RRF融合）
+            lexical_tokenizer: BM25索引的分词方式，"bigram" 或 "jieba"
+            semantic_cache_threshold: 语义查询缓存的余弦相似度阈值（如0.95），为None时不启用
+            answer_cache: 回答缓存（如 AnswerCache(cache_dir=...)），为None时不缓存回答
+            rerank_cache_size: 重排序分数缓存的最大 (查询, 文档) 对数，为0时不缓存
+            cascade_policy: 级联策略，向量检索时根据距离跳过或缩小重排序，为None时总是完整重排序
+            context_token_budget: 提示词中上下文片段的词元预算，为None时不限制
+            context_tokenizer: 计算词元数的本地分词器名称或目录，为None时按字符估算
+            llm_cache_dir: LLM响应缓存目录，相同的提示词在进程重启后也不再请求模型，为None时不缓存
+            embedding_onnx_file_name: ONNX后端下嵌入模型的ONNX文件名，为None时自动查找量化文件
+            rerank_onnx_file_name: ONNX后端下重排序模型的ONNX文件名，为None时自动查找量化文件
+            local_files_only: 是否只从本地加载嵌入模型和重排序模型，不访问网络
         """
         self.doc_processor = DocumentProcessor()
-        self.embedding_service = EmbeddingService(embedding_model)
-        self.vector_store = VectorStore(collection_name, persist_directory)
-        self.reranker = Reranker(rerank_model)
-        # self.generator = Generator(generation_model)
-        self.generator = DeepSeekGenerator(generation_model)
+        embedding_cache = EmbeddingCache(embedding_cache_dir) if embedding_cache_dir else None
+        self.embedding_service = EmbeddingService(embedding_model, cache=embedding_cache,
+                                                  num_workers=embedding_workers,
+                                                  backend=model_backend,
+                                                  onnx_file_name=embedding_onnx_file_name,
+                                                  local_files_only=local_files_only)
+        self.query_batcher = QueryBatcher(self.embedding_service) if query_batching else None
+        self.reranker = Reranker(rerank_model, backend=model_backend,
+                                 onnx_file_name=rerank_onnx_file_name,
+                                 local_files_only=local_files_only,
+                                 score_cache_size=rerank_cache_size)
+        self.semantic_cache = (SemanticCache(semantic_cache_threshold)
+                               if semantic_cache_threshold is not None else None)
+        self.answer_cache = answer_cache
+        self.cascade_policy = cascade_policy
+        self.context_packer = (ContextPacker(context_token_budget, tokenizer=context_tokenizer)
+                               if context_token_budget is not None else None)
+        self.llm_cache = LLMCache(llm_cache_dir) if llm_cache_dir else None
+
+        # 向量存储和生成器在首次使用时创建，只做导入或检索的调用方无需为其付出启动开销
+        self.generation_model = generation_model
+        self.collection_name = collection_name
+        self.persist_directory = persist_directory
+        self.vector_backend = vector_backend
+        self.vector_store_options = vector_store_options or {}
+        self.num_shards = num_shards
+        self.retrieval_mode = retrieval_mode
+        self.lexical_tokenizer = lexical_tokenizer
+        self._lexical_index: Optional[BM25Index] = None
+        self._lexical_lock = threading.Lock()
+        self._vector_store: Optional[VectorStore] = None
+        self._generator = None
+        # 多个线程（如 AsyncRAGSystem 的线程池）首次同时使用时只创建一个实例
+        self._vector_store_lock = threading.Lock()
+        self._generator_lock = threading.Lock()
+
+    @property
+    def vector_store(self) -> VectorStore:
+        """向量存储，首次使用时创建"""
+        if self._vector_store is None:
+            with self._vector_store_lock:
+                if self._vector_store is None and self.num_shards > 1:
+                    from .sharded_vector_store import ShardedVectorStore
+                    self._vector_store = ShardedVectorStore(self.vector_backend, self.collection_name,
+                                                            self.persist_directory, self.num_shards,
+                                                            **self.vector_store_options)
+                elif self._vector_store is None:
+                    self._vector_store = create_vector_store(self.vector_backend, self.collection_name,
+                                                             self.persist_directory,
+                                                             **self.vector_store_options)
+        return self._vector_store
+
+    @property
+    def lexical_index(self) -> BM25Index:
+        """BM25倒排索引，首次使用时从向量存储分页重建，之后随导入增量同步"""
+        with self._lexical_lock:
+            if self._lexical_index is None:
+                index = BM25Index(self.lexical_tokenizer)
+                for page in self.vector_store.iter_documents():
+                    index.add(page['ids'], page['documents'])
+                self._lexical_index = index
+        return self._lexical_index
+
+    @property
+    def generator(self):
+        """生成器，首次使用时创建"""
+        if self._generator is None:
+            with self._generator_lock:
+                if self._generator is None:
+                    # self._generator = Generator(self.generation_model, context_packer=self.context_packer,
+                    #                             response_cache=self.llm_cache)
+                    self._generator = DeepSeekGenerator(self.generation_model,
+                                                        context_packer=self.context_packer,
+                                                        response_cache=self.llm_cache)
+        return self._generator
+
+    def warmup(self, include_generator: bool = True) -> None:
+        """预先加载所有模型和组件，适用于服务启动阶段
+
+        Args:
+            include_generator: 是否同时创建生成器
+        """
+        self.embedding_service.warmup()
+        self.reranker.warmup()
+        self.vector_store.count()
+        if include_generator:
+            self.generator.get_model_info()
 
     def load_document(self, doc_file: str) -> int:
-        """加载文档到系统
+        """加载文档到系统，重复加载同一文件时只嵌入新增或修改的块
         
         Args:
             doc_file: 文档文件路径
@@ -40,21 +172,53 @@ class RAGSystem:
         Returns:
             加载的文档块数量
         """
-        # 分割文档
-        chunks = self.doc_processor.split_into_chunks(doc_file)
+        return self.ingest_file(doc_file)["chunks"]
+    
+    def ingest_file(self, doc_file: str, batch_size: int = 256,
+                    progress_callback: Optional[Callable[[dict], None]] = None) -> dict:
+        """流式导入文档：边读取边分块、嵌入和写入，内存占用与文件大小无关
         
-        # 生成嵌入
-        embeddings = self.embedding_service.embed_batch(chunks)
+        Args:
+            doc_file: 文档文件路径
+            batch_size: 每批的文本块数量
+            progress_callback: 每写完一批后调用，参数为统计字典
+            
+        Returns:
+            统计字典，见 ingest_texts()
+        """
+        # 以绝对路径作为来源，增量写入向量数据库
+        return self.ingest_texts(self.doc_processor.iter_chunks(doc_file),
+                                 source=os.path.abspath(doc_file),
+                                 batch_size=batch_size, progress_callback=progress_callback)
+    
+    def ingest_texts(self, texts: Iterable[str], source: Optional[str] = None,
+                     batch_size: int = 256,
+                     progress_callback: Optional[Callable[[dict], None]] = None) -> dict:
+        """幂等地写入文本块：ID由来源和内容哈希得到，已存在的块跳过嵌入
         
-        # 存储到向量数据库
-        self.vector_store.add_documents(chunks, embeddings)
+        指定 source 时，该来源下不再出现的旧块会被删除，因此对同一来源重复调用
+        只会为新增或修改的文本付出嵌入开销。文本按批流经嵌入和写入，可以传入生成器。
         
-        return len(chunks)
+        Args:
+            texts: 文本块的可迭代对象
+            source: 文本来源（如文件路径），写入元数据的 "source" 字段
+            batch_size: 每批的文本块数量
+            progress_callback: 每写完一批后调用，参数为统计字典
+            
+        Returns:
+            统计字典，包含 chunks、total、added、skipped、removed
+        """
+        pipeline = IngestionPipeline(self.embedding_service, self.vector_store,
+                                     batch_size=batch_size, progress_callback=progress_callback,
+                                     lexical_index=self._lexical_index)
+        return pipeline.run(texts, source)
     
     def query(self, question: str, 
               retrieve_k: int = 5, 
               rerank_k: int = 3,
-              show_prompt: bool = False) -> str:
+              show_prompt: bool = False,
+              mode: Optional[str] = None,
+              pack_stats: Optional[dict] = None) -> str:
         """查询系统并生成回答
         
         Args:
@@ -62,35 +226,236 @@ class RAGSystem:
             retrieve_k: 检索的文档数量
             rerank_k: 重排序后保留的文档数量
             show_prompt: 是否显示生成提示词
+            mode: 检索方式，为None时使用 retrieval_mode
+            pack_stats: 可选的字典，启用上下文打包时写入本次查询的打包统计；命中回答缓存时不打包，字典保持为空
             
         Returns:
             生成的回答
         """
-        # 1. 检索相关文档
-        retrieved_chunks = self.retrieve(question, retrieve_k)
+        mode = mode or self.retrieval_mode
+        
+        # 相同问题、参数、模型和语料版本下直接返回缓存的回答
+        answer_key = self._answer_key(question, retrieve_k, rerank_k, mode)
+        if answer_key is not None:
+            answer = self.answer_cache.get(answer_key)
+            if answer is not None:
+                return answer
         
-        # 2. 重排序
-        reranked_chunks = self.reranker.rerank(question, retrieved_chunks, rerank_k)
+        # 1-2. 检索并重排序
+        reranked_chunks = self._prepare_context(question, retrieve_k, rerank_k, mode)
         
         # 3. 生成回答
-        answer = self.generator.generate_answer(question, reranked_chunks, show_prompt)
+        answer = self.generator.generate_answer(question, reranked_chunks, show_prompt,
+                                                **self._pack_options(pack_stats))
+        if answer_key is not None:
+            self.answer_cache.put(answer_key, answer)
         
         return answer
     
-    def retrieve(self, query: str, top_k: int = 5) -> List[str]:
+    def query_stream(self, question: str,
+                     retrieve_k: int = 5,
+                     rerank_k: int = 3,
+                     show_prompt: bool = False,
+                     mode: Optional[str] = None,
+                     executor=None,
+                     pack_stats: Optional[dict] = None) -> TokenStream:
+        """查询系统并流式生成回答，模型每返回一个数据块就可以读到对应的文本
+        
+        检索和重排序在调用时完成，生成请求在首次迭代时发出。
+        
+        Args:
+            question: 用户问题
+            retrieve_k: 检索的文档数量
+            rerank_k: 重排序后保留的文档数量
+            show_prompt: 是否显示生成提示词
+            mode: 检索方式，为None时使用 retrieval_mode
+            executor: async for 迭代时执行阻塞读取的线程池，为None时使用事件循环的默认线程池
+            pack_stats: 可选的字典，启用上下文打包时写入本次查询的打包统计（首次迭代时写入）；命中回答缓存时不打包，字典保持为空
+            
+        Returns:
+            TokenStream，可用 for 或 async for 迭代文本片段，读完后 get_stats() 给出首字延迟和总延迟
+        """
+        start_time = time.perf_counter()
+        mode = mode or self.retrieval_mode
+        
+        answer_key = self._answer_key(question, retrieve_k, rerank_k, mode)
+        if answer_key is not None:
+            answer = self.answer_cache.get(answer_key)
+            if answer is not None:
+                return TokenStream([answer], start_time, executor=executor)
+        
+        reranked_chunks = self._prepare_context(question, retrieve_k, rerank_k, mode)
+        tokens = self.generator.generate_answer_stream(question, reranked_chunks, show_prompt,
+                                                       **self._pack_options(pack_stats))
+        # 完整读完后才写入回答缓存，中途中断的回答不会被缓存
+        on_complete = None
+        if answer_key is not None:
+            on_complete = lambda answer: self.answer_cache.put(answer_key, answer)
+        return TokenStream(tokens, start_time, on_complete, executor)
+    
+    @staticmethod
+    def _pack_options(pack_stats: Optional[dict]) -> dict:
+        """只在调用方需要打包统计时才传 pack_stats，自定义生成器可以不支持该参数"""
+        return {} if pack_stats is None else {"pack_stats": pack_stats}
+    
+    def _answer_key(self, question: str, retrieve_k: int, rerank_k: int, mode: str) -> Optional[str]:
+        """回答缓存的键，未启用回答缓存时返回None"""
+        if self.answer_cache is None:
+            return None
+        return AnswerCache.make_key(question, retrieve_k, rerank_k, self.generation_model,
+                                    self.vector_store.get_version(), mode,
+                                    self.vector_store.get_corpus_id())
+    
+    def _prepare_context(self, question: str, retrieve_k: int, rerank_k: int, mode: str) -> List[str]:
+        """检索并重排序，得到交给生成器的上下文片段；启用语义缓存时相似问题直接复用结果"""
+        query_embedding = None
+        namespace = f"query:{mode}:{retrieve_k}:{rerank_k}"
+        if self.semantic_cache is not None:
+            query_embedding = self._embed_query(question)
+            reranked_chunks = self._semantic_cache_get(query_embedding, namespace)
+            if reranked_chunks is not None:
+                return reranked_chunks
+        
+        if self.cascade_policy is not None and mode == "dense":
+            # 检索相关文档及其距离，按置信度跳过或缩小重排序
+            retrieved_chunks, distances = self._dense_search(question, retrieve_k, query_embedding)
+            num_candidates = self.cascade_policy.plan(distances, rerank_k)
+            if num_candidates == 0:
+                reranked_chunks = retrieved_chunks[:rerank_k]
+            else:
+                reranked_chunks = self.reranker.rerank(question, retrieved_chunks[:num_candidates], rerank_k)
+        else:
+            retrieved_chunks = self._retrieve(question, retrieve_k, mode, query_embedding)
+            reranked_chunks = self.reranker.rerank(question, retrieved_chunks, rerank_k)
+        
+        if self.semantic_cache is not None:
+            self.semantic_cache.put(query_embedding, reranked_chunks, namespace)
+        return reranked_chunks
+    
+    def retrieve(self, query: str, top_k: int = 5, mode: Optional[str] = None) -> List[str]:
         """检索相关文档
         
         Args:
             query: 查询文本
             top_k: 返回的文档数量
+            mode: 检索方式，"dense"、"lexical" 或 "hybrid"，为None时使用 retrieval_mode
             
         Returns:
             检索到的文档列表
         """
-        query_embedding = self.embedding_service.embed_text(query)
+        mode = mode or self.retrieval_mode
+        if self.semantic_cache is None:
+            return self._retrieve(query, top_k, mode)
+        
+        query_embedding = self._embed_query(query)
+        namespace = f"retrieve:{mode}:{top_k}"
+        cached = self._semantic_cache_get(query_embedding, namespace)
+        if cached is not None:
+            return list(cached)
+        chunks = self._retrieve(query, top_k, mode, query_embedding)
+        self.semantic_cache.put(query_embedding, list(chunks), namespace)
+        return chunks
+    
+    def retrieve_with_distances(self, query: str, top_k: int = 5) -> List[Tuple[str, float]]:
+        """向量检索相关文档并返回距离
+        
+        Args:
+            query: 查询文本
+            top_k: 返回的文档数量
+            
+        Returns:
+            按距离升序排列的 (文档, 距离) 列表，距离越小越相似
+        """
+        documents, distances = self._dense_search(query, top_k)
+        return list(zip(documents, distances))
+    
+    def _semantic_cache_get(self, query_embedding, namespace: str) -> Optional[List[str]]:
+        """在语义缓存中查找，语料版本变化时先使缓存失效"""
+        self.semantic_cache.sync_version(self.vector_store.get_version())
+        return self.semantic_cache.get(query_embedding, namespace)
+    
+    def _retrieve(self, query: str, top_k: int, mode: str,
+                  query_embedding: Optional[List[float]] = None) -> List[str]:
+        """按检索方式检索，已有查询向量时不再重复编码"""
+        if mode == "dense":
+            return self._dense_search(query, top_k, query_embedding)[0]
+        if mode == "lexical":
+            return [document for _, document, _ in self.lexical_index.search(query, top_k)]
+        if mode == "hybrid":
+            return self._hybrid_retrieve(query, top_k, query_embedding)
+        raise ValueError(f"不支持的检索方式: {mode}")
+    
+    def _dense_search(self, query: str, top_k: int,
+                      query_embedding: Optional[List[float]] = None) -> Tuple[List[str], List[float]]:
+        """向量检索，返回文档列表和对应的距离列表"""
+        if query_embedding is None:
+            query_embedding = self._embed_query(query)
         results = self.vector_store.search(query_embedding, top_k)
-        return results['documents'][0] if results['documents'] else []
+        if not results['documents']:
+            return [], []
+        return results['documents'][0], list(results['distances'][0])
     
+    def _hybrid_retrieve(self, query: str, top_k: int, query_embedding: Optional[List[float]] = None,
+                         candidate_factor: int = 4) -> List[str]:
+        """向量检索与BM25各取 top_k * candidate_factor 个候选，用RRF融合排名"""
+        candidate_k = top_k * candidate_factor
+        if query_embedding is None:
+            query_embedding = self._embed_query(query)
+        dense = self.vector_store.search(query_embedding, candidate_k)
+        lexical = self.lexical_index.search(query, candidate_k)
+        
+        documents = dict(zip(dense['ids'][0], dense['documents'][0])) if dense['ids'] else {}
+        documents.update((doc_id, document) for doc_id, document, _ in lexical)
+        fused = reciprocal_rank_fusion([
+            dense['ids'][0] if dense['ids'] else [],
+            [doc_id for doc_id, _, _ in lexical]
+        ])
+        return [documents[doc_id] for doc_id, _ in fused[:top_k]]
+    
+    def retrieve_batch(self, queries: List[str], top_k: int = 5,
+                       rerank_k: Optional[int] = None) -> List[dict]:
+        """批量检索相关文档，一次编码所有查询并一次完成向量检索
+        
+        Args:
+            queries: 查询文本列表
+            top_k: 每个查询返回的文档数量
+            rerank_k: 指定时对每个查询的候选统一批量重排序，只保留前 rerank_k 个
+            
+        Returns:
+            与查询一一对应的结果列表，每项包含 documents、ids、distances；
+            重排序时按重排序分数降序排列，并额外包含 scores
+        """
+        if not queries:
+            return []
+        
+        query_embeddings = self.embedding_service.embed_batch_array(queries)
+        results = self.vector_store.search_batch(query_embeddings, top_k)
+        batch = [
+            {"documents": documents, "ids": ids, "distances": distances}
+            for documents, ids, distances in zip(results['documents'], results['ids'], results['distances'])
+        ]
+        if rerank_k is None:
+            return batch
+        
+        # 所有查询的候选合并为一次交叉编码器推理
+        ranked = self.reranker.rerank_batch(queries, [item["documents"] for item in batch],
+                                            rerank_k, return_indices=True)
+        return [
+            {
+                "documents": [item["documents"][i] for i, _ in order],
+                "ids": [item["ids"][i] for i, _ in order],
+                "distances": [item["distances"][i] for i, _ in order],
+                "scores": [float(score) for _, score in order]
+            }
+            for item, order in zip(batch, ranked)
+        ]
+    
+    def _embed_query(self, query: str) -> List[float]:
+        """生成查询向量，启用微批处理时与并发查询合并编码"""
+        if self.query_batcher is not None:
+            return self.query_batcher.embed(query)
+        return self.embedding_service.embed_text(query)
+
     def get_system_info(self) -> dict:
         """获取系统信息
         
@@ -101,12 +466,19 @@ class RAGSystem:
             "embedding_service": self.embedding_service.get_model_info(),
             "reranker": self.reranker.get_model_info(),
             "generator": self.generator.get_model_info(),
-            "document_count": self.vector_store.count()
+            "document_count": self.vector_store.count(),
+            "semantic_cache": self.semantic_cache.get_stats() if self.semantic_cache else None,
+            "answer_cache": self.answer_cache.get_stats() if self.answer_cache else None,
+            "cascade": self.cascade_policy.get_stats() if self.cascade_policy else None,
+            "context_packer": self.context_packer.get_stats() if self.context_packer else None,
+            "llm_cache": self.llm_cache.get_stats() if self.llm_cache else None
         }
     
     def clear_documents(self) -> None:
         """清空所有文档"""
         self.vector_store.clear()
+        if self._lexical_index is not None:
+            self._lexical_index.clear()
     
     def add_documents_from_texts(self, texts: List[str]) -> int:
         """从文本列表添加文档
@@ -117,6 +489,5 @@ class RAGSystem:
         Returns:
             添加的文档数量
         """
-        embeddings = self.embedding_service.embed_batch(texts)
-        self.vector_store.add_documents(texts, embeddings)
+        self.ingest_texts(texts)
         return len(texts)
\ No newline at end of file
@@ -0,0 +1,152 @@
+from typing import Any, Callable, List, Optional
+from collections import OrderedDict
+import threading
+import time
+import numpy as np
+
+
+class SemanticCache:
+    """语义查询缓存：查询向量与已缓存查询的余弦相似度达到阈值时直接复用其结果
+
+    所有缓存的查询向量放在一个矩阵中，查找是一次矩阵向量乘法。条目按LRU淘汰，
+    并在 ttl_seconds 后过期；绑定的语料版本号变化时整个缓存失效。
+    namespace 用于隔离不同参数（如 top_k、检索方式）下的结果。
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 1024,
+                 ttl_seconds: Optional[float] = 3600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """初始化语义缓存
+
+        Args:
+            threshold: 命中所需的最小余弦相似度
+            max_entries: 最大条目数，超出时淘汰最久未使用的条目
+            ttl_seconds: 条目的存活时间（秒），为None时不过期
+            clock: 时间函数，便于测试
+        """
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold 必须在 (0, 1] 范围内")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._valid = np.zeros(max_entries, dtype=bool)
+        self._namespaces: List[Optional[str]] = [None] * max_entries
+        self._values: List[Any] = [None] * max_entries
+        self._created = np.zeros(max_entries, dtype=np.float64)
+        # 槽位的使用顺序，最久未使用的在最前
+        self._order: "OrderedDict[int, None]" = OrderedDict()
+        self._version: Any = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def sync_version(self, version: Any) -> None:
+        """绑定语料版本号，版本号变化时清空缓存
+
+        Args:
+            version: 当前语料版本号（如 vector_store.get_version()）
+        """
+        with self._lock:
+            if version != self._version:
+                self._clear_locked()
+                self._version = version
+
+    def get(self, embedding, namespace: str = "") -> Optional[Any]:
+        """查找相似查询的缓存结果
+
+        Args:
+            embedding: 查询向量
+            namespace: 结果所属的参数空间，只在同一空间内匹配
+
+        Returns:
+            命中时返回缓存的结果，否则返回None
+        """
+        query = self._normalize(embedding)
+        with self._lock:
+            slot = self._find(query, namespace)
+            if slot is None:
+                self.misses += 1
+                return None
+            self._order.move_to_end(slot)
+            self.hits += 1
+            return self._values[slot]
+
+    def _find(self, query: np.ndarray, namespace: str) -> Optional[int]:
+        """返回相似度最高且满足阈值、未过期、同一空间的槽位"""
+        if self._vectors is None or not self._order or self._vectors.shape[1] != len(query):
+            return None
+        if self.ttl_seconds is not None:
+            expired = self._valid & (self._created < self.clock() - self.ttl_seconds)
+            for slot in np.flatnonzero(expired):
+                self._evict(int(slot))
+
+        candidates = [slot for slot in self._order if self._namespaces[slot] == namespace]
+        if not candidates:
+            return None
+        similarities = self._vectors[candidates] @ query
+        best = int(np.argmax(similarities))
+        return candidates[best] if similarities[best] >= self.threshold else None
+
+    def put(self, embedding, value: Any, namespace: str = "") -> None:
+        """缓存一个查询的结果
+
+        Args:
+            embedding: 查询向量
+            value: 要缓存的结果
+            namespace: 结果所属的参数空间
+        """
+        query = self._normalize(embedding)
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != len(query):
+                self._clear_locked()
+                self._vectors = np.zeros((self.max_entries, len(query)), dtype=np.float32)
+
+            if len(self._order) >= self.max_entries:
+                self._evict(next(iter(self._order)))
+            slot = int(np.flatnonzero(~self._valid)[0])
+            self._vectors[slot] = query
+            self._valid[slot] = True
+            self._namespaces[slot] = namespace
+            self._values[slot] = value
+            self._created[slot] = self.clock()
+            self._order[slot] = None
+
+    def _evict(self, slot: int) -> None:
+        self._valid[slot] = False
+        self._namespaces[slot] = None
+        self._values[slot] = None
+        self._order.pop(slot, None)
+
+    def _clear_locked(self) -> None:
+        for slot in list(self._order):
+            self._evict(slot)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._clear_locked()
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def get_stats(self) -> dict:
+        """获取缓存统计信息
+
+        Returns:
+            包含条目数、命中数、未命中数和命中率的字典
+        """
+        total = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
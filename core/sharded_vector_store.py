@@ -0,0 +1,297 @@
+from typing import Iterator, List, Optional, Set, Union
+import os
+import json
+import heapq
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from .vector_store import create_vector_store, resolve_ids
+
+
+class ShardedVectorStore:
+    """分片向量存储，按文档ID的哈希把文档分散到多个子存储
+
+    接口与 VectorStore 一致。每个分片是一个独立的集合（持久化时各自使用子目录），
+    检索时用线程池并行查询所有分片，再按距离合并各分片的top-k。
+    分片数量写入持久化目录，之后以不同的分片数量打开会报错，避免路由错乱。
+    """
+
+    SHARDS_FILE = "shards.json"
+    RESULT_KEYS = ("ids", "documents", "metadatas", "distances")
+
+    def __init__(self, backend: str = "chroma", collection_name: str = "default",
+                 persist_directory: Optional[str] = None, num_shards: int = 4,
+                 max_workers: Optional[int] = None, **options):
+        """初始化分片向量存储
+
+        Args:
+            backend: 每个分片的存储后端，"chroma" 或 "numpy"
+            collection_name: 集合名称，分片名称为 "{collection_name}-shard{i}"
+            persist_directory: 持久化目录，分片保存在其下的 shard{i} 子目录；为None时使用内存存储
+            num_shards: 分片数量
+            max_workers: 并行查询的线程数，默认等于分片数量
+            **options: 传给每个分片构造函数的额外参数
+        """
+        if num_shards < 1:
+            raise ValueError("num_shards 必须大于0")
+
+        self.backend = backend
+        self.collection_name = collection_name
+        self.num_shards = num_shards
+
+        if persist_directory:
+            self._check_layout(persist_directory)
+
+        self.shards = [
+            create_vector_store(
+                backend, f"{collection_name}-shard{i}",
+                os.path.join(persist_directory, f"shard{i}") if persist_directory else None,
+                **options
+            )
+            for i in range(num_shards)
+        ]
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or num_shards,
+                                            thread_name_prefix="vector-shard")
+
+    def _check_layout(self, persist_directory: str) -> None:
+        """记录或校验持久化目录的分片数量"""
+        os.makedirs(persist_directory, exist_ok=True)
+        path = os.path.join(persist_directory, self.SHARDS_FILE)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                stored = json.load(file)["num_shards"]
+            if stored != self.num_shards:
+                raise ValueError(f"持久化目录已按 {stored} 个分片写入，不能以 {self.num_shards} 个分片打开")
+        else:
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump({"num_shards": self.num_shards, "backend": self.backend}, file)
+
+    def shard_of(self, doc_id: str) -> int:
+        """计算文档ID所属的分片
+
+        Args:
+            doc_id: 文档ID
+
+        Returns:
+            分片下标
+        """
+        digest = hashlib.md5(doc_id.encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") % self.num_shards
+
+    def _group_by_shard(self, ids: List[str]) -> List[List[int]]:
+        """按分片对下标分组"""
+        groups: List[List[int]] = [[] for _ in range(self.num_shards)]
+        for i, doc_id in enumerate(ids):
+            groups[self.shard_of(doc_id)].append(i)
+        return groups
+
+    def _fan_out(self, calls) -> list:
+        """并行执行 (分片, 函数) 列表并按顺序返回结果"""
+        futures = [self._executor.submit(function, shard) for shard, function in calls]
+        return [future.result() for future in futures]
+
+    def add_documents(self, documents: List[str],
+                      embeddings: Union[List[List[float]], np.ndarray],
+                      metadata: Optional[List[dict]] = None,
+                      ids: Optional[List[str]] = None) -> None:
+        """添加文档到向量存储，按ID路由到分片，ID已存在时覆盖（upsert）
+
+        Args:
+            documents: 文档列表
+            embeddings: 对应的嵌入向量列表，或形状为 (n, dim) 的float32矩阵
+            metadata: 可选的元数据列表
+            ids: 可选的文档ID列表，为None时由 make_chunk_id 按来源和内容生成
+        """
+        if not documents:
+            return
+
+        ids, keep = resolve_ids(documents, metadata, ids)
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+
+        calls = []
+        for shard, indices in zip(self.shards, self._group_by_shard([ids[i] for i in keep])):
+            if not indices:
+                continue
+            rows = [keep[i] for i in indices]
+            calls.append((shard, lambda store, rows=rows: store.add_documents(
+                [documents[i] for i in rows],
+                embeddings[rows],
+                [metadata[i] for i in rows] if metadata else None,
+                ids=[ids[i] for i in rows]
+            )))
+        self._fan_out(calls)
+
+    def search(self, query_embedding: List[float], top_k: int = 5) -> dict:
+        """搜索相似文档
+
+        Args:
+            query_embedding: 查询向量
+            top_k: 返回的文档数量
+
+        Returns:
+            搜索结果字典
+        """
+        return self.search_batch([query_embedding], top_k)
+
+    def search_batch(self, query_embeddings: Union[List[List[float]], np.ndarray], top_k: int = 5) -> dict:
+        """并行查询所有分片，并按距离合并每个查询的top-k
+
+        Args:
+            query_embeddings: 查询向量列表，或形状为 (m, dim) 的矩阵
+            top_k: 每个查询返回的文档数量
+
+        Returns:
+            搜索结果字典，每个键对应一个按查询顺序排列的列表
+        """
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        # 空分片不参与查询（chroma对空集合查询会返回空结果或告警）
+        active = [shard for shard in self.shards if shard.count() > 0]
+        shard_results = self._fan_out(
+            [(shard, lambda store: store.search_batch(queries, top_k)) for shard in active]
+        )
+
+        for result in shard_results:
+            if not result.get("metadatas"):
+                result["metadatas"] = [[None] * len(ids) for ids in result["ids"]]
+
+        merged = {key: [] for key in self.RESULT_KEYS}
+        for q in range(len(queries)):
+            candidates = []
+            for result in shard_results:
+                candidates.extend(zip(result["distances"][q], result["ids"][q],
+                                      result["documents"][q], result["metadatas"][q]))
+            best = heapq.nsmallest(top_k, candidates, key=lambda candidate: candidate[0])
+            merged["distances"].append([candidate[0] for candidate in best])
+            merged["ids"].append([candidate[1] for candidate in best])
+            merged["documents"].append([candidate[2] for candidate in best])
+            merged["metadatas"].append([candidate[3] for candidate in best])
+        return merged
+
+    def get_existing_ids(self, ids: List[str]) -> Set[str]:
+        """查询哪些ID已在集合中
+
+        Args:
+            ids: 待查询的ID列表
+
+        Returns:
+            已存在的ID集合
+        """
+        groups = self._group_by_shard(ids)
+        results = self._fan_out([
+            (shard, lambda store, indices=indices: store.get_existing_ids([ids[i] for i in indices]))
+            for shard, indices in zip(self.shards, groups) if indices
+        ])
+        return set().union(*results)
+
+    def get_ids_by_source(self, source: str) -> List[str]:
+        """获取某个来源的全部文档ID
+
+        Args:
+            source: 文档来源（元数据中的 "source"）
+
+        Returns:
+            ID列表
+        """
+        results = self._fan_out([(shard, lambda store: store.get_ids_by_source(source))
+                                 for shard in self.shards])
+        return [doc_id for shard_ids in results for doc_id in shard_ids]
+
+    def delete(self, ids: List[str]) -> None:
+        """按ID删除文档，不存在的ID会被忽略
+
+        Args:
+            ids: 待删除的ID列表
+        """
+        groups = self._group_by_shard(ids)
+        self._fan_out([
+            (shard, lambda store, indices=indices: store.delete([ids[i] for i in indices]))
+            for shard, indices in zip(self.shards, groups) if indices
+        ])
+
+    def get_documents(self) -> List[str]:
+        """获取所有文档（按分片顺序）
+
+        Returns:
+            文档列表
+        """
+        return [document for shard in self.shards for document in shard.get_documents()]
+
+    def iter_documents(self, page_size: int = 1000, include_embeddings: bool = False) -> Iterator[dict]:
+        """依次分页遍历每个分片
+
+        Args:
+            page_size: 每页的文档数量
+            include_embeddings: 是否同时返回嵌入向量
+
+        Yields:
+            包含 ids、documents、metadatas（以及 embeddings）的字典
+        """
+        for shard in self.shards:
+            yield from shard.iter_documents(page_size, include_embeddings)
+
+    def snapshot(self, path: str, dtype: str = "float32", page_size: int = 1000) -> int:
+        """导出为紧凑的二进制快照文件，见 core.snapshot
+
+        Args:
+            path: 快照文件路径
+            dtype: 嵌入矩阵的存储精度，"float32" 或 "float16"
+            page_size: 每页读取的文档数量
+
+        Returns:
+            导出的文档数量
+        """
+        from .snapshot import export_snapshot
+        return export_snapshot(self, path, dtype, page_size)
+
+    def restore(self, path: str, page_size: int = 1000) -> int:
+        """从快照文件导入文档和嵌入，无需重新嵌入
+
+        Args:
+            path: 快照文件路径
+            page_size: 每页写入的文档数量
+
+        Returns:
+            导入的文档数量
+        """
+        from .snapshot import import_snapshot
+        return import_snapshot(self, path, page_size)
+
+    def clear(self) -> None:
+        """清空所有分片"""
+        self._fan_out([(shard, lambda store: store.clear()) for shard in self.shards])
+
+    def count(self) -> int:
+        """获取文档数量
+
+        Returns:
+            文档数量
+        """
+        return sum(shard.count() for shard in self.shards)
+
+    def get_version(self) -> int:
+        """获取内容版本号（各分片版本号之和，任一分片变化都会使其增大）
+
+        Returns:
+            版本号
+        """
+        return sum(shard.get_version() for shard in self.shards)
+
+    def get_corpus_id(self) -> str:
+        """获取语料标识（各分片标识的组合）
+
+        Returns:
+            语料标识
+        """
+        return ",".join(shard.get_corpus_id() for shard in self.shards)
+
+    def get_shard_counts(self) -> List[int]:
+        """获取每个分片的文档数量，用于检查分布是否均匀
+
+        Returns:
+            按分片顺序排列的文档数量
+        """
+        return [shard.count() for shard in self.shards]
+
+    def close(self) -> None:
+        """关闭查询线程池"""
+        self._executor.shutdown(wait=True)
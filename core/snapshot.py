@@ -0,0 +1,256 @@
+from typing import BinaryIO, Iterable, Iterator, List, Optional
+import os
+import mmap
+import json
+import shutil
+import struct
+import tempfile
+import numpy as np
+
+MAGIC = b"RAGSNAP1"
+FORMAT_VERSION = 1
+# 各段按64字节对齐，保证mmap上的零拷贝视图满足任意dtype的对齐要求
+ALIGNMENT = 64
+SUPPORTED_DTYPES = ("float32", "float16")
+STRING_COLUMNS = ("ids", "documents", "metadatas")
+
+# 快照文件布局：
+#   MAGIC | 嵌入矩阵 | 每个字符串列的 data 段和 offsets 段 | JSON页脚 | 页脚长度(uint64) | MAGIC
+# 字符串列把所有值的UTF-8编码首尾相接存为 data，第i个值位于 data[offsets[i]:offsets[i+1]]；
+# metadatas 列的每个值是一个JSON字符串。页脚记录每段的起始位置和长度。
+
+
+class _StringColumnWriter:
+    """把字符串逐个追加到临时文件，同时记录偏移量"""
+
+    def __init__(self):
+        self.data = tempfile.TemporaryFile()
+        self.offsets = tempfile.TemporaryFile()
+        self.position = 0
+        self.offsets.write(struct.pack("<q", 0))
+
+    def extend(self, values: Iterable[str]) -> None:
+        encoded = [value.encode("utf-8") for value in values]
+        ends = np.cumsum([len(value) for value in encoded], dtype=np.int64) + self.position
+        self.data.write(b"".join(encoded))
+        self.offsets.write(ends.tobytes())
+        if len(ends):
+            self.position = int(ends[-1])
+
+    def close(self) -> None:
+        self.data.close()
+        self.offsets.close()
+
+
+def _pad(file: BinaryIO) -> None:
+    """把写入位置补齐到 ALIGNMENT 的整数倍"""
+    remainder = file.tell() % ALIGNMENT
+    if remainder:
+        file.write(b"\0" * (ALIGNMENT - remainder))
+
+
+def _copy_section(file: BinaryIO, source: BinaryIO) -> List[int]:
+    """把临时文件的内容作为一个对齐的段写入快照，返回 [起始位置, 长度]"""
+    _pad(file)
+    start = file.tell()
+    source.seek(0)
+    shutil.copyfileobj(source, file, 1 << 20)
+    return [start, file.tell() - start]
+
+
+def write_snapshot(path: str, pages: Iterable[dict], dtype: str = "float32") -> int:
+    """把分页数据写成快照文件，内存中每次只保留一页
+
+    先写入同目录下的临时文件，完成后原子替换，写入中断不会留下损坏的快照。
+
+    Args:
+        path: 快照文件路径
+        pages: 包含 ids、documents、metadatas、embeddings 的页，通常来自 iter_documents(include_embeddings=True)
+        dtype: 嵌入矩阵的存储精度，"float32" 或 "float16"
+
+    Returns:
+        写入的文档数量
+    """
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"不支持的快照精度: {dtype}")
+
+    columns = {name: _StringColumnWriter() for name in STRING_COLUMNS}
+    count = 0
+    dimension = 0
+    temp_path = f"{path}.tmp"
+    try:
+        with open(temp_path, 'wb') as file:
+            file.write(MAGIC)
+            _pad(file)
+            embeddings_start = file.tell()
+
+            for page in pages:
+                if len(page["ids"]) == 0:
+                    continue
+                embeddings = np.asarray(page["embeddings"], dtype=np.float32)
+                if count and embeddings.shape[1] != dimension:
+                    raise ValueError(f"向量维度不一致: {dimension} 与 {embeddings.shape[1]}")
+                dimension = embeddings.shape[1]
+                file.write(np.ascontiguousarray(embeddings, dtype=dtype).tobytes())
+                columns["ids"].extend(page["ids"])
+                columns["documents"].extend(page["documents"])
+                metadatas = page.get("metadatas") or [None] * len(page["ids"])
+                columns["metadatas"].extend(json.dumps(meta, ensure_ascii=False) for meta in metadatas)
+                count += len(page["ids"])
+
+            sections = {"embeddings": [embeddings_start, file.tell() - embeddings_start]}
+            for name, column in columns.items():
+                sections[f"{name}.data"] = _copy_section(file, column.data)
+                sections[f"{name}.offsets"] = _copy_section(file, column.offsets)
+
+            footer = json.dumps({
+                "version": FORMAT_VERSION,
+                "count": count,
+                "dimension": dimension,
+                "dtype": dtype,
+                "sections": sections
+            }).encode("utf-8")
+            file.write(footer)
+            file.write(struct.pack("<Q", len(footer)))
+            file.write(MAGIC)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    finally:
+        for column in columns.values():
+            column.close()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return count
+
+
+class Snapshot:
+    """只读快照，通过mmap打开，嵌入矩阵和字符串列都是文件上的零拷贝视图"""
+
+    def __init__(self, path: str):
+        """打开快照文件
+
+        Args:
+            path: 快照文件路径
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        tail = len(MAGIC) + 8
+        if (len(self._mmap) < len(MAGIC) + tail or self._mmap[:len(MAGIC)] != MAGIC
+                or self._mmap[-len(MAGIC):] != MAGIC):
+            self.close()
+            raise ValueError(f"不是有效的快照文件: {path}")
+        (footer_length,) = struct.unpack("<Q", self._mmap[-tail:-len(MAGIC)])
+        footer = json.loads(self._mmap[-tail - footer_length:-tail].decode("utf-8"))
+        if footer["version"] != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"不支持的快照版本: {footer['version']}")
+
+        self.count: int = footer["count"]
+        self.dimension: int = footer["dimension"]
+        self.dtype: str = footer["dtype"]
+        self._sections = footer["sections"]
+
+        self.embeddings = self._view("embeddings", self.dtype).reshape(self.count, self.dimension)
+        self._offsets = {name: self._view(f"{name}.offsets", np.int64) for name in STRING_COLUMNS}
+
+    def _view(self, section: str, dtype) -> np.ndarray:
+        """返回某个段在mmap上的只读视图"""
+        start, length = self._sections[section]
+        return np.frombuffer(self._mmap, dtype=dtype, count=length // np.dtype(dtype).itemsize, offset=start)
+
+    def section(self, name: str) -> List[int]:
+        """获取某个段在文件中的 [起始位置, 长度]，如 "embeddings"
+
+        Args:
+            name: 段名称
+
+        Returns:
+            [起始位置, 长度]
+        """
+        return list(self._sections[name])
+
+    def _strings(self, name: str, start: int, end: int) -> List[str]:
+        """解码字符串列中 [start, end) 范围的值"""
+        base = self._sections[f"{name}.data"][0]
+        offsets = self._offsets[name][start:end + 1]
+        blob = self._mmap[base + int(offsets[0]):base + int(offsets[-1])]
+        relative = offsets - offsets[0]
+        return [blob[relative[i]:relative[i + 1]].decode("utf-8") for i in range(len(relative) - 1)]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def iter_pages(self, page_size: int = 1000, include_embeddings: bool = True) -> Iterator[dict]:
+        """按页读取快照，页的格式与 iter_documents() 相同
+
+        Args:
+            page_size: 每页的文档数量
+            include_embeddings: 是否返回嵌入（float16快照会转换为float32）
+
+        Yields:
+            包含 ids、documents、metadatas（以及 embeddings）的字典
+        """
+        for start in range(0, self.count, page_size):
+            end = min(start + page_size, self.count)
+            page = {
+                "ids": self._strings("ids", start, end),
+                "documents": self._strings("documents", start, end),
+                "metadatas": [json.loads(meta) for meta in self._strings("metadatas", start, end)]
+            }
+            if include_embeddings:
+                page["embeddings"] = np.asarray(self.embeddings[start:end], dtype=np.float32)
+            yield page
+
+    def close(self) -> None:
+        """关闭mmap；之后不能再访问 embeddings 视图"""
+        self.embeddings = None
+        self._offsets = {}
+        try:
+            self._mmap.close()
+        except BufferError:
+            # 仍有外部引用的视图时由垃圾回收负责释放
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def export_snapshot(store, path: str, dtype: str = "float32", page_size: int = 1000) -> int:
+    """把向量存储导出为快照文件
+
+    Args:
+        store: 提供 iter_documents() 的向量存储
+        path: 快照文件路径
+        dtype: 嵌入矩阵的存储精度，"float32" 或 "float16"
+        page_size: 每页读取的文档数量
+
+    Returns:
+        导出的文档数量
+    """
+    return write_snapshot(path, store.iter_documents(page_size, include_embeddings=True), dtype)
+
+
+def import_snapshot(store, path: str, page_size: int = 1000) -> int:
+    """把快照按页写入向量存储，保留原有的ID和元数据，不需要重新嵌入
+
+    Args:
+        store: 提供 add_documents() 的向量存储
+        path: 快照文件路径
+        page_size: 每页写入的文档数量
+
+    Returns:
+        导入的文档数量
+    """
+    with Snapshot(path) as snapshot:
+        for page in snapshot.iter_pages(page_size):
+            metadatas: Optional[List[dict]] = page["metadatas"]
+            if all(meta is None for meta in metadatas):
+                metadatas = None
+            store.add_documents(page["documents"], page["embeddings"], metadatas, ids=page["ids"])
+        return len(snapshot)
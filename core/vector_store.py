@@ -1,6 +1,43 @@
-from typing import List, Optional
-import chromadb
-from chromadb.api.models.Collection import Collection
+from typing import TYPE_CHECKING, Iterator, List, Optional, Set, Union
+import hashlib
+import numpy as np
+
+if TYPE_CHECKING:
+    from chromadb.api.models.Collection import Collection
+
+
+def make_chunk_id(text: str, source: Optional[str] = None) -> str:
+    """根据来源和文本内容生成稳定的文档块ID，同一来源的相同内容总是得到相同的ID
+
+    Args:
+        text: 文档块文本
+        source: 文档来源（如文件路径），为None时只按内容计算
+
+    Returns:
+        32位十六进制ID
+    """
+    digest = hashlib.sha256(f"{source or ''}\x00{text}".encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def resolve_ids(documents: List[str], metadata: Optional[List[dict]] = None,
+                ids: Optional[List[str]] = None) -> tuple:
+    """补全文档ID并去除批内重复ID（保留最后一次出现）
+
+    Args:
+        documents: 文档列表
+        metadata: 可选的元数据列表，其中的 "source" 参与ID计算
+        ids: 可选的文档ID列表，为None时按内容哈希生成
+
+    Returns:
+        (ids, keep)，keep 为去重后保留的下标列表
+    """
+    if ids is None:
+        sources = [(meta or {}).get("source") for meta in metadata] if metadata else [None] * len(documents)
+        ids = [make_chunk_id(document, source) for document, source in zip(documents, sources)]
+    last = {doc_id: i for i, doc_id in enumerate(ids)}
+    keep = sorted(last.values())
+    return ids, keep
 
 
 class VectorStore:
@@ -13,6 +50,8 @@ class VectorStore:
             collection_name: 集合名称
             persist_directory: 持久化目录，如果为None则使用内存存储
         """
+        import chromadb
+
         self.collection_name = collection_name
         
         if persist_directory:
@@ -20,30 +59,100 @@ class VectorStore:
         else:
             self.client = chromadb.EphemeralClient()
         
-        self.collection: Collection = self.client.get_or_create_collection(name=collection_name)
+        self.collection: "Collection" = self.client.get_or_create_collection(name=collection_name)
+        # 单次写入的最大条数，超过时分批写入
+        self.max_batch_size = self.client.get_max_batch_size()
     
-    def add_documents(self, documents: List[str], embeddings: List[List[float]], 
-                     metadata: Optional[List[dict]] = None) -> None:
-        """添加文档到向量存储
+    def add_documents(self, documents: List[str],
+                      embeddings: Union[List[List[float]], np.ndarray],
+                      metadata: Optional[List[dict]] = None,
+                      ids: Optional[List[str]] = None) -> None:
+        """添加文档到向量存储，ID已存在时覆盖（upsert）
         
         Args:
             documents: 文档列表
-            embeddings: 对应的嵌入向量列表
+            embeddings: 对应的嵌入向量列表，或形状为 (n, dim) 的float32矩阵
             metadata: 可选的元数据列表
+            ids: 可选的文档ID列表，为None时由 make_chunk_id 按来源和内容生成
         """
-        ids = [str(i) for i in range(len(documents))]
-        
-        # 如果集合不为空，需要生成新的ID
-        existing_count = self.collection.count()
-        if existing_count > 0:
-            ids = [str(existing_count + i) for i in range(len(documents))]
-        
-        self.collection.add(
-            documents=documents,
-            embeddings=embeddings,
-            ids=ids,
-            metadatas=metadata
-        )
+        if not documents:
+            return
+        
+        ids, keep = resolve_ids(documents, metadata, ids)
+        if len(keep) < len(ids):
+            documents = [documents[i] for i in keep]
+            embeddings = np.asarray(embeddings)[keep]
+            metadata = [metadata[i] for i in keep] if metadata else None
+            ids = [ids[i] for i in keep]
+        
+        for start in range(0, len(ids), self.max_batch_size):
+            end = start + self.max_batch_size
+            self.collection.upsert(
+                documents=documents[start:end],
+                embeddings=embeddings[start:end],
+                ids=ids[start:end],
+                metadatas=metadata[start:end] if metadata else None
+            )
+        self._set_version(self.get_version() + 1)
+    
+    def get_existing_ids(self, ids: List[str]) -> Set[str]:
+        """查询哪些ID已在集合中
+        
+        Args:
+            ids: 待查询的ID列表
+            
+        Returns:
+            已存在的ID集合
+        """
+        if not ids:
+            return set()
+        return set(self.collection.get(ids=list(ids), include=[])['ids'])
+    
+    def get_ids_by_source(self, source: str) -> List[str]:
+        """获取某个来源的全部文档ID
+        
+        Args:
+            source: 文档来源（元数据中的 "source"）
+            
+        Returns:
+            ID列表
+        """
+        return self.collection.get(where={"source": source}, include=[])['ids']
+    
+    def delete(self, ids: List[str]) -> None:
+        """按ID删除文档，不存在的ID会被忽略
+        
+        Args:
+            ids: 待删除的ID列表
+        """
+        if ids:
+            self.collection.delete(ids=list(ids))
+            self._set_version(self.get_version() + 1)
+    
+    def get_version(self) -> int:
+        """获取内容版本号，集合内容变化后一定不同，可用于使缓存失效
+        
+        版本号保存在集合元数据中，随持久化目录保留。
+        
+        Returns:
+            版本号
+        """
+        return (self.collection.metadata or {}).get("corpus_version", 0)
+    
+    def _set_version(self, version: int) -> None:
+        """把版本号写入集合元数据（hnsw 配置项不允许修改，需排除）"""
+        metadata = {key: value for key, value in (self.collection.metadata or {}).items()
+                    if not key.startswith("hnsw:")}
+        metadata["corpus_version"] = version
+        self.collection.modify(metadata=metadata)
+    
+    def get_corpus_id(self) -> str:
+        """获取语料标识，与版本号一起区分不同存储和重建前后的语料
+        
+        Returns:
+            "集合名称:集合UUID"，chromadb在集合新建（包括清空后重建）时分配新的UUID
+        """
+        return f"{self.collection_name}:{self.collection.id}"
     
     def search(self, query_embedding: List[float], top_k: int = 5) -> dict:
         """搜索相似文档
@@ -55,8 +164,20 @@ class VectorStore:
         Returns:
             搜索结果字典
         """
+        return self.search_batch([query_embedding], top_k)
+    
+    def search_batch(self, query_embeddings: Union[List[List[float]], np.ndarray], top_k: int = 5) -> dict:
+        """批量搜索相似文档，所有查询在一次调用中完成
+        
+        Args:
+            query_embeddings: 查询向量列表，或形状为 (m, dim) 的矩阵
+            top_k: 每个查询返回的文档数量
+            
+        Returns:
+            搜索结果字典，每个键对应一个按查询顺序排列的列表
+        """
         results = self.collection.query(
-            query_embeddings=[query_embedding],
+            query_embeddings=query_embeddings,
             n_results=top_k
         )
         return results
@@ -67,13 +188,68 @@ class VectorStore:
         Returns:
             文档列表
         """
-        results = self.collection.get()
-        return results['documents']
+        return [document for page in self.iter_documents() for document in page['documents']]
+    
+    def iter_documents(self, page_size: int = 1000, include_embeddings: bool = False) -> Iterator[dict]:
+        """按固定大小分页遍历集合，每次只有一页数据驻留内存
+        
+        遍历期间写入或删除文档可能导致分页错位，导出类任务应在写入停止后进行。
+        
+        Args:
+            page_size: 每页的文档数量
+            include_embeddings: 是否同时返回嵌入向量
+            
+        Yields:
+            包含 ids、documents、metadatas（以及 embeddings，形状为 (n, dim) 的矩阵）的字典
+        """
+        include = ["documents", "metadatas"] + (["embeddings"] if include_embeddings else [])
+        offset = 0
+        while True:
+            results = self.collection.get(limit=page_size, offset=offset, include=include)
+            if not results['ids']:
+                return
+            page = {key: results[key] for key in ("ids", "documents", "metadatas")}
+            if include_embeddings:
+                page["embeddings"] = np.asarray(results['embeddings'], dtype=np.float32)
+            yield page
+            if len(results['ids']) < page_size:
+                return
+            offset += page_size
+    
+    def snapshot(self, path: str, dtype: str = "float32", page_size: int = 1000) -> int:
+        """导出为紧凑的二进制快照文件，见 core.snapshot
+        
+        Args:
+            path: 快照文件路径
+            dtype: 嵌入矩阵的存储精度，"float32" 或 "float16"
+            page_size: 每页读取的文档数量
+        
+        Returns:
+            导出的文档数量
+        """
+        from .snapshot import export_snapshot
+        return export_snapshot(self, path, dtype, page_size)
+    
+    def restore(self, path: str, page_size: int = 1000) -> int:
+        """从快照文件导入文档和嵌入，无需重新嵌入
+        
+        Args:
+            path: 快照文件路径
+            page_size: 每页写入的文档数量
+        
+        Returns:
+            导入的文档数量
+        """
+        from .snapshot import import_snapshot
+        return import_snapshot(self, path, page_size)
     
     def clear(self) -> None:
         """清空集合"""
+        version = self.get_version()
         self.client.delete_collection(name=self.collection_name)
         self.collection = self.client.get_or_create_collection(name=self.collection_name)
+        # 版本号在清空后继续递增，避免与清空前缓存的版本重复
+        self._set_version(version + 1)
     
     def count(self) -> int:
         """获取文档数量
@@ -81,4 +257,25 @@ class VectorStore:
         Returns:
             文档数量
         """
-        return self.collection.count()
\ No newline at end of file
+        return self.collection.count()
+
+
+def create_vector_store(backend: str = "chroma", collection_name: str = "default",
+                        persist_directory: Optional[str] = None, **options):
+    """按后端名称创建向量存储
+
+    Args:
+        backend: "chroma"（chromadb）或 "numpy"（NumPy精确检索 + mmap持久化）
+        collection_name: 集合名称
+        persist_directory: 持久化目录，如果为None则使用内存存储
+        **options: 传给后端构造函数的额外参数，如numpy后端的 quantization
+
+    Returns:
+        向量存储实例
+    """
+    if backend == "chroma":
+        return VectorStore(collection_name, persist_directory, **options)
+    if backend == "numpy":
+        from .numpy_vector_store import NumpyVectorStore
+        return NumpyVectorStore(collection_name, persist_directory, **options)
+    raise ValueError(f"不支持的向量存储后端: {backend}")
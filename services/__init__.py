@@ -2,17 +2,53 @@
 
 包含各种AI服务：
 - embedding_service: 嵌入服务
+- embedding_cache: 嵌入缓存
+- embedding_pool: 多进程嵌入池
+- query_batcher: 查询嵌入微批处理
 - reranker: 重排序服务
+- onnx_backend: int8量化ONNX后端的导出与一致性校验
 - generator: 生成服务
+- context_packer: 按词元预算打包上下文片段
+- llm_cache: LLM响应缓存
+- sqlite_lru: 缓存共用的SQLite LRU表
 """
 
-from .embedding_service import EmbeddingService
-from .reranker import Reranker
-from .generator import Generator, DeepSeekGenerator
+import importlib
+
+_LAZY_IMPORTS = {
+    'EmbeddingService': '.embedding_service',
+    'EmbeddingCache': '.embedding_cache',
+    'EmbeddingPool': '.embedding_pool',
+    'QueryBatcher': '.query_batcher',
+    'Reranker': '.reranker',
+    'Generator': '.generator',
+    'DeepSeekGenerator': '.generator',
+    'TokenStream': '.generator',
+    'ContextPacker': '.context_packer',
+    'LLMCache': '.llm_cache',
+    'SqliteLRU': '.sqlite_lru'
+}
 
 __all__ = [
     'EmbeddingService',
+    'EmbeddingCache',
+    'EmbeddingPool',
+    'QueryBatcher',
     'Reranker',
     'Generator',
-    'DeepSeekGenerator'
-]
\ No newline at end of file
+    'DeepSeekGenerator',
+    'TokenStream',
+    'ContextPacker',
+    'LLMCache',
+    'SqliteLRU'
+]
+
+
+def __getattr__(name: str):
+    """首次访问时再导入对应模块"""
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
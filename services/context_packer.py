@@ -0,0 +1,160 @@
+from typing import Callable, List, Optional, Set, Tuple, Union
+import re
+import math
+import threading
+
+# 汉字（含扩展A区）、全角标点等按一个词元计
+_CJK = re.compile(r"[㐀-䶿一-鿿　-〿＀-￯]")
+# 句子以中英文句末标点或换行结束，英文句点需后跟空白
+_SENTENCE = re.compile(r".+?(?:[。！？!?；;\n]+|\.(?=\s)|$)", re.S)
+
+
+def estimate_tokens(text: str) -> int:
+    """无需分词器的词元数估计：每个汉字或全角符号计1个，其余字符每4个计1个
+
+    Args:
+        text: 输入文本
+
+    Returns:
+        估计的词元数
+    """
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def split_sentences(text: str) -> List[str]:
+    """按句末标点和换行切分句子，保留标点，拼接后与原文相同
+
+    Args:
+        text: 输入文本
+
+    Returns:
+        句子列表
+    """
+    return _SENTENCE.findall(text)
+
+
+class ContextPacker:
+    """在词元预算内打包上下文片段
+
+    按传入顺序（即重排序得分顺序）依次放入片段：与已放入片段近似重复的片段被丢弃；
+    放不下的片段在句子边界处截断，连一句都放不下时跳过，继续尝试后面更短的片段。
+    近似重复用字符 shingle 集合的 Jaccard 相似度判断。
+    """
+
+    def __init__(self, max_tokens: int = 2048,
+                 tokenizer: Union[str, Callable[[str], int], None] = None,
+                 dedup_threshold: float = 0.8,
+                 shingle_size: int = 3):
+        """初始化上下文打包器
+
+        Args:
+            max_tokens: 上下文片段的词元预算
+            tokenizer: 词元计数方式：None 使用 estimate_tokens()；字符串为本地可加载的
+                transformers 分词器名称或目录（首次使用时加载）；也可以直接传入计数函数
+            dedup_threshold: 判为近似重复的最小 Jaccard 相似度，大于1时不去重
+            shingle_size: 字符 shingle 的长度
+        """
+        if max_tokens < 1:
+            raise ValueError("max_tokens 必须大于0")
+        self.max_tokens = max_tokens
+        self.tokenizer = tokenizer
+        self.dedup_threshold = dedup_threshold
+        self.shingle_size = shingle_size
+        self._count: Optional[Callable[[str], int]] = tokenizer if callable(tokenizer) else None
+        self._lock = threading.Lock()
+        self._totals = {"queries": 0, "input_tokens": 0, "packed_tokens": 0}
+
+    def count_tokens(self, text: str) -> int:
+        """计算文本的词元数
+
+        Args:
+            text: 输入文本
+
+        Returns:
+            词元数
+        """
+        if self._count is None:
+            with self._lock:
+                if self._count is None:
+                    if self.tokenizer is None:
+                        self._count = estimate_tokens
+                    else:
+                        from transformers import AutoTokenizer
+
+                        hf_tokenizer = AutoTokenizer.from_pretrained(self.tokenizer)
+                        self._count = lambda value: len(hf_tokenizer.encode(value, add_special_tokens=False))
+        return self._count(text)
+
+    def _shingles(self, text: str) -> Set[str]:
+        text = "".join(text.split())
+        size = self.shingle_size
+        if len(text) <= size:
+            return {text}
+        return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+    def _truncate(self, text: str, budget: int) -> Tuple[str, int]:
+        """在句子边界处截断，返回不超过预算的最长前缀及其词元数"""
+        kept = []
+        used = 0
+        for sentence in split_sentences(text):
+            tokens = self.count_tokens(sentence)
+            if used + tokens > budget:
+                break
+            kept.append(sentence)
+            used += tokens
+        return "".join(kept).rstrip(), used
+
+    def pack(self, chunks: List[str]) -> Tuple[List[str], dict]:
+        """在预算内打包片段
+
+        Args:
+            chunks: 按相关性降序排列的片段
+
+        Returns:
+            (打包后的片段, 统计字典)；统计包含 input_tokens、packed_tokens、saved_tokens、
+            duplicates（去重丢弃数）、truncated（截断数）、dropped（放不下而丢弃的数量）
+        """
+        stats = {"input_tokens": 0, "packed_tokens": 0, "saved_tokens": 0,
+                 "duplicates": 0, "truncated": 0, "dropped": 0}
+        packed: List[str] = []
+        kept_shingles: List[Set[str]] = []
+        for chunk in chunks:
+            tokens = self.count_tokens(chunk)
+            stats["input_tokens"] += tokens
+
+            shingles = self._shingles(chunk)
+            if any(len(shingles & other) / len(shingles | other) >= self.dedup_threshold
+                   for other in kept_shingles):
+                stats["duplicates"] += 1
+                continue
+
+            remaining = self.max_tokens - stats["packed_tokens"]
+            if tokens > remaining:
+                chunk, tokens = self._truncate(chunk, remaining)
+                if not chunk:
+                    stats["dropped"] += 1
+                    continue
+                stats["truncated"] += 1
+            packed.append(chunk)
+            kept_shingles.append(shingles)
+            stats["packed_tokens"] += tokens
+
+        stats["saved_tokens"] = stats["input_tokens"] - stats["packed_tokens"]
+        with self._lock:
+            self._totals["queries"] += 1
+            self._totals["input_tokens"] += stats["input_tokens"]
+            self._totals["packed_tokens"] += stats["packed_tokens"]
+        return packed, stats
+
+    def get_stats(self) -> dict:
+        """获取累计统计信息
+
+        Returns:
+            包含打包次数、累计输入与打包后词元数、节省的词元数及每次平均节省量的字典
+        """
+        with self._lock:
+            stats = dict(self._totals)
+        stats["saved_tokens"] = stats["input_tokens"] - stats["packed_tokens"]
+        stats["average_saved_tokens"] = stats["saved_tokens"] / stats["queries"] if stats["queries"] else 0.0
+        return stats
@@ -0,0 +1,116 @@
+from typing import Dict, List, Optional
+import os
+import hashlib
+import threading
+import numpy as np
+from .sqlite_lru import SqliteLRU
+
+
+class EmbeddingCache:
+    """嵌入缓存，基于SQLite的内容寻址磁盘缓存，按最近访问时间进行LRU淘汰"""
+
+    def __init__(self, cache_dir: str, max_entries: int = 200000):
+        """初始化嵌入缓存
+
+        Args:
+            cache_dir: 缓存目录
+            max_entries: 最大缓存条目数，超过后淘汰最久未访问的条目
+        """
+        self.cache_path = os.path.join(cache_dir, "embeddings.sqlite3")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        # 只保护命中统计，读写由 SqliteLRU 自身加锁
+        self._lock = threading.Lock()
+        self._store = SqliteLRU(self.cache_path, "embeddings", ["vector BLOB NOT NULL"], max_entries)
+
+    @staticmethod
+    def make_key(model_name: str, normalize: bool, text: str) -> str:
+        """生成缓存键
+
+        Args:
+            model_name: 嵌入模型名称
+            normalize: 是否归一化
+            text: 输入文本
+
+        Returns:
+            缓存键（SHA-256十六进制串）
+        """
+        raw = f"{model_name}\x00{int(normalize)}\x00{text}".encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """读取单个缓存向量
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            嵌入向量，未命中时返回None
+        """
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """批量读取缓存向量
+
+        Args:
+            keys: 缓存键列表
+
+        Returns:
+            命中的键到向量的映射
+        """
+        found = {key: np.frombuffer(row[0], dtype=np.float32)
+                 for key, row in self._store.get_many(keys).items()}
+
+        hit_count = sum(1 for key in keys if key in found)
+        with self._lock:
+            self.hits += hit_count
+            self.misses += len(keys) - hit_count
+        return found
+
+    def put(self, key: str, vector) -> None:
+        """写入单个缓存向量
+
+        Args:
+            key: 缓存键
+            vector: 嵌入向量
+        """
+        self.put_many({key: vector})
+
+    def put_many(self, items: Dict[str, object]) -> None:
+        """批量写入缓存向量，必要时淘汰最久未访问的条目
+
+        Args:
+            items: 键到向量的映射
+        """
+        self._store.put_many({key: (np.asarray(vector, dtype=np.float32).tobytes(),)
+                              for key, vector in items.items()})
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def get_stats(self) -> dict:
+        """获取缓存统计信息
+
+        Returns:
+            统计信息字典
+        """
+        total = self.hits + self.misses
+        return {
+            **self._store.get_stats(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._store.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def close(self) -> None:
+        """关闭缓存连接"""
+        self._store.close()
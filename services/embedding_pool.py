@@ -0,0 +1,112 @@
+from typing import List, Optional
+import os
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# 工作进程内的模型实例，由 _init_worker 在进程启动时加载
+_worker_model = None
+_worker_encode_kwargs: dict = {}
+
+
+def _init_worker(model_name: str, model_options: dict, encode_kwargs: dict, num_threads: int) -> None:
+    """工作进程初始化：限制torch线程数并加载模型"""
+    global _worker_model, _worker_encode_kwargs
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(num_threads)
+    _worker_model = SentenceTransformer(model_name, **model_options)
+    _worker_encode_kwargs = encode_kwargs
+
+
+def _encode_shard(texts: List[str]) -> np.ndarray:
+    """在工作进程中编码一个分片"""
+    embeddings = _worker_model.encode(texts, convert_to_numpy=True, **_worker_encode_kwargs)
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+class EmbeddingPool:
+    """多进程嵌入池，将文本分片到多个各自加载模型的工作进程中并行编码"""
+
+    def __init__(self, model_name: str,
+                 num_workers: Optional[int] = None,
+                 normalize_embeddings: bool = True,
+                 batch_size: int = 32,
+                 shard_size: Optional[int] = None,
+                 shards_per_worker: int = 4,
+                 model_options: Optional[dict] = None):
+        """初始化多进程嵌入池
+
+        注意：工作进程使用spawn方式启动，调用方脚本需要放在 ``if __name__ == "__main__":`` 下。
+
+        Args:
+            model_name: 嵌入模型名称
+            num_workers: 工作进程数，默认为CPU核数
+            normalize_embeddings: 是否对嵌入向量做L2归一化
+            batch_size: 工作进程内每批编码的文本数量
+            shard_size: 每个分片包含的文本数量，为None时按文本数和工作进程数计算
+            shards_per_worker: 自动计算分片大小时每个工作进程分得的分片数，多于1时长短分片可以相互均衡
+            model_options: 传给 SentenceTransformer 的额外参数
+        """
+        cpu_count = os.cpu_count() or 1
+        self.model_name = model_name
+        self.num_workers = num_workers or cpu_count
+        self.shard_size = shard_size
+        self.shards_per_worker = shards_per_worker
+        self.batch_size = batch_size
+
+        # 每个进程分得的torch线程数，避免进程间线程超额订阅
+        num_threads = max(1, cpu_count // self.num_workers)
+        encode_kwargs = {
+            "batch_size": batch_size,
+            "normalize_embeddings": normalize_embeddings
+        }
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_name, model_options or {}, encode_kwargs, num_threads)
+        )
+
+    def _shard_size(self, num_texts: int) -> int:
+        """分片大小：未指定时让每个工作进程分到 shards_per_worker 个分片，且不小于一个编码批次"""
+        if self.shard_size:
+            return self.shard_size
+        return max(self.batch_size, math.ceil(num_texts / (self.num_workers * self.shards_per_worker)))
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """并行编码文本，结果按输入顺序重新组装
+
+        Args:
+            texts: 文本列表
+
+        Returns:
+            形状为 (len(texts), dim) 的连续float32矩阵
+        """
+        # 先按长度排序再切分，使每个分片内的文本长度相近
+        order = np.argsort([len(text) for text in texts], kind="stable")
+        shard_size = self._shard_size(len(texts))
+        shards = [order[start:start + shard_size] for start in range(0, len(texts), shard_size)]
+
+        output = None
+        results = self._executor.map(_encode_shard, [[texts[i] for i in shard] for shard in shards])
+        for shard, embeddings in zip(shards, results):
+            if output is None:
+                output = np.empty((len(texts), embeddings.shape[1]), dtype=np.float32)
+            output[shard] = embeddings
+
+        return output
+
+    def close(self) -> None:
+        """关闭工作进程"""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,51 +1,192 @@
-from typing import List
-from sentence_transformers import SentenceTransformer
+from typing import List, Optional
+import threading
+import numpy as np
+from .embedding_cache import EmbeddingCache
+from .embedding_pool import EmbeddingPool
+from .onnx_backend import build_model_options
 
 
 class EmbeddingService:
     """嵌入服务，负责文本的向量化处理"""
-    
-    def __init__(self, model_name: str = "shibing624/text2vec-base-chinese"):
+
+    def __init__(self, model_name: str = "shibing624/text2vec-base-chinese",
+                 normalize_embeddings: bool = True,
+                 cache: Optional[EmbeddingCache] = None,
+                 batch_size: int = 32,
+                 num_workers: int = 0,
+                 pool_min_texts: int = 512,
+                 backend: str = "torch",
+                 onnx_file_name: Optional[str] = None,
+                 local_files_only: bool = False):
         """初始化嵌入服务
-        
+
         Args:
             model_name: 嵌入模型名称
+            normalize_embeddings: 是否对嵌入向量做L2归一化
+            cache: 可选的嵌入缓存，命中时跳过模型推理
+            batch_size: 批量编码时每批的文本数量
+            num_workers: 多进程编码的工作进程数，小于2时在当前进程编码
+            pool_min_texts: 启用多进程编码的最小文本数量，较小的批量在当前进程编码
+            backend: 推理后端，"torch" 或 "onnx"（int8量化模型见 services.onnx_backend）
+            onnx_file_name: ONNX文件名，为None时在本地目录或Hub仓库中自动查找量化文件
+            local_files_only: 是否只从本地加载模型，不访问网络
         """
         self.model_name = model_name
-        self.model = SentenceTransformer(model_name)
-    
+        self.normalize_embeddings = normalize_embeddings
+        self.cache = cache
+        self.batch_size = batch_size
+        self.num_workers = num_workers
+        self.pool_min_texts = pool_min_texts
+        self.backend = backend
+        self.onnx_file_name = onnx_file_name
+        self.local_files_only = local_files_only
+        # 量化文件查找可能访问Hub，延迟到首次加载模型时进行
+        self._model_options: Optional[dict] = None
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._pool: Optional[EmbeddingPool] = None
+
+    @property
+    def model(self):
+        """嵌入模型，首次使用时加载"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model_name, **self._resolve_model_options())
+        return self._model
+
+    def _resolve_model_options(self) -> dict:
+        """构造传给 SentenceTransformer 的参数，调用方需持有 _model_lock"""
+        if self._model_options is None:
+            self._model_options = build_model_options(self.model_name, self.backend,
+                                                      self.onnx_file_name, self.local_files_only)
+        return self._model_options
+
+    def warmup(self) -> None:
+        """加载模型并执行一次推理，避免首个请求承担加载开销"""
+        self.model.encode("预热", normalize_embeddings=self.normalize_embeddings)
+
     def embed_text(self, text: str) -> List[float]:
         """将单个文本转换为嵌入向量
-        
+
         Args:
             text: 输入文本
-            
+
         Returns:
             嵌入向量
         """
-        embedding = self.model.encode(text, normalize_embeddings=True)
+        if self.cache is None:
+            embedding = self.model.encode(text, normalize_embeddings=self.normalize_embeddings)
+            return embedding.tolist()
+
+        key = self._cache_key(text)
+        embedding = self.cache.get(key)
+        if embedding is None:
+            embedding = self.model.encode(text, normalize_embeddings=self.normalize_embeddings)
+            self.cache.put(key, embedding)
         return embedding.tolist()
-    
+
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
         """批量将文本转换为嵌入向量
-        
+
         Args:
             texts: 文本列表
-            
+
         Returns:
             嵌入向量列表
         """
-        embeddings = self.model.encode(texts, normalize_embeddings=True)
-        return [embedding.tolist() for embedding in embeddings]
-    
+        return self.embed_batch_array(texts).tolist()
+
+    def embed_batch_array(self, texts: List[str]) -> np.ndarray:
+        """批量将文本转换为嵌入矩阵，避免逐行转换为Python列表
+
+        Args:
+            texts: 文本列表
+
+        Returns:
+            形状为 (len(texts), dim) 的连续float32矩阵
+        """
+        if self.cache is None:
+            return self._encode(texts)
+
+        keys = [self._cache_key(text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        # 只对未命中的文本（去重后）进行编码
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            encoded = self._encode(list(missing.values()))
+            new_items = dict(zip(missing.keys(), encoded))
+            self.cache.put_many(new_items)
+            cached.update(new_items)
+
+        if not keys:
+            return self._encode([])
+        return np.ascontiguousarray(np.stack([cached[key] for key in keys]), dtype=np.float32)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """调用模型编码文本
+
+        SentenceTransformer.encode 内部已按长度排序分批并还原顺序，这里不再重复排序。
+
+        Args:
+            texts: 文本列表
+
+        Returns:
+            形状为 (len(texts), dim) 的连续float32矩阵
+        """
+        if not texts:
+            dimension = self.model.get_sentence_embedding_dimension()
+            return np.empty((0, dimension), dtype=np.float32)
+
+        if self.num_workers > 1 and len(texts) >= self.pool_min_texts:
+            return self._get_pool().encode(texts)
+
+        embeddings = self.model.encode(texts, batch_size=self.batch_size,
+                                       normalize_embeddings=self.normalize_embeddings,
+                                       convert_to_numpy=True)
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+    def _get_pool(self) -> EmbeddingPool:
+        """获取多进程嵌入池，首次使用时创建"""
+        if self._pool is None:
+            with self._model_lock:
+                model_options = self._resolve_model_options()
+            self._pool = EmbeddingPool(self.model_name,
+                                       num_workers=self.num_workers,
+                                       normalize_embeddings=self.normalize_embeddings,
+                                       batch_size=self.batch_size,
+                                       model_options=model_options)
+        return self._pool
+
+    def close(self) -> None:
+        """释放多进程嵌入池等资源"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def _cache_key(self, text: str) -> str:
+        """生成文本的缓存键，非torch后端的输出与torch存在数值差异，单独缓存"""
+        model_id = self.model_name if self.backend == "torch" else f"{self.model_name}@{self.backend}"
+        return EmbeddingCache.make_key(model_id, self.normalize_embeddings, text)
+
     def get_model_info(self) -> dict:
         """获取模型信息
-        
+
         Returns:
             模型信息字典
         """
-        return {
+        info = {
             "model_name": self.model_name,
+            "backend": self.backend,
             "max_seq_length": self.model.max_seq_length,
             "embedding_dimension": self.model.get_sentence_embedding_dimension()
-        }
\ No newline at end of file
+        }
+        if self.cache is not None:
+            info["cache"] = self.cache.get_stats()
+        return info
@@ -1,58 +1,259 @@
-from typing import List
+from typing import Callable, Iterable, Iterator, List, Optional
 import os
 import json
-import requests
+import time
+import random
+import weakref
+import threading
+from email.utils import parsedate_to_datetime
 from dotenv import load_dotenv
-from google import genai
+
+# 可重试的HTTP状态码：限流与服务端错误
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+_END = object()
+
+
+def _cached_stream(cache, key: str, stream_factory: Callable[[], Iterator[str]]) -> Iterator[str]:
+    """命中缓存时一次产出完整响应；否则边接收边产出，完整结束后写入缓存"""
+    cached = cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+    parts = []
+    for token in stream_factory():
+        parts.append(token)
+        yield token
+    cache.put(key, "".join(parts))
+
+
+async def _run_blocking(executor, func: Callable, *args):
+    """在线程池中执行会阻塞事件循环的同步调用（提示词构建、SQLite缓存读写）"""
+    import asyncio
+
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
+class TokenStream:
+    """流式回答：可同步或异步迭代文本片段，并分别记录首个片段的延迟和总延迟
+    
+    延迟从 start_time 起算，RAGSystem.query_stream() 传入调用开始的时间，
+    因此首字延迟包含检索、重排序和等待模型首个数据块的时间。
+    """
+
+    def __init__(self, tokens: Iterable[str], start_time: Optional[float] = None,
+                 on_complete: Optional[Callable[[str], None]] = None,
+                 executor=None):
+        """初始化流式回答
+        
+        Args:
+            tokens: 文本片段的可迭代对象
+            start_time: 计时起点（time.perf_counter()），为None时取当前时间
+            on_complete: 完整读完后以全文调用，中途出错或提前停止时不调用
+            executor: 异步迭代时执行阻塞读取的线程池，为None时使用事件循环的默认线程池
+        """
+        self._tokens = iter(tokens)
+        self.start_time = time.perf_counter() if start_time is None else start_time
+        self.on_complete = on_complete
+        self.executor = executor
+        self.time_to_first_token: Optional[float] = None
+        self.total_latency: Optional[float] = None
+        self._parts: List[str] = []
+        self.done = False
+
+    def __iter__(self) -> "TokenStream":
+        return self
+
+    def __next__(self) -> str:
+        if self.done:
+            raise StopIteration
+        try:
+            token = next(self._tokens)
+        except StopIteration:
+            self.done = True
+            self.total_latency = time.perf_counter() - self.start_time
+            if self.on_complete is not None:
+                self.on_complete(self.text)
+            raise
+        if self.time_to_first_token is None:
+            self.time_to_first_token = time.perf_counter() - self.start_time
+        self._parts.append(token)
+        return token
+
+    async def __aiter__(self):
+        """异步迭代：阻塞的读取在线程池（executor）中进行，不占用事件循环"""
+        while True:
+            token = await _run_blocking(self.executor, next, self, _END)
+            if token is _END:
+                return
+            yield token
+
+    @property
+    def text(self) -> str:
+        """目前已收到的全部文本"""
+        return "".join(self._parts)
+
+    def read(self) -> str:
+        """读完剩余的片段并返回全文"""
+        for _ in self:
+            pass
+        return self.text
+
+    def get_stats(self) -> dict:
+        """获取延迟统计
+        
+        Returns:
+            包含首字延迟、总延迟（秒）和片段数量的字典
+        """
+        return {
+            "time_to_first_token": self.time_to_first_token,
+            "total_latency": self.total_latency,
+            "tokens": len(self._parts)
+        }
 
 
 class Generator:
     """生成器，负责基于检索到的内容生成回答"""
     
-    def __init__(self, model_name: str = "gemini-2.5-flash"):
+    def __init__(self, model_name: str = "gemini-2.5-flash", context_packer=None,
+                 response_cache=None):
         """初始化生成器
         
         Args:
             model_name: 生成模型名称
+            context_packer: 上下文打包器（services.context_packer.ContextPacker），为None时拼接全部片段
+            response_cache: LLM响应缓存（services.llm_cache.LLMCache），为None时每次都请求模型
         """
         load_dotenv()
         self.model_name = model_name
-        self.client = genai.Client()
+        self.context_packer = context_packer
+        self.response_cache = response_cache
+        self._client = None
+
+    @property
+    def client(self):
+        """Gemini客户端，首次使用时创建"""
+        if self._client is None:
+            from google import genai
+            self._client = genai.Client()
+        return self._client
     
     def generate_answer(self, query: str, context_chunks: List[str], 
-                       show_prompt: bool = False) -> str:
+                       show_prompt: bool = False, pack_stats: Optional[dict] = None) -> str:
         """基于查询和上下文生成回答
         
         Args:
             query: 用户查询
             context_chunks: 相关的上下文片段
             show_prompt: 是否显示提示词
+            pack_stats: 可选的字典，启用上下文打包时写入本次打包的统计（见 ContextPacker.pack）
             
         Returns:
             生成的回答
         """
-        prompt = self._build_prompt(query, context_chunks)
+        prompt = self._build_prompt(query, context_chunks, pack_stats)
         
         if show_prompt:
             print(f"{prompt}\n\n---\n")
         
-        response = self.client.models.generate_content(
+        return self._generate(prompt)
+    
+    async def agenerate_answer(self, query: str, context_chunks: List[str],
+                               show_prompt: bool = False, executor=None,
+                               pack_stats: Optional[dict] = None) -> str:
+        """generate_answer() 的异步版本，使用 google-genai 的异步客户端
+        
+        Args:
+            query: 用户查询
+            context_chunks: 相关的上下文片段
+            show_prompt: 是否显示提示词
+            executor: 执行提示词构建和缓存读写的线程池，为None时使用事件循环的默认线程池
+            pack_stats: 可选的字典，启用上下文打包时写入本次打包的统计（见 ContextPacker.pack）
+            
+        Returns:
+            生成的回答
+        """
+        prompt = await _run_blocking(executor, self._build_prompt, query, context_chunks, pack_stats)
+        
+        if show_prompt:
+            print(f"{prompt}\n\n---\n")
+        
+        key = self._cache_key(prompt)
+        if key is not None:
+            cached = await _run_blocking(executor, self.response_cache.get, key)
+            if cached is not None:
+                return cached
+        
+        response = await self.client.aio.models.generate_content(
             model=self.model_name,
             contents=prompt
         )
         
+        if key is not None:
+            await _run_blocking(executor, self.response_cache.put, key, response.text)
         return response.text
     
-    def _build_prompt(self, query: str, context_chunks: List[str]) -> str:
+    def generate_answer_stream(self, query: str, context_chunks: List[str],
+                               show_prompt: bool = False,
+                               pack_stats: Optional[dict] = None) -> Iterator[str]:
+        """基于查询和上下文生成回答，逐个产出收到的文本片段
+        
+        Args:
+            query: 用户查询
+            context_chunks: 相关的上下文片段
+            show_prompt: 是否显示提示词
+            pack_stats: 可选的字典，启用上下文打包时写入本次打包的统计（见 ContextPacker.pack）
+            
+        Yields:
+            回答的文本片段
+        """
+        prompt = self._build_prompt(query, context_chunks, pack_stats)
+        
+        if show_prompt:
+            print(f"{prompt}\n\n---\n")
+        
+        return self.generate_stream(prompt)
+    
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """使用自定义提示词流式生成，命中响应缓存时一次产出完整回答
+        
+        Args:
+            prompt: 提示词
+            
+        Yields:
+            回答的文本片段
+        """
+        key = self._cache_key(prompt)
+        if key is not None:
+            return _cached_stream(self.response_cache, key, lambda: self._stream(prompt))
+        return self._stream(prompt)
+    
+    def _stream(self, prompt: str) -> Iterator[str]:
+        """请求模型的流式接口，跳过空片段"""
+        for chunk in self.client.models.generate_content_stream(
+            model=self.model_name,
+            contents=prompt
+        ):
+            if chunk.text:
+                yield chunk.text
+    
+    def _build_prompt(self, query: str, context_chunks: List[str],
+                      pack_stats: Optional[dict] = None) -> str:
         """构建提示词
         
         Args:
             query: 用户查询
             context_chunks: 上下文片段
+            pack_stats: 可选的字典，启用上下文打包时写入本次打包的统计
             
         Returns:
             构建的提示词
         """
+        if self.context_packer is not None:
+            # 在词元预算内去重、截断上下文片段；并发查询共用生成器，单次统计写入调用方自己的字典
+            context_chunks, stats = self.context_packer.pack(context_chunks)
+            if pack_stats is not None:
+                pack_stats.update(stats)
         context = "\n\n".join(context_chunks)
         
         prompt = f"""你是一位知识助手，请根据用户的问题和下列片段生成准确的回答。
@@ -75,13 +276,40 @@ class Generator:
         Returns:
             生成的回答
         """
+        return self._generate(custom_prompt)
+    
+    def _generate(self, prompt: str) -> str:
+        """请求模型生成回答，启用响应缓存时相同的提示词直接返回缓存结果
+        
+        Args:
+            prompt: 完整的提示词
+            
+        Returns:
+            生成的回答
+        """
+        key = self._cache_key(prompt)
+        if key is not None:
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                return cached
+        
         response = self.client.models.generate_content(
             model=self.model_name,
-            contents=custom_prompt
+            contents=prompt
         )
         
+        if key is not None:
+            self.response_cache.put(key, response.text)
         return response.text
     
+    def _cache_key(self, prompt: str) -> Optional[str]:
+        """响应缓存的键，未启用缓存时返回None"""
+        if self.response_cache is None:
+            return None
+        from .llm_cache import LLMCache
+
+        return LLMCache.make_key("gemini", self.model_name, None, prompt)
+    
     def get_model_info(self) -> dict:
         """获取模型信息
         
@@ -97,23 +325,110 @@ class Generator:
 class DeepSeekGenerator:
     """DeepSeek生成器，基于DeepSeek API生成回答"""
     
-    def __init__(self, model_name: str = "deepseek-chat", api_key: str = None):
+    def __init__(self, model_name: str = "deepseek-chat", api_key: str = None,
+                 api_url: str = "https://api.deepseek.com/v1/chat/completions",
+                 pool_size: int = 10,
+                 connect_timeout: float = 5.0,
+                 read_timeout: float = 60.0,
+                 max_retries: int = 3,
+                 backoff_base: float = 0.5,
+                 max_backoff: float = 30.0,
+                 session=None,
+                 context_packer=None,
+                 response_cache=None):
         """初始化DeepSeek生成器
         
         Args:
             model_name: DeepSeek模型名称
             api_key: API密钥，如果不提供则从环境变量DEEPSEEK_API_KEY获取
+            api_url: 对话补全接口地址
+            pool_size: 连接池中保持的长连接数量，应不小于并发请求数
+            connect_timeout: 建立连接的超时时间（秒）
+            read_timeout: 等待响应数据的超时时间（秒），流式响应时为两个数据块之间的最大间隔
+            max_retries: 遇到429/5xx、连接失败或超时时的最大重试次数
+            backoff_base: 指数退避的基础等待时间（秒），第n次重试最多等待 backoff_base * 2^n
+            max_backoff: 单次重试的最长等待时间（秒），服务端的Retry-After也以此为上限
+            session: 共享的 requests.Session，为None时在首次请求时创建带连接池的会话
+            context_packer: 上下文打包器（services.context_packer.ContextPacker），为None时拼接全部片段
+            response_cache: LLM响应缓存（services.llm_cache.LLMCache），为None时每次都请求API
+            
+        异步接口（agenerate_answer 等）在每个事件循环中各使用一个 httpx.AsyncClient，
+        并发数由调用方（如 AsyncRAGSystem）限制，连接池只保留 pool_size 个空闲长连接。
         """
         load_dotenv()
         self.model_name = model_name
         self.api_key = api_key or os.getenv("DEEPSEEK_API_KEY")
-        self.api_url = "https://api.deepseek.com/v1/chat/completions"
+        self.api_url = api_url
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self._session = session
+        self._owns_session = session is None
+        self._session_lock = threading.Lock()
+        # 每个事件循环各自的异步HTTP客户端，httpx的连接绑定在创建它的事件循环上
+        self._async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self.context_packer = context_packer
+        self.response_cache = response_cache
         
         if not self.api_key:
             raise ValueError("请设置环境变量 DEEPSEEK_API_KEY 或提供 api_key 参数")
+
+    @property
+    def session(self):
+        """带连接池的HTTP会话，首次使用时创建，所有请求复用其中的长连接"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    # 重试由 _post() 处理，连接池本身不重试
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size,
+                                          max_retries=0, pool_block=False)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
+
+    def close(self) -> None:
+        """关闭自行创建的HTTP会话，释放连接池中的连接"""
+        with self._session_lock:
+            if self._session is not None and self._owns_session:
+                self._session.close()
+                self._session = None
+
+    @property
+    def async_client(self):
+        """当前事件循环的异步HTTP客户端（httpx），在该循环中首次使用时创建"""
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            import httpx
+
+            connect_timeout, read_timeout = self.timeout
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                limits=httpx.Limits(max_connections=None, max_keepalive_connections=self.pool_size)
+            )
+            self._async_clients[loop] = client
+        return client
+
+    async def aclose(self) -> None:
+        """关闭当前事件循环的异步HTTP客户端"""
+        import asyncio
+
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
     
     def generate_answer(self, query: str, context_chunks: List[str], 
-                       show_prompt: bool = False, stream: bool = False) -> str:
+                       show_prompt: bool = False, stream: bool = False,
+                       pack_stats: Optional[dict] = None) -> str:
         """基于查询和上下文生成回答
         
         Args:
@@ -121,27 +436,69 @@ class DeepSeekGenerator:
             context_chunks: 相关的上下文片段
             show_prompt: 是否显示提示词
             stream: 是否使用流式响应
+            pack_stats: 可选的字典，启用上下文打包时写入本次打包的统计（见 ContextPacker.pack）
             
         Returns:
             生成的回答
         """
-        prompt = self._build_prompt(query, context_chunks)
+        prompt = self._build_prompt(query, context_chunks, pack_stats)
         
         if show_prompt:
             print(f"{prompt}\n\n---\n")
         
         return self._call_api(prompt, stream=stream)
     
-    def _build_prompt(self, query: str, context_chunks: List[str]) -> str:
+    async def agenerate_answer(self, query: str, context_chunks: List[str],
+                               show_prompt: bool = False, executor=None,
+                               pack_stats: Optional[dict] = None) -> str:
+        """generate_answer() 的异步版本，等待响应时不占用线程
+        
+        Args:
+            query: 用户查询
+            context_chunks: 相关的上下文片段
+            show_prompt: 是否显示提示词
+            executor: 执行提示词构建和缓存读写的线程池，为None时使用事件循环的默认线程池
+            pack_stats: 可选的字典，启用上下文打包时写入本次打包的统计（见 ContextPacker.pack）
+            
+        Returns:
+            生成的回答
+        """
+        prompt = await _run_blocking(executor, self._build_prompt, query, context_chunks, pack_stats)
+        
+        if show_prompt:
+            print(f"{prompt}\n\n---\n")
+        
+        return await self._acall_api(prompt, executor)
+    
+    async def agenerate_with_custom_prompt(self, custom_prompt: str, executor=None) -> str:
+        """使用自定义提示词异步生成回答
+        
+        Args:
+            custom_prompt: 自定义提示词
+            executor: 执行缓存读写的线程池，为None时使用事件循环的默认线程池
+            
+        Returns:
+            生成的回答
+        """
+        return await self._acall_api(custom_prompt, executor)
+    
+    def _build_prompt(self, query: str, context_chunks: List[str],
+                      pack_stats: Optional[dict] = None) -> str:
         """构建提示词
         
         Args:
             query: 用户查询
             context_chunks: 上下文片段
+            pack_stats: 可选的字典，启用上下文打包时写入本次打包的统计
             
         Returns:
             构建的提示词
         """
+        if self.context_packer is not None:
+            # 在词元预算内去重、截断上下文片段；并发查询共用生成器，单次统计写入调用方自己的字典
+            context_chunks, stats = self.context_packer.pack(context_chunks)
+            if pack_stats is not None:
+                pack_stats.update(stats)
         context = "\n\n".join(context_chunks)
         
         prompt = f"""你是一位知识助手，请根据用户的问题和下列片段生成准确的回答。
@@ -168,7 +525,28 @@ class DeepSeekGenerator:
         return self._call_api(custom_prompt, stream=stream)
     
     def _call_api(self, prompt: str, stream: bool = False) -> str:
-        """调用DeepSeek API
+        """调用DeepSeek API，启用响应缓存时相同的请求直接返回缓存结果
+        
+        Args:
+            prompt: 提示词
+            stream: 是否使用流式响应
+            
+        Returns:
+            生成的回答
+        """
+        key = self._cache_key(prompt)
+        if key is not None:
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                return cached
+        
+        answer = self._request(prompt, stream)
+        if key is not None:
+            self.response_cache.put(key, answer)
+        return answer
+    
+    def _request(self, prompt: str, stream: bool) -> str:
+        """请求API并解析回答
         
         Args:
             prompt: 提示词
@@ -177,6 +555,118 @@ class DeepSeekGenerator:
         Returns:
             生成的回答
         """
+        import requests
+
+        response = self._send(prompt, stream)
+        try:
+            if stream:
+                return self._handle_stream_response(response)
+            result = response.json()
+            return result['choices'][0]['message']['content']
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"请求异常: {e}")
+        except Exception as e:
+            raise Exception(f"未知错误: {e}")
+        finally:
+            response.close()
+    
+    def _send(self, prompt: str, stream: bool):
+        """发送请求并检查状态码，网络错误和非200响应都转换为带说明的异常
+        
+        Args:
+            prompt: 提示词
+            stream: 是否使用流式响应
+            
+        Returns:
+            状态码为200的响应对象
+        """
+        import requests
+
+        headers, data = self._build_request(prompt, stream)
+        try:
+            response = self._post(headers, data, stream)
+        except requests.exceptions.Timeout:
+            raise Exception("请求超时，请检查网络连接")
+        except requests.exceptions.ConnectionError:
+            raise Exception("网络连接失败，请检查网络设置")
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"请求异常: {e}")
+        
+        if response.status_code != 200:
+            error_msg = self._error_message(response)
+            response.close()
+            raise Exception(error_msg)
+        return response
+    
+    async def _acall_api(self, prompt: str, executor=None) -> str:
+        """异步调用DeepSeek API，重试策略和响应缓存与同步接口相同
+        
+        Args:
+            prompt: 提示词
+            executor: 执行SQLite缓存读写的线程池，为None时使用事件循环的默认线程池
+            
+        Returns:
+            生成的回答
+        """
+        key = self._cache_key(prompt)
+        if key is not None:
+            cached = await _run_blocking(executor, self.response_cache.get, key)
+            if cached is not None:
+                return cached
+        
+        answer = await self._arequest(prompt)
+        if key is not None:
+            await _run_blocking(executor, self.response_cache.put, key, answer)
+        return answer
+    
+    async def _arequest(self, prompt: str) -> str:
+        """异步请求API并解析回答
+        
+        Args:
+            prompt: 提示词
+            
+        Returns:
+            生成的回答
+        """
+        import asyncio
+        import httpx
+
+        headers, data = self._build_request(prompt, stream=False)
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self.async_client.post(self.api_url, headers=headers, json=data)
+            except httpx.TimeoutException:
+                if attempt >= self.max_retries:
+                    raise Exception("请求超时，请检查网络连接")
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise Exception("网络连接失败，请检查网络设置")
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                break
+            await asyncio.sleep(self._backoff(attempt, response.headers.get("Retry-After")))
+        
+        if response.status_code != 200:
+            raise Exception(self._error_message(response))
+        try:
+            return response.json()['choices'][0]['message']['content']
+        except Exception as e:
+            raise Exception(f"未知错误: {e}")
+    
+    def _build_request(self, prompt: str, stream: bool):
+        """构建请求头和请求体
+        
+        Args:
+            prompt: 提示词
+            stream: 是否使用流式响应
+            
+        Returns:
+            (headers, data) 元组
+        """
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
@@ -193,53 +683,140 @@ class DeepSeekGenerator:
             ],
             "stream": stream
         }
-        
+        return headers, data
+    
+    def _cache_key(self, prompt: str) -> Optional[str]:
+        """响应缓存的键，由模型、系统提示词、提示词和请求体中的采样参数决定；未启用缓存时返回None"""
+        if self.response_cache is None:
+            return None
+        from .llm_cache import LLMCache
+
+        _, data = self._build_request(prompt, stream=False)
+        params = {name: value for name, value in data.items() if name not in ("model", "messages", "stream")}
+        return LLMCache.make_key("deepseek", self.model_name, data["messages"][0]["content"], prompt, params)
+    
+    @staticmethod
+    def _error_message(response) -> str:
+        """根据非200响应生成错误说明（兼容 requests 与 httpx 的响应对象）"""
+        error_msg = f"API调用失败: HTTP {response.status_code}"
         try:
-            response = requests.post(
-                self.api_url, 
-                headers=headers, 
-                json=data, 
-                timeout=30, 
-                stream=stream
-            )
+            error_info = response.json()
+            error_msg += f" - {error_info.get('error', {}).get('message', '未知错误')}"
+        except:
+            error_msg += f" - {response.text}"
+        return error_msg
+    
+    def _post(self, headers: dict, data: dict, stream: bool):
+        """通过会话发送请求，遇到429/5xx、连接失败或超时时按带抖动的指数退避重试
+        
+        Args:
+            headers: 请求头
+            data: 请求体
+            stream: 是否使用流式响应
             
-            if response.status_code == 200:
-                if stream:
-                    return self._handle_stream_response(response)
-                else:
-                    result = response.json()
-                    return result['choices'][0]['message']['content']
-            else:
-                error_msg = f"API调用失败: HTTP {response.status_code}"
+        Returns:
+            最后一次请求的响应对象
+        """
+        import requests
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(self.api_url, headers=headers, json=data,
+                                             timeout=self.timeout, stream=stream)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+            
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                return response
+            delay = self._backoff(attempt, response.headers.get("Retry-After"))
+            # 读完并释放响应，连接回到连接池供重试复用
+            response.close()
+            time.sleep(delay)
+    
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """计算第 attempt 次重试前的等待时间
+        
+        Args:
+            attempt: 已失败的次数（从0开始）
+            retry_after: 响应头Retry-After的值（秒数或HTTP日期）
+            
+        Returns:
+            等待秒数；有Retry-After时以其为准，否则在 [0, backoff_base * 2^attempt] 内随机取值
+        """
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
                 try:
-                    error_info = response.json()
-                    error_msg += f" - {error_info.get('error', {}).get('message', '未知错误')}"
-                except:
-                    error_msg += f" - {response.text}"
-                raise Exception(error_msg)
-                
-        except requests.exceptions.Timeout:
-            raise Exception("请求超时，请检查网络连接")
-        except requests.exceptions.ConnectionError:
-            raise Exception("网络连接失败，请检查网络设置")
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return min(max(delay, 0.0), self.max_backoff)
+        return random.uniform(0.0, min(self.max_backoff, self.backoff_base * (2 ** attempt)))
+    
+    def generate_answer_stream(self, query: str, context_chunks: List[str],
+                               show_prompt: bool = False,
+                               pack_stats: Optional[dict] = None) -> Iterator[str]:
+        """基于查询和上下文生成回答，逐个产出收到的文本片段
+        
+        Args:
+            query: 用户查询
+            context_chunks: 相关的上下文片段
+            show_prompt: 是否显示提示词
+            pack_stats: 可选的字典，启用上下文打包时写入本次打包的统计（见 ContextPacker.pack）
+            
+        Yields:
+            回答的文本片段
+        """
+        prompt = self._build_prompt(query, context_chunks, pack_stats)
+        
+        if show_prompt:
+            print(f"{prompt}\n\n---\n")
+        
+        return self.generate_stream(prompt)
+    
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """使用自定义提示词流式生成，每收到一个SSE数据块就产出其中的文本
+        
+        请求在首次迭代时才发出；提前停止迭代会关闭响应并释放连接。
+        命中响应缓存时一次产出完整回答。
+        
+        Args:
+            prompt: 提示词
+            
+        Yields:
+            回答的文本片段
+        """
+        key = self._cache_key(prompt)
+        if key is not None:
+            return _cached_stream(self.response_cache, key, lambda: self._stream(prompt))
+        return self._stream(prompt)
+    
+    def _stream(self, prompt: str) -> Iterator[str]:
+        """发送流式请求并逐个产出SSE数据块中的文本"""
+        import requests
+
+        response = self._send(prompt, stream=True)
+        try:
+            yield from self._iter_stream_tokens(response)
         except requests.exceptions.RequestException as e:
             raise Exception(f"请求异常: {e}")
-        except Exception as e:
-            if "API调用失败" in str(e):
-                raise
-            raise Exception(f"未知错误: {e}")
+        finally:
+            response.close()
     
-    def _handle_stream_response(self, response) -> str:
-        """处理流式响应
+    def _iter_stream_tokens(self, response) -> Iterator[str]:
+        """解析SSE响应，逐个产出 delta 中的文本
         
         Args:
             response: requests响应对象
             
-        Returns:
-            完整的回答内容
+        Yields:
+            回答的文本片段
         """
-        content = ""
-        
         for line in response.iter_lines():
             if line:
                 line = line.decode('utf-8')
@@ -253,12 +830,21 @@ class DeepSeekGenerator:
                         chunk = json.loads(line)
                         if 'choices' in chunk and len(chunk['choices']) > 0:
                             delta = chunk['choices'][0].get('delta', {})
-                            if 'content' in delta:
-                                content += delta['content']
+                            if delta.get('content'):
+                                yield delta['content']
                     except json.JSONDecodeError:
                         continue
+    
+    def _handle_stream_response(self, response) -> str:
+        """处理流式响应
         
-        return content
+        Args:
+            response: requests响应对象
+            
+        Returns:
+            完整的回答内容
+        """
+        return "".join(self._iter_stream_tokens(response))
     
     def get_model_info(self) -> dict:
         """获取模型信息
@@ -269,5 +855,8 @@ class DeepSeekGenerator:
         return {
             "model_name": self.model_name,
             "provider": "DeepSeek",
-            "api_url": self.api_url
+            "api_url": self.api_url,
+            "pool_size": self.pool_size,
+            "timeout": self.timeout,
+            "max_retries": self.max_retries
         }
\ No newline at end of file
@@ -0,0 +1,126 @@
+from typing import Callable, Optional
+import os
+import json
+import time
+import hashlib
+import threading
+from .sqlite_lru import SqliteLRU
+
+
+class LLMCache:
+    """LLM响应缓存，基于SQLite的持久化缓存，支持过期时间和按最近访问时间的LRU淘汰
+
+    键由服务商、模型、系统提示词、完整提示词和采样参数共同决定，
+    完全相同的请求在进程重启后仍可直接返回，适合重复回放相同问题的回归测试和评测。
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = 100000,
+                 ttl_seconds: Optional[float] = 7 * 24 * 3600,
+                 clock: Callable[[], float] = time.time):
+        """初始化LLM响应缓存
+
+        Args:
+            cache_dir: 缓存目录
+            max_entries: 最大缓存条目数，超过后淘汰最久未访问的条目
+            ttl_seconds: 条目的存活时间（秒），为None时不过期
+            clock: 时间函数，便于测试
+        """
+        self.cache_path = os.path.join(cache_dir, "llm_responses.sqlite3")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+
+        # 只保护命中统计，读写由 SqliteLRU 自身加锁
+        self._lock = threading.Lock()
+        self._store = SqliteLRU(self.cache_path, "responses",
+                                ["response TEXT NOT NULL", "created REAL NOT NULL"], max_entries)
+
+    @staticmethod
+    def make_key(provider: str, model_name: str, system_prompt: Optional[str], prompt: str,
+                 params: Optional[dict] = None) -> str:
+        """生成缓存键
+
+        Args:
+            provider: 服务商名称
+            model_name: 模型名称
+            system_prompt: 系统提示词，没有时为None
+            prompt: 完整的用户提示词
+            params: 采样参数（如 temperature、top_p）
+
+        Returns:
+            缓存键（SHA-256十六进制串）
+        """
+        raw = json.dumps([provider, model_name, system_prompt, prompt, params or {}],
+                         ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存的响应，过期的条目会被删除
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            响应文本，未命中或已过期时返回None
+        """
+        row = self._store.get(key)
+        if row is not None and self.ttl_seconds is not None and row[1] < self.clock() - self.ttl_seconds:
+            self._store.delete([key])
+            row = None
+
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        """写入响应，必要时淘汰最久未访问的条目
+
+        Args:
+            key: 缓存键
+            response: 响应文本
+        """
+        self._store.put(key, (response, self.clock()))
+
+    def purge_expired(self) -> int:
+        """删除所有过期的条目
+
+        Returns:
+            删除的条目数
+        """
+        if self.ttl_seconds is None:
+            return 0
+        return self._store.delete_where("created < ?", (self.clock() - self.ttl_seconds,))
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def get_stats(self) -> dict:
+        """获取缓存统计信息
+
+        Returns:
+            统计信息字典
+        """
+        total = self.hits + self.misses
+        return {
+            **self._store.get_stats(),
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._store.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def close(self) -> None:
+        """关闭缓存连接"""
+        self._store.close()
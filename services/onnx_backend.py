@@ -0,0 +1,183 @@
+from typing import List, Optional
+import os
+import glob
+import fnmatch
+import numpy as np
+
+QUANTIZATION_CONFIGS = ("arm64", "avx2", "avx512", "avx512_vnni")
+
+
+def _quantized_pattern(quantization_config: Optional[str]) -> str:
+    """量化ONNX文件相对于模型根目录的通配模式"""
+    return f"onnx/model_q*int8_{quantization_config or '*'}.onnx"
+
+
+def find_quantized_onnx_file(model_dir: str, quantization_config: Optional[str] = None) -> Optional[str]:
+    """在本地模型目录中查找已导出的int8量化ONNX文件
+
+    Args:
+        model_dir: 本地模型目录
+        quantization_config: 量化配置，为None时返回找到的第一个量化文件
+
+    Returns:
+        相对于模型目录的文件名，例如 ``onnx/model_qint8_avx512_vnni.onnx``，找不到时返回None
+    """
+    matches = sorted(glob.glob(os.path.join(model_dir, _quantized_pattern(quantization_config))))
+    if not matches:
+        return None
+    return os.path.relpath(matches[0], model_dir).replace(os.sep, "/")
+
+
+def find_hub_quantized_onnx_file(repo_id: str, quantization_config: Optional[str] = None,
+                                 local_files_only: bool = False) -> Optional[str]:
+    """在Hugging Face Hub模型仓库中查找int8量化ONNX文件
+
+    联网时列出仓库文件；离线（local_files_only=True）或列举失败时在本地缓存的快照中查找。
+
+    Args:
+        repo_id: Hub模型ID，例如 ``sentence-transformers/all-MiniLM-L6-v2``
+        quantization_config: 量化配置，为None时返回找到的第一个量化文件
+        local_files_only: 是否只在本地缓存中查找，不访问网络
+
+    Returns:
+        相对于仓库根目录的文件名，找不到时返回None
+    """
+    from huggingface_hub import list_repo_files, snapshot_download
+
+    if not local_files_only:
+        try:
+            pattern = _quantized_pattern(quantization_config)
+            matches = sorted(name for name in list_repo_files(repo_id) if fnmatch.fnmatch(name, pattern))
+            return matches[0] if matches else None
+        except Exception:
+            pass
+
+    try:
+        snapshot_dir = snapshot_download(repo_id, local_files_only=True)
+    except Exception:
+        return None
+    return find_quantized_onnx_file(snapshot_dir, quantization_config)
+
+
+def build_model_options(model_name: str, backend: str = "torch",
+                        onnx_file_name: Optional[str] = None,
+                        local_files_only: bool = False) -> dict:
+    """构造加载 SentenceTransformer / CrossEncoder 时的参数
+
+    Args:
+        model_name: 模型名称或本地目录
+        backend: 推理后端，"torch" 或 "onnx"
+        onnx_file_name: ONNX文件名，为None时在本地目录或Hub仓库中自动查找量化文件
+        local_files_only: 是否只从本地加载，不访问网络
+
+    Returns:
+        模型构造参数字典
+    """
+    if backend not in ("torch", "onnx"):
+        raise ValueError(f"不支持的推理后端: {backend}")
+
+    options = {"backend": backend}
+    if local_files_only:
+        options["local_files_only"] = True
+
+    if backend == "onnx":
+        if onnx_file_name is None:
+            if os.path.isdir(model_name):
+                onnx_file_name = find_quantized_onnx_file(model_name)
+            else:
+                onnx_file_name = find_hub_quantized_onnx_file(model_name, local_files_only=local_files_only)
+        model_kwargs = {"provider": "CPUExecutionProvider"}
+        if onnx_file_name:
+            model_kwargs["file_name"] = onnx_file_name
+        options["model_kwargs"] = model_kwargs
+
+    return options
+
+
+def export_quantized_onnx(model_name: str, output_dir: str,
+                          model_type: str = "embedding",
+                          quantization_config: str = "avx512_vnni") -> str:
+    """将模型导出为ONNX并做int8动态量化，导出后可离线从 output_dir 加载
+
+    Args:
+        model_name: 模型名称或本地目录
+        output_dir: 导出目录
+        model_type: "embedding"（SentenceTransformer）或 "reranker"（CrossEncoder）
+        quantization_config: 量化配置，取值见 QUANTIZATION_CONFIGS
+
+    Returns:
+        相对于导出目录的量化ONNX文件名
+    """
+    from sentence_transformers import SentenceTransformer, CrossEncoder, export_dynamic_quantized_onnx_model
+
+    if model_type == "embedding":
+        model = SentenceTransformer(model_name, backend="onnx")
+    elif model_type == "reranker":
+        model = CrossEncoder(model_name, backend="onnx")
+    else:
+        raise ValueError(f"不支持的模型类型: {model_type}")
+
+    model.save_pretrained(output_dir)
+    export_dynamic_quantized_onnx_model(model, quantization_config, output_dir)
+
+    file_name = find_quantized_onnx_file(output_dir, quantization_config)
+    if file_name is None:
+        raise RuntimeError(f"未在 {output_dir} 中找到量化后的ONNX文件")
+    return file_name
+
+
+def check_embedding_parity(reference, candidate, texts: List[str]) -> dict:
+    """比较两个嵌入服务（如PyTorch与量化ONNX）的输出一致性
+
+    Args:
+        reference: 作为基准的 EmbeddingService
+        candidate: 待验证的 EmbeddingService
+        texts: 用于比较的文本列表
+
+    Returns:
+        包含最小/平均余弦相似度的字典
+    """
+    expected = reference.embed_batch_array(texts)
+    actual = candidate.embed_batch_array(texts)
+
+    expected = expected / np.linalg.norm(expected, axis=1, keepdims=True)
+    actual = actual / np.linalg.norm(actual, axis=1, keepdims=True)
+    cosine = np.sum(expected * actual, axis=1)
+
+    return {
+        "texts": len(texts),
+        "min_cosine": float(cosine.min()),
+        "mean_cosine": float(cosine.mean())
+    }
+
+
+def check_reranker_parity(reference, candidate, query: str, documents: List[str]) -> dict:
+    """比较两个重排序器（如PyTorch与量化ONNX）的打分一致性
+
+    Args:
+        reference: 作为基准的 Reranker
+        candidate: 待验证的 Reranker
+        query: 查询文本
+        documents: 候选文档列表
+
+    Returns:
+        包含最大分数误差、排序一致性等指标的字典
+    """
+    pairs = [(query, doc) for doc in documents]
+    expected = np.asarray(reference.cross_encoder.predict(pairs), dtype=np.float32)
+    actual = np.asarray(candidate.cross_encoder.predict(pairs), dtype=np.float32)
+
+    # Spearman秩相关系数
+    expected_rank = np.argsort(np.argsort(-expected))
+    actual_rank = np.argsort(np.argsort(-actual))
+    n = len(documents)
+    rank_correlation = 1.0
+    if n > 1:
+        rank_correlation = 1 - 6 * float(np.sum((expected_rank - actual_rank) ** 2)) / (n * (n * n - 1))
+
+    return {
+        "pairs": n,
+        "max_abs_diff": float(np.max(np.abs(expected - actual))) if n else 0.0,
+        "top1_agreement": bool(n == 0 or np.argmax(expected) == np.argmax(actual)),
+        "rank_correlation": rank_correlation
+    }
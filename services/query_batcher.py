@@ -0,0 +1,146 @@
+from typing import List
+import time
+import queue
+import asyncio
+import threading
+from concurrent.futures import Future
+import numpy as np
+
+_STOP = object()
+
+
+class QueryBatcher:
+    """查询嵌入微批处理器，将短时间内并发到达的查询合并为一次模型调用"""
+
+    def __init__(self, embedding_service, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        """初始化微批处理器
+
+        Args:
+            embedding_service: 嵌入服务实例
+            max_batch_size: 单批最大查询数量
+            max_wait_ms: 收到首个查询后等待更多查询的最长时间（毫秒）
+        """
+        self.embedding_service = embedding_service
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batch_count = 0
+        self.query_count = 0
+
+        self._queue: "queue.Queue" = queue.Queue()
+        # 保护 _closed 与入队：关闭后不会再有查询排在停止标记之后
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="query-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        """提交一个查询文本
+
+        Args:
+            text: 查询文本
+
+        Returns:
+            结果为float32嵌入向量的Future
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("QueryBatcher 已关闭")
+            self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str) -> List[float]:
+        """同步获取查询的嵌入向量
+
+        Args:
+            text: 查询文本
+
+        Returns:
+            嵌入向量
+        """
+        return self.submit(text).result().tolist()
+
+    async def aembed(self, text: str) -> List[float]:
+        """在asyncio中获取查询的嵌入向量
+
+        Args:
+            text: 查询文本
+
+        Returns:
+            嵌入向量
+        """
+        embedding = await asyncio.wrap_future(self.submit(text))
+        return embedding.tolist()
+
+    def _run(self) -> None:
+        """后台线程：收集一批查询并统一编码"""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._process(batch)
+
+        # 停止标记之后不应再有查询，以防万一让它们失败而不是永远等待
+        while True:
+            try:
+                _, future = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError("QueryBatcher 已关闭"))
+
+    def _process(self, batch: list) -> None:
+        """编码一批查询并把结果分发给对应的Future"""
+        batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        try:
+            embeddings = self.embedding_service.embed_batch_array([text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.batch_count += 1
+        self.query_count += len(batch)
+        for (_, future), embedding in zip(batch, embeddings):
+            future.set_result(np.array(embedding))
+
+    def get_stats(self) -> dict:
+        """获取批处理统计信息
+
+        Returns:
+            统计信息字典
+        """
+        return {
+            "batches": self.batch_count,
+            "queries": self.query_count,
+            "average_batch_size": self.query_count / self.batch_count if self.batch_count else 0.0
+        }
+
+    def close(self) -> None:
+        """停止后台线程，已提交的查询会处理完毕，之后的提交会抛出 RuntimeError"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join()
@@ -1,18 +1,144 @@
-from typing import List, Tuple
-from sentence_transformers import CrossEncoder
+from typing import List, Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import threading
+import numpy as np
+from .onnx_backend import build_model_options
 
 
 class Reranker:
     """重排序器，负责对检索结果进行重新排序"""
     
-    def __init__(self, model_name: str = 'cross-encoder/mmarco-mMiniLMv2-L12-H384-v1'):
+    def __init__(self, model_name: str = 'cross-encoder/mmarco-mMiniLMv2-L12-H384-v1',
+                 backend: str = "torch",
+                 onnx_file_name: Optional[str] = None,
+                 local_files_only: bool = False,
+                 score_cache_size: int = 10000,
+                 batch_size: int = 32):
         """初始化重排序器
         
         Args:
             model_name: CrossEncoder模型名称
+            backend: 推理后端，"torch" 或 "onnx"（int8量化模型见 services.onnx_backend）
+            onnx_file_name: ONNX文件名，为None时在本地目录或Hub仓库中自动查找量化文件
+            local_files_only: 是否只从本地加载模型，不访问网络
+            score_cache_size: (查询, 文档) 对分数缓存的最大条目数，为0时不缓存
+            batch_size: CrossEncoder每次前向计算的查询-文档对数量
         """
         self.model_name = model_name
-        self.cross_encoder = CrossEncoder(model_name)
+        self.backend = backend
+        self.onnx_file_name = onnx_file_name
+        self.local_files_only = local_files_only
+        self.batch_size = batch_size
+        self._cross_encoder = None
+        self._model_lock = threading.Lock()
+        
+        # 键为 (查询哈希, 文档哈希)，按LRU淘汰
+        self.score_cache_size = score_cache_size
+        self._score_cache: "OrderedDict[Tuple[bytes, bytes], float]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def cross_encoder(self):
+        """CrossEncoder模型，首次使用时加载"""
+        if self._cross_encoder is None:
+            with self._model_lock:
+                if self._cross_encoder is None:
+                    from sentence_transformers import CrossEncoder
+                    # 量化文件查找可能访问Hub，延迟到首次加载模型时进行
+                    model_options = build_model_options(self.model_name, self.backend,
+                                                        self.onnx_file_name, self.local_files_only)
+                    self._cross_encoder = CrossEncoder(self.model_name, **model_options)
+        return self._cross_encoder
+
+    def warmup(self) -> None:
+        """加载模型并执行一次推理，避免首个请求承担加载开销"""
+        self.cross_encoder.predict([("预热", "预热")])
+
+    @staticmethod
+    def _hash(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def _predict(self, pairs: List[Tuple[str, str]]) -> np.ndarray:
+        """按文本长度排序后批量推理，使同一批内的序列长度接近、减少填充，再恢复原顺序"""
+        order = np.argsort([len(query) + len(doc) for query, doc in pairs], kind="stable")
+        predicted = self.cross_encoder.predict([pairs[i] for i in order], batch_size=self.batch_size)
+        scores = np.empty(len(pairs), dtype=np.float32)
+        scores[order] = np.asarray(predicted, dtype=np.float32).reshape(-1)
+        return scores
+
+    def _score(self, query: str, documents: List[str]) -> np.ndarray:
+        """计算查询与每个文档的相关性分数
+        
+        Args:
+            query: 查询文本
+            documents: 文档列表
+            
+        Returns:
+            与文档一一对应的float32分数
+        """
+        return self._score_pairs([(query, doc) for doc in documents])
+
+    def _score_pairs(self, pairs: List[Tuple[str, str]]) -> np.ndarray:
+        """计算查询-文档对的分数，已缓存的对直接复用，其余一次批量推理
+        
+        Args:
+            pairs: (查询, 文档) 列表
+            
+        Returns:
+            与输入一一对应的float32分数
+        """
+        if self.score_cache_size <= 0:
+            return self._predict(pairs)
+        
+        query_hashes = {}
+        keys = []
+        for query, doc in pairs:
+            if query not in query_hashes:
+                query_hashes[query] = self._hash(query)
+            keys.append((query_hashes[query], self._hash(doc)))
+        scores = np.empty(len(pairs), dtype=np.float32)
+        missing = {}
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                score = self._score_cache.get(key)
+                if score is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    self._score_cache.move_to_end(key)
+                    scores[i] = score
+            num_missing = sum(len(indices) for indices in missing.values())
+            self.cache_hits += len(pairs) - num_missing
+            self.cache_misses += num_missing
+        
+        if missing:
+            # 同一批中重复的查询-文档对只推理一次
+            predicted = self._predict([pairs[indices[0]] for indices in missing.values()])
+            with self._cache_lock:
+                for (key, indices), score in zip(missing.items(), predicted):
+                    scores[indices] = score
+                    self._score_cache[key] = float(score)
+                    self._score_cache.move_to_end(key)
+                while len(self._score_cache) > self.score_cache_size:
+                    self._score_cache.popitem(last=False)
+        return scores
+
+    def get_cache_stats(self) -> dict:
+        """获取分数缓存统计信息
+        
+        Returns:
+            统计信息字典
+        """
+        total = self.cache_hits + self.cache_misses
+        return {
+            "entries": len(self._score_cache),
+            "max_entries": self.score_cache_size,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": self.cache_hits / total if total else 0.0
+        }
     
     def rerank(self, query: str, documents: List[str], top_k: int) -> List[str]:
         """对文档进行重排序
@@ -28,11 +154,8 @@ class Reranker:
         if not documents:
             return []
         
-        # 创建查询-文档对
-        pairs = [(query, doc) for doc in documents]
-        
-        # 计算相关性分数
-        scores = self.cross_encoder.predict(pairs)
+        # 计算相关性分数（命中缓存的查询-文档对不再推理）
+        scores = self._score(query, documents)
         
         # 将文档和分数配对并排序
         scored_documents = list(zip(documents, scores))
@@ -55,11 +178,8 @@ class Reranker:
         if not documents:
             return []
         
-        # 创建查询-文档对
-        pairs = [(query, doc) for doc in documents]
-        
-        # 计算相关性分数
-        scores = self.cross_encoder.predict(pairs)
+        # 计算相关性分数（命中缓存的查询-文档对不再推理）
+        scores = self._score(query, documents)
         
         # 将文档和分数配对并排序
         scored_documents = list(zip(documents, scores))
@@ -68,6 +188,39 @@ class Reranker:
         # 返回前top_k个文档和分数
         return scored_documents[:top_k]
     
+    def rerank_batch(self, queries: List[str], candidate_lists: List[List[str]], top_k: int,
+                     return_indices: bool = False) -> List[List[Tuple]]:
+        """一次为多个查询重排序：所有查询-文档对合并后按长度分批推理，再按查询拆分取top_k
+        
+        Args:
+            queries: 查询文本列表
+            candidate_lists: 与查询一一对应的候选文档列表
+            top_k: 每个查询返回的文档数量
+            return_indices: 为True时返回候选列表中的下标而不是文档文本
+            
+        Returns:
+            与查询一一对应的列表，每项为按分数降序排列的 (文档, 分数) 或 (下标, 分数)
+        """
+        if len(queries) != len(candidate_lists):
+            raise ValueError("queries 与 candidate_lists 的长度必须一致")
+        
+        pairs = [(query, doc) for query, documents in zip(queries, candidate_lists) for doc in documents]
+        scores = self._score_pairs(pairs) if pairs else np.empty(0, dtype=np.float32)
+        
+        results = []
+        start = 0
+        for documents in candidate_lists:
+            segment = scores[start:start + len(documents)]
+            start += len(documents)
+            if len(segment) > top_k > 0:
+                # 先用argpartition选出top_k，再只对这top_k个排序；同分时保持候选顺序
+                top = np.sort(np.argpartition(-segment, top_k - 1)[:top_k])
+            else:
+                top = np.arange(len(segment)) if top_k > 0 else np.empty(0, dtype=np.int64)
+            top = top[np.argsort(-segment[top], kind="stable")]
+            results.append([(int(i) if return_indices else documents[i], segment[i]) for i in top])
+        return results
+
     def get_model_info(self) -> dict:
         """获取模型信息
         
@@ -76,5 +229,7 @@ class Reranker:
         """
         return {
             "model_name": self.model_name,
-            "max_length": getattr(self.cross_encoder, 'max_length', 'Unknown')
+            "backend": self.backend,
+            "max_length": getattr(self.cross_encoder, 'max_length', 'Unknown'),
+            "score_cache": self.get_cache_stats()
         }
\ No newline at end of file
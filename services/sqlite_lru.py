@@ -0,0 +1,207 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import os
+import sqlite3
+import threading
+
+
+class SqliteLRU:
+    """基于SQLite的键值表，按最近访问时间进行LRU淘汰
+
+    表结构为 key TEXT PRIMARY KEY、若干值列和 last_access 访问时钟列，
+    LLM响应缓存、回答缓存和嵌入缓存在其上只定义各自的键和值编码。
+    条目数在打开时统计一次，之后随写入、删除和淘汰维护，写入时不再执行 COUNT(*)。
+    """
+
+    _BATCH = 500
+
+    def __init__(self, cache_path: str, table: str, columns: Sequence[str], max_entries: int):
+        """打开（必要时创建）缓存表
+
+        Args:
+            cache_path: SQLite文件路径
+            table: 表名
+            columns: 值列定义，如 ["response TEXT NOT NULL", "created REAL NOT NULL"]
+            max_entries: 最大条目数，超过后淘汰最久未访问的条目
+        """
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        self.cache_path = cache_path
+        self.table = table
+        self.max_entries = max_entries
+        self._columns = [column.split()[0] for column in columns]
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            f"key TEXT PRIMARY KEY, {', '.join(columns)}, last_access INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_last_access ON {table}(last_access)"
+        )
+        self._conn.commit()
+
+        # 单调递增的访问时钟，用于LRU排序
+        row = self._conn.execute(f"SELECT MAX(last_access), COUNT(*) FROM {table}").fetchone()
+        self._clock = (row[0] or 0) + 1
+        self._count = row[1]
+
+    def _batches(self, keys: List[str]) -> Iterable[Tuple[List[str], str]]:
+        """按SQLite参数个数限制分批，返回 (键列表, 占位符)"""
+        for start in range(0, len(keys), self._BATCH):
+            batch = keys[start:start + self._BATCH]
+            yield batch, ",".join("?" * len(batch))
+
+    def get(self, key: str) -> Optional[tuple]:
+        """读取单个条目并更新访问时钟
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            值列组成的元组，未命中时返回None
+        """
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: List[str]) -> Dict[str, tuple]:
+        """批量读取条目并更新命中条目的访问时钟
+
+        Args:
+            keys: 缓存键列表
+
+        Returns:
+            命中的键到值列元组的映射
+        """
+        found: Dict[str, tuple] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            for batch, placeholders in self._batches(unique_keys):
+                rows = self._conn.execute(
+                    f"SELECT key, {', '.join(self._columns)} FROM {self.table} WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for row in rows:
+                    found[row[0]] = tuple(row[1:])
+
+            if found:
+                self._clock += 1
+                for batch, placeholders in self._batches(list(found)):
+                    self._conn.execute(
+                        f"UPDATE {self.table} SET last_access = ? WHERE key IN ({placeholders})",
+                        [self._clock, *batch]
+                    )
+                self._conn.commit()
+        return found
+
+    def put(self, key: str, values: tuple) -> None:
+        """写入单个条目，必要时淘汰最久未访问的条目
+
+        Args:
+            key: 缓存键
+            values: 值列组成的元组
+        """
+        self.put_many({key: values})
+
+    def put_many(self, items: Dict[str, tuple]) -> None:
+        """批量写入条目，必要时淘汰最久未访问的条目
+
+        Args:
+            items: 键到值列元组的映射
+        """
+        if not items:
+            return
+
+        placeholders = ", ".join("?" * (len(self._columns) + 2))
+        with self._lock:
+            existing = 0
+            for batch, key_placeholders in self._batches(list(items)):
+                existing += self._conn.execute(
+                    f"SELECT COUNT(*) FROM {self.table} WHERE key IN ({key_placeholders})", batch
+                ).fetchone()[0]
+
+            self._clock += 1
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, {', '.join(self._columns)}, last_access) "
+                f"VALUES ({placeholders})",
+                [(key, *values, self._clock) for key, values in items.items()]
+            )
+            self._count += len(items) - existing
+            self._evict()
+            self._conn.commit()
+
+    def evict(self) -> int:
+        """淘汰最久未访问的条目，直到条目数不超过 max_entries
+
+        Returns:
+            淘汰的条目数
+        """
+        with self._lock:
+            removed = self._evict()
+            self._conn.commit()
+            return removed
+
+    def _evict(self) -> int:
+        overflow = self._count - self.max_entries
+        if overflow <= 0:
+            return 0
+        cursor = self._conn.execute(
+            f"DELETE FROM {self.table} WHERE key IN ("
+            f"SELECT key FROM {self.table} ORDER BY last_access ASC LIMIT ?)",
+            (overflow,)
+        )
+        self._count -= cursor.rowcount
+        return cursor.rowcount
+
+    def delete(self, keys: List[str]) -> int:
+        """删除指定的条目
+
+        Args:
+            keys: 缓存键列表
+
+        Returns:
+            删除的条目数
+        """
+        removed = 0
+        for batch, placeholders in self._batches(list(dict.fromkeys(keys))):
+            removed += self.delete_where(f"key IN ({placeholders})", batch)
+        return removed
+
+    def delete_where(self, condition: str, params: Sequence = ()) -> int:
+        """删除满足条件的条目（如过期条目）
+
+        Args:
+            condition: SQL WHERE 条件
+            params: 条件中的参数
+
+        Returns:
+            删除的条目数
+        """
+        with self._lock:
+            cursor = self._conn.execute(f"DELETE FROM {self.table} WHERE {condition}", tuple(params))
+            self._conn.commit()
+            self._count -= cursor.rowcount
+            return cursor.rowcount
+
+    def __len__(self) -> int:
+        return self._count
+
+    def get_stats(self) -> dict:
+        """获取表的统计信息
+
+        Returns:
+            包含 cache_path、entries、max_entries 的字典
+        """
+        return {"cache_path": self.cache_path, "entries": len(self), "max_entries": self.max_entries}
+
+    def clear(self) -> None:
+        """清空表"""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table}")
+            self._conn.commit()
+            self._count = 0
+
+    def close(self) -> None:
+        """关闭连接"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""测试端到端回答缓存"""
+
+import os
+import sys
+import shutil
+import tempfile
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.answer_cache import AnswerCache, normalize_question
+from core.rag_system import RAGSystem
+
+
+class FakeEmbeddingService:
+    def embed_batch_array(self, texts):
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+    def embed_text(self, text):
+        return [float(len(text)), 1.0]
+
+
+class PassthroughReranker:
+    def rerank(self, query, documents, top_k=3):
+        return documents[:top_k]
+
+
+class CountingGenerator:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_answer(self, query, chunks, show_prompt=False):
+        self.calls += 1
+        return f"回答{self.calls}"
+
+
+def test_normalize_question():
+    """测试全角字符、空白和大小写被规范化"""
+    assert normalize_question("  ＡＩ  是什么？ ") == normalize_question("ai 是什么?")
+    key = AnswerCache.make_key("问题", 5, 3, "deepseek-chat", 1)
+    assert key == AnswerCache.make_key(" 问题 ", 5, 3, "deepseek-chat", 1)
+    assert key != AnswerCache.make_key("问题", 5, 2, "deepseek-chat", 1)
+    assert key != AnswerCache.make_key("问题", 5, 3, "deepseek-chat", 2)
+
+
+def test_memory_lru_and_disk_persistence():
+    """测试内存层LRU淘汰后仍可从磁盘层读取，并在重新打开后保留"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = AnswerCache(max_entries=1, cache_dir=directory)
+        cache.put("a", "回答A")
+        cache.put("b", "回答B")
+        assert cache.get_stats()["memory_entries"] == 1
+        assert cache.get("a") == "回答A"
+        assert cache.get("missing") is None
+        assert cache.get_stats()["hit_rate"] == 0.5
+        cache.close()
+
+        reopened = AnswerCache(cache_dir=directory)
+        assert reopened.get("b") == "回答B"
+        assert len(reopened) == 2
+        reopened.close()
+
+    memory_only = AnswerCache(max_entries=2)
+    for key in "abc":
+        memory_only.put(key, key)
+    assert memory_only.get("a") is None and memory_only.get("c") == "c"
+
+
+def test_rag_query_uses_answer_cache():
+    """测试重复问题不再调用生成器，语料变化后重新生成"""
+    rag = RAGSystem(vector_backend="numpy", collection_name="answers", answer_cache=AnswerCache())
+    rag.embedding_service = FakeEmbeddingService()
+    rag.reranker = PassthroughReranker()
+    rag._generator = CountingGenerator()
+    rag.add_documents_from_texts(["竹蜻蜓可以飞"])
+
+    assert rag.query("竹蜻蜓是什么？") == "回答1"
+    assert rag.query(" 竹蜻蜓是什么? ") == "回答1"
+    assert rag._generator.calls == 1
+    assert rag.query("竹蜻蜓是什么？", rerank_k=1) == "回答2"
+
+    rag.add_documents_from_texts(["任意门"])
+    assert rag.query("竹蜻蜓是什么？") == "回答3"
+    assert rag.answer_cache.get_stats()["hits"] == 1
+
+
+def make_rag(collection_name, directory, cache):
+    rag = RAGSystem(vector_backend="numpy", collection_name=collection_name,
+                    persist_directory=directory, answer_cache=cache)
+    rag.embedding_service = FakeEmbeddingService()
+    rag.reranker = PassthroughReranker()
+    rag._generator = CountingGenerator()
+    return rag
+
+
+def test_answer_key_identifies_corpus():
+    """测试版本号相同的不同集合、重建后的语料不会命中彼此的回答，重新打开的存储仍可命中"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = AnswerCache(cache_dir=os.path.join(directory, "answers"))
+        first = make_rag("first", directory, cache)
+        second = make_rag("second", directory, cache)
+        first.add_documents_from_texts(["竹蜻蜓可以飞"])
+        second.add_documents_from_texts(["任意门可以穿越"])
+        assert first.vector_store.get_version() == second.vector_store.get_version()
+
+        assert first.query("这是什么？") == "回答1"
+        assert second.query("这是什么？") == "回答1"
+        assert second._generator.calls == 1
+
+        reopened = make_rag("first", directory, cache)
+        assert reopened.query("这是什么？") == "回答1"
+        assert reopened._generator.calls == 0
+
+        # 删除持久化目录后重建，版本号从头开始，但语料标识不同
+        corpus_id = first.vector_store.get_corpus_id()
+        shutil.rmtree(os.path.join(directory, "first"))
+        rebuilt = make_rag("first", directory, cache)
+        rebuilt.add_documents_from_texts(["时光机可以回到过去"])
+        assert rebuilt.vector_store.get_version() == first.vector_store.get_version()
+        assert rebuilt.vector_store.get_corpus_id() != corpus_id
+        assert rebuilt.query("这是什么？") == "回答1"
+        assert rebuilt._generator.calls == 1
+        cache.close()
+
+
+if __name__ == "__main__":
+    test_normalize_question()
+    test_memory_lru_and_disk_persistence()
+    test_rag_query_uses_answer_cache()
+    test_answer_key_identifies_corpus()
+    print("✓ 回答缓存测试通过")
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""测试asyncio版RAG系统的并发限制与DeepSeek异步接口"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.answer_cache import AnswerCache
+from core.async_rag_system import AsyncRAGSystem
+from core.rag_system import RAGSystem
+from services.context_packer import ContextPacker
+from services.generator import DeepSeekGenerator
+
+
+class FakeEmbeddingService:
+    def embed_batch_array(self, texts):
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+    def embed_text(self, text):
+        return [float(len(text)), 1.0]
+
+
+class PassthroughReranker:
+    def rerank(self, query, documents, top_k=3):
+        return documents[:top_k]
+
+
+class SlowAsyncGenerator:
+    """模拟等待LLM响应，并记录同时进行中的请求数"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.calls = 0
+
+    async def agenerate_answer(self, query, chunks, show_prompt=False, executor=None):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        return f"{query}:{chunks[0]}"
+
+
+def make_rag(**options):
+    rag = RAGSystem(vector_backend="numpy", collection_name="async", **options)
+    rag.embedding_service = FakeEmbeddingService()
+    rag.reranker = PassthroughReranker()
+    rag._generator = SlowAsyncGenerator()
+    rag.add_documents_from_texts(["时光机"])
+    return rag
+
+
+def test_concurrency_limit():
+    """测试同时进行中的问题数受 max_concurrency 限制"""
+    rag = make_rag()
+
+    async def run():
+        async with AsyncRAGSystem(rag, max_concurrency=10, max_workers=2) as system:
+            start = time.perf_counter()
+            answers = await system.query_many([f"问题{i}" for i in range(50)], rerank_k=1)
+            elapsed = time.perf_counter() - start
+            assert system.get_stats()["in_flight"] == 0
+            return answers, elapsed
+
+    answers, elapsed = asyncio.run(run())
+    assert answers == [f"问题{i}:时光机" for i in range(50)]
+    assert rag._generator.max_active == 10
+    # 50个问题以10为一组并发，总耗时约为5个生成延迟，而不是50个
+    assert elapsed < 50 * rag._generator.delay / 2
+
+
+def test_answer_cache_and_retrieve():
+    """测试异步查询复用回答缓存，retrieve 在线程池中执行"""
+    rag = make_rag(answer_cache=AnswerCache())
+
+    async def run():
+        async with AsyncRAGSystem(rag, max_concurrency=4) as system:
+            first = await system.query("时光机在哪？", rerank_k=1)
+            second = await system.query("时光机在哪？", rerank_k=1)
+            documents = await system.retrieve("时光机", top_k=1)
+            return first, second, documents
+
+    first, second, documents = asyncio.run(run())
+    assert first == second == "时光机在哪？:时光机"
+    assert rag._generator.calls == 1
+    assert documents == ["时光机"]
+
+
+def test_single_event_loop():
+    """测试同一实例不能跨事件循环使用"""
+    rag = make_rag()
+    system = AsyncRAGSystem(rag, max_concurrency=2)
+    assert asyncio.run(system.retrieve("时光机", top_k=1)) == ["时光机"]
+    try:
+        asyncio.run(system.retrieve("时光机", top_k=1))
+        assert False, "应当拒绝在另一个事件循环中使用"
+    except RuntimeError:
+        pass
+
+
+class ThreadRecordingStreamGenerator:
+    """逐字产出回答，并记录读取每个片段时所在的线程名"""
+
+    def __init__(self):
+        self.threads = []
+
+    def generate_answer_stream(self, query, chunks, show_prompt=False):
+        for token in chunks[0]:
+            self.threads.append(threading.current_thread().name)
+            yield token
+
+
+def test_query_stream_uses_bounded_executor():
+    """测试异步流式查询的检索和逐片段读取都在有界线程池中执行"""
+    rag = make_rag()
+    rag._generator = ThreadRecordingStreamGenerator()
+
+    async def run():
+        async with AsyncRAGSystem(rag, max_concurrency=2, max_workers=1) as system:
+            stream = await system.query_stream("时光机？", rerank_k=1)
+            return [token async for token in stream]
+
+    assert asyncio.run(run()) == ["时", "光", "机"]
+    assert rag._generator.threads and all(name.startswith("async-rag") for name in rag._generator.threads)
+
+
+class ThreadRecordingCache:
+    """记录读写缓存时所在的线程"""
+
+    def __init__(self, answer=None):
+        self.answer = answer
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(threading.get_ident())
+        return self.answer
+
+    def put(self, key, answer):
+        self.threads.append(threading.get_ident())
+
+
+def test_async_generation_does_not_block_loop():
+    """测试提示词构建（含分词）和缓存读写在线程池中执行，而不是在事件循环线程中"""
+    tokenizer_threads = []
+
+    def count_tokens(text):
+        tokenizer_threads.append(threading.get_ident())
+        return len(text)
+
+    cache = ThreadRecordingCache(answer="缓存的回答")
+    generator = DeepSeekGenerator(api_key="test", context_packer=ContextPacker(100, tokenizer=count_tokens),
+                                  response_cache=cache)
+
+    async def run():
+        return await generator.agenerate_answer("问题", ["片段"]), threading.get_ident()
+
+    answer, loop_thread = asyncio.run(run())
+    assert answer == "缓存的回答"
+    assert tokenizer_threads and loop_thread not in tokenizer_threads
+    assert cache.threads and loop_thread not in cache.threads
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """先返回一次429，之后返回回显问题的补全结果"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.count += 1
+            throttled = self.server.count == 1
+        if throttled:
+            payload = b'{"error": {"message": "too many requests"}}'
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+        else:
+            content = body["messages"][-1]["content"]
+            payload = json.dumps({"choices": [{"message": {"content": content}}]}).encode("utf-8")
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_deepseek_async_generation():
+    """测试DeepSeek异步接口的并发请求与429重试"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.lock = threading.Lock()
+    server.count = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    generator = DeepSeekGenerator(api_key="test", backoff_base=0.001,
+                                  api_url=f"http://127.0.0.1:{server.server_port}/v1/chat/completions")
+
+    async def run():
+        try:
+            return await asyncio.gather(*(generator.agenerate_with_custom_prompt(f"问题{i}") for i in range(8)))
+        finally:
+            await generator.aclose()
+
+    try:
+        assert asyncio.run(run()) == [f"问题{i}" for i in range(8)]
+        assert server.count == 9
+        # 在新的事件循环中使用同一个生成器时创建新的客户端
+        assert asyncio.run(run()) == [f"问题{i}" for i in range(8)]
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_concurrency_limit()
+    test_answer_cache_and_retrieve()
+    test_single_event_loop()
+    test_query_stream_uses_bounded_executor()
+    test_async_generation_does_not_block_loop()
+    test_deepseek_async_generation()
+    print("✓ 异步RAG系统测试通过")
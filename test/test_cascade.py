@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""测试按检索置信度跳过或缩小重排序的级联策略"""
+
+import os
+import sys
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.cascade import CascadePolicy
+from core.rag_system import RAGSystem
+
+
+class FakeEmbeddingService:
+    """把文本映射到单位圆上的角度，角度由文本中的数字决定"""
+
+    def _embed(self, text):
+        angle = float("".join(ch for ch in text if ch.isdigit()) or 0) / 100
+        return [np.cos(angle), np.sin(angle)]
+
+    def embed_batch_array(self, texts):
+        return np.array([self._embed(text) for text in texts], dtype=np.float32)
+
+    def embed_text(self, text):
+        return self._embed(text)
+
+
+class RecordingReranker:
+    def __init__(self):
+        self.calls = []
+
+    def rerank(self, query, documents, top_k=3):
+        self.calls.append(list(documents))
+        return list(reversed(documents))[:top_k]
+
+
+class EchoGenerator:
+    def generate_answer(self, query, chunks, show_prompt=False):
+        return "|".join(chunks)
+
+
+def test_plan():
+    """测试跳过、裁剪和完整重排序三种决策"""
+    policy = CascadePolicy(margin_threshold=0.1, distance_cutoff=0.3)
+    assert policy.plan([0.05, 0.5, 0.6], rerank_k=1) == 0
+    assert policy.plan([0.2], rerank_k=1) == 0
+    assert policy.plan([0.2, 0.25, 0.28, 0.5, 0.9], rerank_k=2) == 3
+    assert policy.plan([0.2, 0.25, 0.4, 0.5], rerank_k=3) == 3
+    assert CascadePolicy(0.1).plan([0.2, 0.25, 0.4], rerank_k=1) == 3
+
+    stats = policy.get_stats()
+    assert (stats["skipped"], stats["shrunk"], stats["full"]) == (2, 2, 0)
+    assert stats["skip_rate"] == 0.5
+
+
+def test_rag_query_with_cascade():
+    """测试 RAGSystem 按距离决定重排序的候选"""
+    rag = RAGSystem(vector_backend="numpy", collection_name="cascade",
+                    cascade_policy=CascadePolicy(margin_threshold=0.05, distance_cutoff=0.02))
+    rag.embedding_service = FakeEmbeddingService()
+    rag.reranker = RecordingReranker()
+    rag._generator = EchoGenerator()
+    rag.add_documents_from_texts(["文档0", "文档5", "文档10", "文档100"])
+
+    results = rag.retrieve_with_distances("查询0", top_k=4)
+    assert [doc for doc, _ in results] == ["文档0", "文档5", "文档10", "文档100"]
+    distances = [distance for _, distance in results]
+    assert distances == sorted(distances) and abs(distances[0]) < 1e-5
+
+    # 第一名与第二名距离接近时，只对距离不超过阈值的候选重排序
+    assert rag.query("查询2", retrieve_k=4, rerank_k=2) == "文档10|文档5"
+    assert rag.reranker.calls == [["文档0", "文档5", "文档10"]]
+
+    # 第一名明显领先时跳过重排序，按向量检索的顺序返回
+    assert rag.query("查询100", retrieve_k=4, rerank_k=2) == "文档100|文档10"
+    assert len(rag.reranker.calls) == 1
+    assert rag.cascade_policy.get_stats()["skipped"] == 1
+
+
+if __name__ == "__main__":
+    test_plan()
+    test_rag_query_with_cascade()
+    print("✓ 级联重排序测试通过")
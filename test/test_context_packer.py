@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""测试按词元预算打包上下文片段"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.rag_system import RAGSystem
+from services.context_packer import ContextPacker, estimate_tokens, split_sentences
+from services.generator import DeepSeekGenerator
+
+
+def test_estimate_and_split():
+    """测试词元估算与句子切分"""
+    assert estimate_tokens("哆啦A梦") == 4
+    assert estimate_tokens("abcdefgh") == 2
+    text = "大雄很懒。哆啦A梦来自未来！Is it? Yes.\n下一行"
+    assert "".join(split_sentences(text)) == text
+    assert split_sentences(text)[:2] == ["大雄很懒。", "哆啦A梦来自未来！"]
+
+
+def test_pack_dedup_and_truncate():
+    """测试近似重复去重、句子边界截断和跳过放不下的片段"""
+    packer = ContextPacker(max_tokens=27, tokenizer=len)
+    chunks = [
+        "竹蜻蜓可以让人在天上飞。",
+        "竹蜻蜓可以让人在天上飞！",
+        "任意门可以去任何地方。时光机可以回到过去。",
+        "这是一段很长的没有任何句末标点的文本",
+        "记忆面包"
+    ]
+    packed, stats = packer.pack(chunks)
+    assert packed == ["竹蜻蜓可以让人在天上飞。", "任意门可以去任何地方。", "记忆面包"]
+    assert stats["duplicates"] == 1
+    assert stats["truncated"] == 1
+    assert stats["dropped"] == 1
+    assert stats["packed_tokens"] == sum(len(chunk) for chunk in packed) == 27
+    assert stats["saved_tokens"] == sum(len(chunk) for chunk in chunks) - stats["packed_tokens"]
+    assert packer.get_stats()["queries"] == 1
+
+
+def test_generator_uses_packer():
+    """测试生成器构建提示词时使用打包结果"""
+    packer = ContextPacker(max_tokens=6, tokenizer=len)
+    generator = DeepSeekGenerator(api_key="test", context_packer=packer)
+    prompt = generator._build_prompt("问题", ["片段一。片段二。", "片段一。片段二。"])
+    assert "片段一。" in prompt and "片段二" not in prompt
+    stats = packer.get_stats()
+    assert stats["queries"] == 1
+    assert stats["saved_tokens"] == 12
+    assert not hasattr(generator, "last_pack_stats")
+
+
+class FakeEmbeddingService:
+    def embed_batch_array(self, texts):
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+    def embed_text(self, text):
+        return [float(len(text)), 1.0]
+
+
+class PassthroughReranker:
+    def rerank(self, query, documents, top_k=3):
+        return documents[:top_k]
+
+
+def test_query_returns_pack_stats():
+    """测试并发查询共用生成器时，每个查询通过自己的 pack_stats 拿到本次的打包统计"""
+    packer = ContextPacker(max_tokens=100, tokenizer=len)
+    generator = DeepSeekGenerator(api_key="test", context_packer=packer)
+    generator._call_api = lambda prompt, stream=False: "回答"
+    rag = RAGSystem(vector_backend="numpy", collection_name="pack")
+    rag._generator = generator
+    rag.embedding_service = FakeEmbeddingService()
+    rag.reranker = PassthroughReranker()
+    rag.add_documents_from_texts(["竹" * 10, "门" * 200])
+
+    def query(rerank_k):
+        stats = {}
+        assert rag.query("问题", retrieve_k=2, rerank_k=rerank_k, pack_stats=stats) == "回答"
+        return stats
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(query, [1, 2] * 20))
+    # 只取最相近的短片段时全部放入；两个片段都取时没有句末标点的长片段放不下而被丢弃
+    assert results[0::2] == [results[0]] * 20 and results[1::2] == [results[1]] * 20
+    assert (results[0]["input_tokens"], results[0]["saved_tokens"]) == (10, 0)
+    assert (results[1]["input_tokens"], results[1]["saved_tokens"], results[1]["dropped"]) == (210, 200, 1)
+    assert packer.get_stats()["queries"] == 40
+
+
+if __name__ == "__main__":
+    test_estimate_and_split()
+    test_pack_dedup_and_truncate()
+    test_generator_uses_packer()
+    test_query_returns_pack_stats()
+    print("✓ 上下文打包测试通过")
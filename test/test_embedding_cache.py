@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""测试嵌入缓存的读写、LRU淘汰和命中统计"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.embedding_cache import EmbeddingCache
+
+
+def test_cache_roundtrip():
+    """测试缓存写入后可以跨实例读取"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = EmbeddingCache(cache_dir)
+        key = EmbeddingCache.make_key("model", True, "哆啦A梦")
+        cache.put(key, np.arange(4, dtype=np.float32))
+        cache.close()
+
+        reopened = EmbeddingCache(cache_dir)
+        vector = reopened.get(key)
+        assert vector is not None
+        assert np.array_equal(vector, np.arange(4, dtype=np.float32))
+        assert reopened.get(EmbeddingCache.make_key("model", False, "哆啦A梦")) is None
+        assert reopened.get_stats()["hits"] == 1
+        assert reopened.get_stats()["misses"] == 1
+        reopened.close()
+
+
+def test_cache_lru_eviction():
+    """测试超过容量时淘汰最久未访问的条目"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = EmbeddingCache(cache_dir, max_entries=2)
+        cache.put("a", [1.0])
+        cache.put("b", [2.0])
+        cache.get("a")
+        cache.put("c", [3.0])
+
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+        cache.close()
+
+
+if __name__ == "__main__":
+    test_cache_roundtrip()
+    test_cache_lru_eviction()
+    print("✓ 嵌入缓存测试通过")
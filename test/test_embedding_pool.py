@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""测试多进程嵌入池的分片大小与结果重组顺序"""
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import embedding_pool
+from services.embedding_pool import EmbeddingPool
+
+
+class FakeModel:
+    """按文本内容生成确定的向量，并记录每个分片的大小"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.shard_sizes = []
+
+    def encode(self, texts, convert_to_numpy=True, **kwargs):
+        with self.lock:
+            self.shard_sizes.append(len(texts))
+        return np.array([[len(text), int(text.split("-")[0])] for text in texts], dtype=np.float32)
+
+
+def make_pool(**options):
+    """创建嵌入池，用线程池和假模型代替工作进程（进程池在首次提交任务时才启动）"""
+    pool = EmbeddingPool("fake-model", **options)
+    pool._executor.shutdown(wait=True)
+    pool._executor = ThreadPoolExecutor(max_workers=pool.num_workers)
+    return pool
+
+
+def test_encode_preserves_input_order():
+    """测试按长度排序分片编码后，结果仍按输入顺序排列"""
+    model = FakeModel()
+    embedding_pool._worker_model = model
+    rng = np.random.default_rng(0)
+    texts = [f"{i}-" + "字" * int(rng.integers(1, 200)) for i in range(1000)]
+    try:
+        with make_pool(num_workers=4, batch_size=32) as pool:
+            embeddings = pool.encode(texts)
+    finally:
+        embedding_pool._worker_model = None
+
+    expected = np.array([[len(text), i] for i, text in enumerate(texts)], dtype=np.float32)
+    assert embeddings.dtype == np.float32 and embeddings.flags["C_CONTIGUOUS"]
+    assert np.array_equal(embeddings, expected)
+    # 1000个文本、4个进程，每个进程分到4个分片
+    assert sorted(model.shard_sizes, reverse=True) == [63] * 15 + [55]
+
+
+def test_shard_size():
+    """测试分片大小随文本数增长，不小于编码批次，显式指定时保持不变"""
+    with make_pool(num_workers=4, batch_size=32) as pool:
+        assert pool._shard_size(100) == 32
+        assert pool._shard_size(16000) == 1000
+    with make_pool(num_workers=4, shard_size=256) as pool:
+        assert pool._shard_size(16000) == 256
+
+
+if __name__ == "__main__":
+    test_encode_preserves_input_order()
+    test_shard_size()
+    print("✓ 多进程嵌入池测试通过")
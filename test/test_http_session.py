@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""用本地HTTP桩服务测试DeepSeekGenerator的连接复用、超时与重试"""
+
+import os
+import sys
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.generator import DeepSeekGenerator
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """按服务器上预设的状态码序列响应，之后返回正常的补全结果"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.requests.append(self.client_address)
+            status = server.statuses.pop(0) if server.statuses else 200
+
+        if status != 200:
+            payload = json.dumps({"error": {"message": "稍后重试"}}).encode("utf-8")
+            self.send_response(status)
+            if server.retry_after is not None:
+                self.send_header("Retry-After", server.retry_after)
+        elif body.get("stream"):
+            events = [{"choices": [{"delta": {"content": token}}]} for token in ("你", "好")]
+            payload = "".join(f"data: {json.dumps(event)}\n\n" for event in events).encode("utf-8")
+            payload += b"data: [DONE]\n\n"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+        else:
+            content = body["messages"][-1]["content"]
+            payload = json.dumps({"choices": [{"message": {"content": f"回答:{content}"}}]}).encode("utf-8")
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(statuses=(), retry_after=None):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.statuses = list(statuses)
+    server.retry_after = retry_after
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_generator(server, **options):
+    options.setdefault("backoff_base", 0.001)
+    return DeepSeekGenerator(api_key="test", api_url=f"http://127.0.0.1:{server.server_port}/v1/chat/completions",
+                             **options)
+
+
+def test_connection_reuse():
+    """测试连续请求复用同一个长连接，流式与非流式都经过会话"""
+    server = start_server()
+    generator = make_generator(server)
+    try:
+        for i in range(5):
+            assert generator.generate_with_custom_prompt(f"问题{i}") == f"回答:问题{i}"
+        assert generator.generate_with_custom_prompt("问题", stream=True) == "你好"
+        assert len(server.requests) == 6
+        assert len(set(server.requests)) == 1
+    finally:
+        generator.close()
+        server.shutdown()
+
+
+def test_retry_on_429_and_5xx():
+    """测试429/5xx按Retry-After重试，重试用尽后抛出异常"""
+    server = start_server(statuses=[429, 503], retry_after="0")
+    generator = make_generator(server, max_retries=2)
+    try:
+        assert generator.generate_with_custom_prompt("问题") == "回答:问题"
+        assert len(server.requests) == 3
+
+        server.statuses = [500, 500, 500]
+        try:
+            generator.generate_with_custom_prompt("问题")
+            raise AssertionError("应该抛出异常")
+        except Exception as error:
+            assert "HTTP 500" in str(error)
+        assert len(server.requests) == 6
+
+        # 400不重试
+        server.statuses = [400]
+        try:
+            generator.generate_with_custom_prompt("问题")
+            raise AssertionError("应该抛出异常")
+        except Exception as error:
+            assert "HTTP 400" in str(error)
+        assert len(server.requests) == 7
+    finally:
+        generator.close()
+        server.shutdown()
+
+
+def test_backoff():
+    """测试退避时间的上限与Retry-After解析"""
+    server = start_server()
+    generator = make_generator(server, backoff_base=1.0, max_backoff=3.0)
+    server.shutdown()
+    for attempt in range(6):
+        assert 0.0 <= generator._backoff(attempt) <= min(3.0, 2 ** attempt)
+    assert generator._backoff(0, "2") == 2.0
+    assert generator._backoff(0, "120") == 3.0
+    assert generator._backoff(0, "Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_connection_error_retries():
+    """测试连接失败时重试后抛出网络错误"""
+    server = start_server()
+    port = server.server_port
+    server.shutdown()
+    server.server_close()
+    generator = DeepSeekGenerator(api_key="test", api_url=f"http://127.0.0.1:{port}/v1/chat/completions",
+                                  max_retries=1, backoff_base=0.001, connect_timeout=0.5)
+    try:
+        generator.generate_with_custom_prompt("问题")
+        raise AssertionError("应该抛出异常")
+    except Exception as error:
+        assert "网络连接失败" in str(error)
+
+
+if __name__ == "__main__":
+    test_connection_reuse()
+    test_retry_on_429_and_5xx()
+    test_backoff()
+    test_connection_error_retries()
+    print("✓ HTTP会话测试通过")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""测试基于内容哈希ID的幂等增量导入"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.rag_system import RAGSystem
+from core.vector_store import make_chunk_id
+
+
+class FakeEmbeddingService:
+    """记录被嵌入文本的假嵌入服务"""
+
+    def __init__(self):
+        self.embedded = []
+
+    def embed_batch_array(self, texts):
+        self.embedded.extend(texts)
+        return np.array([[len(text), sum(map(ord, text)) % 97, 1.0] for text in texts], dtype=np.float32)
+
+
+def _check_reingestion(vector_backend: str, persist_directory: str):
+    rag = RAGSystem(vector_backend=vector_backend, persist_directory=persist_directory,
+                    collection_name="incremental")
+    rag.embedding_service = FakeEmbeddingService()
+
+    doc_file = os.path.join(persist_directory, "doc.md")
+    with open(doc_file, 'w', encoding='utf-8') as file:
+        file.write("第一段\n\n第二段\n\n第三段\n\n第二段")
+
+    assert rag.load_document(doc_file) == 4
+    assert rag.vector_store.count() == 3
+    assert rag.embedding_service.embedded == ["第一段", "第二段", "第三段"]
+
+    # 内容未变时重新导入不做任何嵌入，也不会产生重复
+    rag.embedding_service.embedded.clear()
+    rag.load_document(doc_file)
+    assert rag.embedding_service.embedded == []
+    assert rag.vector_store.count() == 3
+
+    # 修改一段后只嵌入新内容，旧内容被删除
+    with open(doc_file, 'w', encoding='utf-8') as file:
+        file.write("第一段\n\n第二段（修订）\n\n第三段")
+    stats = rag.ingest_texts(rag.doc_processor.split_into_chunks(doc_file), source=os.path.abspath(doc_file))
+    assert stats == {"chunks": 3, "total": 3, "added": 1, "skipped": 2, "removed": 1}
+    assert rag.embedding_service.embedded == ["第二段（修订）"]
+    assert sorted(rag.vector_store.get_documents()) == sorted(["第一段", "第二段（修订）", "第三段"])
+
+    # 不同来源的相同文本是不同的块
+    assert make_chunk_id("第一段", "a.md") != make_chunk_id("第一段", "b.md")
+    rag.add_documents_from_texts(["第一段"])
+    assert rag.vector_store.count() == 4
+
+
+def test_reingestion_numpy_backend():
+    """测试numpy后端的重复导入、修改与删除"""
+    with tempfile.TemporaryDirectory() as directory:
+        _check_reingestion("numpy", directory)
+
+
+def test_reingestion_chroma_backend():
+    """测试chroma后端的重复导入、修改与删除"""
+    with tempfile.TemporaryDirectory() as directory:
+        _check_reingestion("chroma", directory)
+
+
+if __name__ == "__main__":
+    test_reingestion_numpy_backend()
+    test_reingestion_chroma_backend()
+    print("✓ 增量导入测试通过")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""测试流式导入流水线的分批、背压和进度回调"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.document_processor import DocumentProcessor
+from core.ingestion import IngestionPipeline
+from core.numpy_vector_store import NumpyVectorStore
+from core.vector_store import VectorStore
+
+
+class FakeEmbeddingService:
+    """记录已嵌入但尚未写入的批次数"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def embed_batch_array(self, texts):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return np.array([[len(text), i % 7, 1.0] for i, text in enumerate(texts)], dtype=np.float32)
+
+
+class SlowStore(NumpyVectorStore):
+    """写入较慢的存储，用于触发背压"""
+
+    def __init__(self, service):
+        super().__init__("slow")
+        self.service = service
+
+    def add_documents(self, documents, embeddings, metadata=None, ids=None):
+        time.sleep(0.002)
+        super().add_documents(documents, embeddings, metadata, ids=ids)
+        with self.service.lock:
+            self.service.in_flight -= 1
+
+
+def test_streaming_pipeline_is_bounded():
+    """测试生成器输入按批写入，已嵌入未写入的批次数受限，进度回调按批触发"""
+    service = FakeEmbeddingService()
+    store = SlowStore(service)
+    progress = []
+    pipeline = IngestionPipeline(service, store, batch_size=50, max_pending_batches=2,
+                                 progress_callback=progress.append)
+
+    chunks = (f"文本块{i}" for i in range(2000))
+    stats = pipeline.run(chunks, source="stream")
+
+    assert stats == {"chunks": 2000, "total": 2000, "added": 2000, "skipped": 0, "removed": 0}
+    assert store.count() == 2000
+    assert len(progress) == 40
+    assert [item["added"] for item in progress] == list(range(50, 2001, 50))
+    assert service.max_in_flight <= 2 + 2
+
+
+class PoolEmbeddingService:
+    """模拟启用多进程编码的嵌入服务，记录每次编码的文本数"""
+
+    num_workers = 4
+    pool_min_texts = 512
+
+    def __init__(self):
+        self.sizes = []
+
+    def embed_batch_array(self, texts):
+        self.sizes.append(len(texts))
+        return np.ones((len(texts), 2), dtype=np.float32)
+
+
+def test_batches_reach_pool_threshold():
+    """测试启用多进程编码时批次不小于 pool_min_texts，且未指定来源时不记录全部ID"""
+    service = PoolEmbeddingService()
+    pipeline = IngestionPipeline(service, NumpyVectorStore("pool"), batch_size=256)
+    assert pipeline.batch_size == 512
+
+    stats = pipeline.run(f"文本块{i}" for i in range(1200))
+    assert service.sizes == [512, 512, 176]
+    assert all(size >= service.pool_min_texts for size in service.sizes[:-1])
+    assert stats["added"] == 1200
+
+    # 跨批重复的块由存储按ID覆盖，不会产生重复文档
+    pipeline.run(["重复"] * 600)
+    assert pipeline.vector_store.count() == 1201
+
+
+def test_iter_chunks_streams_large_file():
+    """测试逐块读取与整体分割结果一致"""
+    with tempfile.NamedTemporaryFile('w', suffix=".md", delete=False, encoding='utf-8') as file:
+        for i in range(1000):
+            file.write(f"第{i}段\n第二行\n\n\n")
+    try:
+        processor = DocumentProcessor()
+        chunks = processor.iter_chunks(file.name)
+        assert next(chunks) == "第0段\n第二行"
+        assert processor.split_into_chunks(file.name) == [f"第{i}段\n第二行" for i in range(1000)]
+    finally:
+        os.remove(file.name)
+
+
+def test_chroma_add_splits_by_max_batch_size():
+    """测试超过chroma单次写入上限时自动分批"""
+    store = VectorStore("ingestion_batches")
+    store.clear()
+    count = store.max_batch_size + 10
+    vectors = np.random.default_rng(0).standard_normal((count, 4)).astype(np.float32)
+    store.add_documents([f"doc{i}" for i in range(count)], vectors)
+    assert store.count() == count
+
+
+if __name__ == "__main__":
+    test_streaming_pipeline_is_bounded()
+    test_batches_reach_pool_threshold()
+    test_iter_chunks_streams_large_file()
+    test_chroma_add_splits_by_max_batch_size()
+    print("✓ 流式导入测试通过")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""测试分页遍历存储中的文档"""
+
+import os
+import sys
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.numpy_vector_store import NumpyVectorStore
+from core.sharded_vector_store import ShardedVectorStore
+from core.vector_store import VectorStore
+
+
+def _fill(store, n: int = 25) -> np.ndarray:
+    vectors = np.random.default_rng(0).standard_normal((n, 8)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    store.add_documents([f"doc{i}" for i in range(n)], vectors,
+                        [{"n": i} for i in range(n)], ids=[f"id{i}" for i in range(n)])
+    store.delete(["id3"])
+    return vectors
+
+
+def _check_pages(store, vectors: np.ndarray) -> None:
+    pages = list(store.iter_documents(page_size=10, include_embeddings=True))
+    assert all(len(page["ids"]) <= 10 for page in pages)
+
+    records = {doc_id: (document, meta, embedding)
+               for page in pages
+               for doc_id, document, meta, embedding in zip(page["ids"], page["documents"],
+                                                            page["metadatas"], page["embeddings"])}
+    assert len(records) == 24 and "id3" not in records
+    document, meta, embedding = records["id7"]
+    assert document == "doc7" and meta == {"n": 7}
+    assert np.allclose(embedding, vectors[7], atol=1e-5)
+
+    assert "embeddings" not in next(store.iter_documents(page_size=10))
+    assert sorted(store.get_documents()) == sorted(f"doc{i}" for i in range(25) if i != 3)
+
+
+def test_iter_documents_numpy():
+    """测试numpy后端的分页遍历跳过已删除的行"""
+    store = NumpyVectorStore("paged")
+    _check_pages(store, _fill(store))
+
+
+def test_iter_documents_chroma():
+    """测试chroma后端按 limit/offset 分页"""
+    store = VectorStore("paged_documents")
+    store.clear()
+    _check_pages(store, _fill(store))
+
+
+def test_iter_documents_sharded():
+    """测试分片存储依次遍历每个分片"""
+    store = ShardedVectorStore("numpy", "paged", num_shards=3)
+    _check_pages(store, _fill(store))
+    store.close()
+
+
+if __name__ == "__main__":
+    test_iter_documents_numpy()
+    test_iter_documents_chroma()
+    test_iter_documents_sharded()
+    print("✓ 分页遍历测试通过")
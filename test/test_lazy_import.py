@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""测试导入包和构造RAGSystem时不会加载重量级依赖"""
+
+import os
+import sys
+import time
+import threading
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["chromadb", "sentence_transformers", "torch", "google.genai", "requests"]
+
+CHECK_SNIPPET = """
+import sys
+sys.path.insert(0, {root!r})
+from core.rag_system import RAGSystem
+import core, services
+rag = RAGSystem()
+print(",".join(name for name in {modules!r} if name in sys.modules))
+"""
+
+
+def test_construct_without_heavy_imports():
+    """测试构造RAGSystem时未导入chromadb、sentence_transformers等模块"""
+    env = dict(os.environ, DEEPSEEK_API_KEY="")
+    output = subprocess.run(
+        [sys.executable, "-c", CHECK_SNIPPET.format(root=ROOT, modules=HEAVY_MODULES)],
+        check=True, capture_output=True, text=True, env=env
+    ).stdout.strip()
+    assert output == "", f"意外导入了: {output}"
+
+
+def test_lazy_properties_create_one_instance():
+    """测试多个线程首次同时访问向量存储和生成器时只创建一个实例"""
+    sys.path.insert(0, ROOT)
+    from core import rag_system
+    from core.rag_system import RAGSystem
+
+    created = {"stores": 0, "generators": 0}
+    original_store, original_generator = rag_system.create_vector_store, rag_system.DeepSeekGenerator
+
+    def slow_store(*args, **kwargs):
+        created["stores"] += 1
+        time.sleep(0.05)
+        return original_store(*args, **kwargs)
+
+    class SlowGenerator:
+        def __init__(self, *args, **kwargs):
+            created["generators"] += 1
+            time.sleep(0.05)
+
+    rag_system.create_vector_store, rag_system.DeepSeekGenerator = slow_store, SlowGenerator
+    try:
+        rag = RAGSystem(vector_backend="numpy", collection_name="lazy-threads")
+        barrier = threading.Barrier(8)
+        seen = []
+
+        def worker():
+            barrier.wait()
+            seen.append((rag.vector_store, rag.generator))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        rag_system.create_vector_store, rag_system.DeepSeekGenerator = original_store, original_generator
+
+    assert created == {"stores": 1, "generators": 1}
+    assert len({id(store) for store, _ in seen}) == 1
+    assert len({id(generator) for _, generator in seen}) == 1
+
+
+if __name__ == "__main__":
+    test_construct_without_heavy_imports()
+    test_lazy_properties_create_one_instance()
+    print("✓ 延迟导入测试通过")
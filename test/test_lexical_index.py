@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""测试BM25倒排索引与混合检索"""
+
+import os
+import sys
+import zlib
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+from core.rag_system import RAGSystem
+
+DOCUMENTS = [
+    "哆啦A梦的竹蜻蜓可以让人在天上飞。",
+    "任意门可以通往任何想去的地方。",
+    "记忆面包印上书本内容，吃下去就能记住。",
+    "大雄的考试总是零分，经常被妈妈批评。",
+]
+
+
+class FakeEmbeddingService:
+    """按文本哈希生成伪随机向量，向量检索结果与内容无关"""
+
+    def embed_batch_array(self, texts):
+        return np.stack([np.random.default_rng(zlib.crc32(text.encode())).standard_normal(8)
+                         for text in texts]).astype(np.float32)
+
+    def embed_text(self, text):
+        return self.embed_batch_array([text])[0].tolist()
+
+
+def test_tokenize():
+    """测试汉字二元组与英文单词切分"""
+    assert tokenize("哆啦A梦 Doraemon") == ["a", "doraemon", "哆啦", "梦"]
+    assert tokenize("竹蜻蜓") == ["竹蜻", "蜻蜓"]
+
+
+def test_bm25_ranking_and_updates():
+    """测试精确名称匹配排在最前，删除和覆盖后结果随之变化"""
+    index = BM25Index()
+    index.add([f"d{i}" for i in range(len(DOCUMENTS))], DOCUMENTS)
+
+    results = index.search("竹蜻蜓是什么", top_k=2)
+    assert results[0][0] == "d0" and results[0][1] == DOCUMENTS[0]
+    assert all(score > 0 for _, _, score in results)
+    assert index.search("完全无关的词语xyz", top_k=3) == []
+
+    index.remove(["d0"])
+    assert len(index) == 3
+    assert all(doc_id != "d0" for doc_id, _, _ in index.search("竹蜻蜓", top_k=3))
+
+    index.add(["d1"], ["竹蜻蜓的新说明"])
+    assert index.search("竹蜻蜓", top_k=1)[0][:2] == ("d1", "竹蜻蜓的新说明")
+    assert len(index) == 3
+
+
+def test_compact_purges_postings():
+    """测试删除比例超过阈值后倒排列表中不再保留已删除的文档，检索结果不变"""
+    ids = [f"d{i}" for i in range(len(DOCUMENTS))]
+    index = BM25Index(compact_threshold=0.4)
+    index.add(ids, DOCUMENTS)
+    index.remove(["d0"])
+    expected = index.search("竹蜻蜓 任意门 大雄", top_k=3)
+    assert len(index._ids) == 4
+
+    index.remove(["d2"])
+    assert len(index._ids) == 2 and len(index) == 2
+    assert all(row < 2 for rows, _ in index._postings.values() for row in rows)
+    assert "竹蜻" not in index._postings
+    assert [result[0] for result in index.search("竹蜻蜓 任意门 大雄", top_k=3)] == \
+        [doc_id for doc_id, _, _ in expected if doc_id != "d2"]
+
+    manual = BM25Index(compact_threshold=None)
+    manual.add(ids, DOCUMENTS)
+    manual.remove(ids[:3])
+    assert len(manual._ids) == 4
+    assert manual.compact() == 3 and manual.compact() == 0
+    assert manual.search("大雄", top_k=1)[0][0] == "d3"
+    manual.add(["d4"], ["大雄和哆啦A梦"])
+    assert {doc_id for doc_id, _, _ in manual.search("大雄", top_k=5)} == {"d3", "d4"}
+
+
+def test_reciprocal_rank_fusion():
+    """测试两路排名都靠前的文档融合后排名第一"""
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60)
+    assert fused[0][0] == "b"
+    assert abs(fused[0][1] - (1 / 62 + 1 / 61)) < 1e-12
+    assert [doc_id for doc_id, _ in fused] == ["b", "a", "d", "c"]
+
+
+def test_hybrid_retrieve_keeps_index_in_sync():
+    """测试混合检索能借助BM25找到精确名称，且导入和清空会同步到索引"""
+    rag = RAGSystem(vector_backend="numpy", collection_name="hybrid")
+    rag.embedding_service = FakeEmbeddingService()
+    rag.add_documents_from_texts(DOCUMENTS[:2])
+
+    # 首次使用时从向量存储重建，之后的导入增量同步
+    assert len(rag.lexical_index) == 2
+    rag.add_documents_from_texts(DOCUMENTS[2:])
+    assert len(rag.lexical_index) == 4
+
+    assert rag.retrieve("记忆面包", top_k=1, mode="lexical") == [DOCUMENTS[2]]
+    hybrid = rag.retrieve("记忆面包", top_k=2, mode="hybrid")
+    assert DOCUMENTS[2] in hybrid and len(hybrid) == 2
+    assert len(rag.retrieve("记忆面包", top_k=2)) == 2
+
+    try:
+        rag.retrieve("记忆面包", mode="unknown")
+        assert False, "未知检索方式应报错"
+    except ValueError:
+        pass
+
+    rag.clear_documents()
+    assert len(rag.lexical_index) == 0
+
+
+if __name__ == "__main__":
+    test_tokenize()
+    test_bm25_ranking_and_updates()
+    test_compact_purges_postings()
+    test_reciprocal_rank_fusion()
+    test_hybrid_retrieve_keeps_index_in_sync()
+    print("✓ BM25与混合检索测试通过")
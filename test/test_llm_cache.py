@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""测试LLM响应缓存的持久化、过期、LRU淘汰以及生成器的缓存命中"""
+
+import os
+import sys
+import json
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.generator import DeepSeekGenerator
+from services.llm_cache import LLMCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_make_key():
+    """测试缓存键区分服务商、模型、系统提示词、提示词和采样参数"""
+    base = LLMCache.make_key("deepseek", "deepseek-chat", "系统", "问题", {"temperature": 0.0})
+    assert base == LLMCache.make_key("deepseek", "deepseek-chat", "系统", "问题", {"temperature": 0.0})
+    assert base != LLMCache.make_key("gemini", "deepseek-chat", "系统", "问题", {"temperature": 0.0})
+    assert base != LLMCache.make_key("deepseek", "deepseek-reasoner", "系统", "问题", {"temperature": 0.0})
+    assert base != LLMCache.make_key("deepseek", "deepseek-chat", None, "问题", {"temperature": 0.0})
+    assert base != LLMCache.make_key("deepseek", "deepseek-chat", "系统", "问题 ", {"temperature": 0.0})
+    assert base != LLMCache.make_key("deepseek", "deepseek-chat", "系统", "问题", {"temperature": 0.7})
+
+
+def test_ttl_lru_and_persistence():
+    """测试过期、容量上限和跨实例读取"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        clock = FakeClock()
+        cache = LLMCache(cache_dir, max_entries=2, ttl_seconds=60, clock=clock)
+        cache.put("a", "回答a")
+        cache.put("b", "回答b")
+        assert cache.get("a") == "回答a"
+        cache.put("c", "回答c")
+        assert cache.get("b") is None
+        assert len(cache) == 2
+
+        clock.now += 61
+        assert cache.get("a") is None
+        cache.put("d", "回答d")
+        assert cache.purge_expired() == 1
+        cache.close()
+
+        reopened = LLMCache(cache_dir, ttl_seconds=60, clock=clock)
+        assert reopened.get("d") == "回答d"
+        assert reopened.get_stats()["hits"] == 1
+        reopened.close()
+
+
+class CountingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.count += 1
+        content = body["messages"][-1]["content"]
+        if body.get("stream"):
+            event = {"choices": [{"delta": {"content": f"流式:{content}"}}]}
+            payload = f"data: {json.dumps(event)}\n\ndata: [DONE]\n\n".encode("utf-8")
+        else:
+            payload = json.dumps({"choices": [{"message": {"content": f"回答:{content}"}}]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_generator_cache_survives_restart():
+    """测试相同提示词在重新创建生成器和缓存后不再发出请求"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+    server.count = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_url = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = LLMCache(cache_dir)
+            generator = DeepSeekGenerator(api_key="test", api_url=api_url, response_cache=cache)
+            assert generator.generate_with_custom_prompt("问题") == "回答:问题"
+            assert generator.generate_with_custom_prompt("问题") == "回答:问题"
+            assert list(generator.generate_stream("另一个问题")) == ["流式:另一个问题"]
+            assert list(generator.generate_stream("另一个问题")) == ["流式:另一个问题"]
+            assert server.count == 2
+            generator.close()
+            cache.close()
+
+            cache = LLMCache(cache_dir)
+            generator = DeepSeekGenerator(api_key="test", api_url=api_url, response_cache=cache)
+            assert generator.generate_answer("问题", ["片段"]) == generator.generate_answer("问题", ["片段"])
+            assert generator.generate_with_custom_prompt("问题") == "回答:问题"
+            assert server.count == 3
+            assert cache.get_stats()["hits"] == 2
+            generator.close()
+            cache.close()
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_make_key()
+    test_ttl_lru_and_persistence()
+    test_generator_cache_survives_restart()
+    print("✓ LLM响应缓存测试通过")
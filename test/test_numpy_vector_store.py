@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""测试NumPy向量存储的检索结果和mmap持久化"""
+
+import os
+import sys
+import json
+import tempfile
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.numpy_vector_store import NumpyVectorStore, recall_at_k
+
+
+def _random_vectors(n: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+def test_search_matches_brute_force():
+    """测试top-k结果与暴力计算一致，距离为平方L2距离"""
+    vectors = _random_vectors(200)
+    store = NumpyVectorStore("test", initial_capacity=16)
+    store.add_documents([f"doc{i}" for i in range(100)], vectors[:100])
+    store.add_documents([f"doc{i}" for i in range(100, 200)], vectors[100:])
+
+    query = vectors[7] + 0.01
+    results = store.search(query.tolist(), top_k=5)
+
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(unit @ (query / np.linalg.norm(query))))[:5]
+    assert results["documents"][0] == [f"doc{i}" for i in expected]
+    assert results["documents"][0][0] == "doc7"
+    assert abs(results["distances"][0][0] - np.sum((unit[7] - query / np.linalg.norm(query)) ** 2)) < 1e-4
+    assert store.count() == 200
+
+
+def test_search_batch_matches_single_search():
+    """测试批量检索与逐条检索结果一致"""
+    vectors = _random_vectors(50)
+    store = NumpyVectorStore("test")
+    store.add_documents([f"doc{i}" for i in range(50)], vectors)
+
+    queries = _random_vectors(4, seed=1)
+    batch = store.search_batch(queries, top_k=3)
+    assert len(batch["ids"]) == 4
+    for i, query in enumerate(queries):
+        single = store.search(query.tolist(), top_k=3)
+        assert batch["ids"][i] == single["ids"][0]
+        assert np.allclose(batch["distances"][i], single["distances"][0])
+
+
+def test_persistence_and_recovery():
+    """测试重新打开后数据仍在，且清单之后的残缺记录会被丢弃"""
+    vectors = _random_vectors(10)
+    with tempfile.TemporaryDirectory() as directory:
+        store = NumpyVectorStore("persisted", directory)
+        store.add_documents([f"doc{i}" for i in range(10)], vectors, [{"n": i} for i in range(10)])
+
+        # 模拟写入记录后、更新清单前崩溃
+        with open(os.path.join(directory, "persisted", NumpyVectorStore.RECORDS_FILE), 'a',
+                  encoding='utf-8') as file:
+            file.write(json.dumps({"id": "x", "document": "残缺", "metadata": None}) + "\n")
+
+        reopened = NumpyVectorStore("persisted", directory)
+        assert reopened.count() == 10
+        assert isinstance(reopened._vectors, np.memmap)
+        results = reopened.search(vectors[3].tolist(), top_k=1)
+        assert results["documents"][0] == ["doc3"]
+        assert results["metadatas"][0] == [{"n": 3}]
+
+        reopened.add_documents(["doc10"], vectors[:1])
+        assert NumpyVectorStore("persisted", directory).get_documents()[-1] == "doc10"
+
+        reopened.clear()
+        assert NumpyVectorStore("persisted", directory).count() == 0
+
+
+def test_int8_quantization_recall_and_persistence():
+    """测试int8量化加重打分后与精确检索一致，且编码和量化器在重新打开后保留"""
+    vectors = _random_vectors(300, dim=32)
+    queries = _random_vectors(10, dim=32, seed=1)
+    documents = [f"doc{i}" for i in range(300)]
+
+    exact = NumpyVectorStore("exact")
+    exact.add_documents(documents, vectors)
+    reference = exact.search_batch(queries, top_k=5)["ids"]
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = NumpyVectorStore("quantized", directory, quantization="int8", min_train_size=100)
+        store.add_documents(documents[:200], vectors[:200])
+        store.add_documents(documents[200:], vectors[200:])
+        results = store.search_batch(queries, top_k=5)
+        assert store.quantizer.is_trained
+        assert recall_at_k(results["ids"], reference, 5) == 1.0
+
+        usage = store.get_memory_usage()
+        assert usage["quantized_bytes"] < usage["float32_bytes"]
+        assert not usage["float32_resident"]
+        assert usage["resident_bytes"] == usage["quantized_bytes"]
+        assert usage["compression_ratio"] > 1.0
+
+        # 内存存储时float32矩阵与编码同时常驻内存，压缩比不会大于1
+        in_memory = NumpyVectorStore("in_memory", quantization="int8", min_train_size=100)
+        in_memory.add_documents(documents, vectors)
+        in_memory.train_quantizer()
+        usage = in_memory.get_memory_usage()
+        assert usage["float32_resident"]
+        assert usage["resident_bytes"] == usage["quantized_bytes"] + usage["float32_bytes"]
+        assert usage["compression_ratio"] < 1.0
+
+        reopened = NumpyVectorStore("quantized", directory, quantization="int8", min_train_size=100)
+        assert reopened.quantizer.is_trained
+        assert np.array_equal(reopened._codes[:300], store._codes[:300])
+        assert reopened.search_batch(queries, top_k=5)["ids"] == results["ids"]
+
+
+def test_pq_quantization_recall():
+    """测试乘积量化在重打分后召回率接近精确检索"""
+    vectors = _random_vectors(500, dim=32)
+    queries = _random_vectors(20, dim=32, seed=1)
+    documents = [f"doc{i}" for i in range(500)]
+
+    exact = NumpyVectorStore("exact")
+    exact.add_documents(documents, vectors)
+    reference = exact.search_batch(queries, top_k=5)["ids"]
+
+    store = NumpyVectorStore("pq", quantization="pq", pq_subspaces=8, rescore_factor=8)
+    store.add_documents(documents, vectors)
+    store.train_quantizer()
+    assert store._codes.dtype == np.uint8 and store._codes.shape[1] == 8
+    assert recall_at_k(store.search_batch(queries, top_k=5)["ids"], reference, 5) >= 0.9
+
+
+def test_upsert_and_delete_persist():
+    """测试覆盖和删除只影响对应ID，重新打开后仍然有效"""
+    vectors = _random_vectors(4)
+    with tempfile.TemporaryDirectory() as directory:
+        store = NumpyVectorStore("upsert", directory)
+        store.add_documents(["a", "b", "c"], vectors[:3], ids=["1", "2", "3"])
+        store.add_documents(["b2"], vectors[3:], ids=["2"])
+        store.delete(["3", "missing"])
+        assert store.count() == 2
+        assert store.get_existing_ids(["1", "2", "3"]) == {"1", "2"}
+
+        reopened = NumpyVectorStore("upsert", directory)
+        assert reopened.count() == 2
+        assert reopened.get_documents() == ["a", "b2"]
+        results = reopened.search_batch(vectors, top_k=5)
+        assert all(sorted(ids) == ["1", "2"] for ids in results["ids"])
+        assert reopened.search(vectors[3].tolist(), top_k=1)["documents"][0] == ["b2"]
+
+
+def test_compact():
+    """测试压缩回收已删除和被覆盖的行，检索结果不变，重新打开后仍然有效"""
+    vectors = _random_vectors(60)
+    queries = _random_vectors(5, seed=1)
+    documents = [f"doc{i}" for i in range(50)]
+    with tempfile.TemporaryDirectory() as directory:
+        for store in (NumpyVectorStore("compact", quantization="int8", min_train_size=10),
+                      NumpyVectorStore("compact", directory, quantization="int8", min_train_size=10)):
+            store.add_documents(documents, vectors[:50], ids=documents)
+            store.add_documents(["新doc1", "新doc2"], vectors[50:52], ids=["doc1", "doc2"])
+            store.delete([f"doc{i}" for i in range(10, 30)])
+            store.train_quantizer()
+            expected = store.search_batch(queries, top_k=5)
+
+            assert store.compact() == 22
+            assert store.compact() == 0
+            assert store._size == store.count() == 30
+            assert store.search_batch(queries, top_k=5) == expected
+            assert store.get_existing_ids(["doc1", "doc10"]) == {"doc1"}
+
+            store.add_documents(["追加"], vectors[52:53], ids=["extra"])
+            assert store.search(vectors[52].tolist(), top_k=1)["ids"][0] == ["extra"]
+
+        reopened = NumpyVectorStore("compact", directory, quantization="int8", min_train_size=10)
+        assert reopened.count() == 31 and reopened._num_deleted == 0
+        assert reopened.search_batch(queries, top_k=5)["ids"] == store.search_batch(queries, top_k=5)["ids"]
+        # 压缩写出第1代数据文件，旧一代文件已删除
+        assert sorted(os.listdir(os.path.join(directory, "compact"))) == [
+            "codes.1.bin", "manifest.json", "quantizer.npz", "records.1.jsonl", "vectors.1.f32"]
+
+
+def test_compact_interrupted_before_manifest():
+    """测试压缩在新数据文件写完、清单写入前中断时，重新打开仍是压缩前的内容，之后可以再次压缩"""
+    vectors = _random_vectors(40)
+    queries = _random_vectors(5, seed=1)
+    documents = [f"doc{i}" for i in range(40)]
+    with tempfile.TemporaryDirectory() as directory:
+        store = NumpyVectorStore("crash", directory)
+        store.add_documents(documents, vectors, ids=documents)
+        store.delete([f"doc{i}" for i in range(10)])
+        expected = store.search_batch(queries, top_k=5)
+
+        def crash():
+            raise OSError("模拟写清单前进程崩溃")
+
+        store._write_manifest = crash
+        try:
+            store.compact()
+            assert False, "应当抛出模拟的崩溃"
+        except OSError:
+            pass
+
+        reopened = NumpyVectorStore("crash", directory)
+        assert reopened.count() == 30 and reopened._num_deleted == 10
+        assert reopened.search_batch(queries, top_k=5) == expected
+
+        assert reopened.compact() == 10
+        reopened = NumpyVectorStore("crash", directory)
+        assert reopened.count() == 30 and reopened._num_deleted == 0
+        assert reopened.search_batch(queries, top_k=5)["ids"] == expected["ids"]
+
+
+def test_recall_at_k():
+    """测试召回率计算"""
+    assert recall_at_k([["a", "b"]], [["a", "c"]], 2) == 0.5
+    assert recall_at_k([["a", "b"], ["c"]], [["b", "a"], ["c"]], 2) == 1.0
+
+
+if __name__ == "__main__":
+    test_search_matches_brute_force()
+    test_search_batch_matches_single_search()
+    test_persistence_and_recovery()
+    test_int8_quantization_recall_and_persistence()
+    test_pq_quantization_recall()
+    test_upsert_and_delete_persist()
+    test_compact()
+    test_compact_interrupted_before_manifest()
+    test_recall_at_k()
+    print("✓ NumPy向量存储测试通过")
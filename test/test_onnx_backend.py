@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""测试ONNX后端的量化文件查找、模型参数构造与一致性校验"""
+
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+import numpy as np
+import huggingface_hub
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.embedding_service import EmbeddingService
+from services.reranker import Reranker
+from services.onnx_backend import (build_model_options, check_embedding_parity, check_reranker_parity,
+                                   find_hub_quantized_onnx_file, find_quantized_onnx_file)
+
+
+def _touch(directory, *names):
+    for name in names:
+        path = os.path.join(directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'wb').close()
+
+
+def test_find_quantized_onnx_file():
+    """测试在本地目录中按量化配置选择文件"""
+    with tempfile.TemporaryDirectory() as directory:
+        assert find_quantized_onnx_file(directory) is None
+        _touch(directory, "onnx/model.onnx", "onnx/model_qint8_avx2.onnx", "onnx/model_quint8_avx512.onnx")
+        assert find_quantized_onnx_file(directory) == "onnx/model_qint8_avx2.onnx"
+        assert find_quantized_onnx_file(directory, "avx512") == "onnx/model_quint8_avx512.onnx"
+        assert find_quantized_onnx_file(directory, "arm64") is None
+
+
+def test_build_model_options():
+    """测试本地目录与Hub模型ID都会选中量化文件，显式指定的文件名优先"""
+    assert build_model_options("any/model") == {"backend": "torch"}
+    assert build_model_options("any/model", local_files_only=True)["local_files_only"]
+    try:
+        build_model_options("any/model", backend="tensorrt")
+        assert False, "应当拒绝不支持的后端"
+    except ValueError:
+        pass
+
+    with tempfile.TemporaryDirectory() as directory:
+        _touch(directory, "onnx/model_qint8_avx512_vnni.onnx")
+        options = build_model_options(directory, backend="onnx")
+        assert options["model_kwargs"] == {"provider": "CPUExecutionProvider",
+                                           "file_name": "onnx/model_qint8_avx512_vnni.onnx"}
+        options = build_model_options(directory, backend="onnx", onnx_file_name="onnx/model.onnx")
+        assert options["model_kwargs"]["file_name"] == "onnx/model.onnx"
+
+        # Hub模型ID：联网时列出仓库文件，离线时在本地缓存快照中查找
+        original = huggingface_hub.list_repo_files, huggingface_hub.snapshot_download
+        huggingface_hub.list_repo_files = lambda repo_id: ["config.json", "onnx/model.onnx",
+                                                           "onnx/model_qint8_arm64.onnx"]
+        huggingface_hub.snapshot_download = lambda repo_id, local_files_only: directory
+        try:
+            options = build_model_options("org/model", backend="onnx")
+            assert options["model_kwargs"]["file_name"] == "onnx/model_qint8_arm64.onnx"
+            options = build_model_options("org/model", backend="onnx", local_files_only=True)
+            assert options["model_kwargs"]["file_name"] == "onnx/model_qint8_avx512_vnni.onnx"
+            assert find_hub_quantized_onnx_file("org/model", "avx2") is None
+        finally:
+            huggingface_hub.list_repo_files, huggingface_hub.snapshot_download = original
+
+
+def test_construction_skips_hub_lookup():
+    """测试构造嵌入服务和重排序器时不查找Hub仓库，离线也能创建"""
+    def offline(*args, **kwargs):
+        raise OSError("离线")
+
+    original = huggingface_hub.list_repo_files, huggingface_hub.snapshot_download
+    huggingface_hub.list_repo_files = huggingface_hub.snapshot_download = offline
+    try:
+        embedder = EmbeddingService("org/model", backend="onnx")
+        reranker = Reranker("org/model", backend="onnx")
+    finally:
+        huggingface_hub.list_repo_files, huggingface_hub.snapshot_download = original
+    assert embedder._model is None and embedder._model_options is None
+    assert reranker._cross_encoder is None
+
+
+class FixedEmbeddingService:
+    def __init__(self, vectors):
+        self.vectors = np.asarray(vectors, dtype=np.float32)
+
+    def embed_batch_array(self, texts):
+        return self.vectors[:len(texts)]
+
+
+def test_parity_helpers():
+    """测试嵌入余弦一致性与重排序打分一致性指标"""
+    reference = FixedEmbeddingService([[1.0, 0.0], [0.0, 2.0]])
+    candidate = FixedEmbeddingService([[2.0, 0.0], [1.0, 1.0]])
+    parity = check_embedding_parity(reference, candidate, ["a", "b"])
+    assert parity["texts"] == 2
+    assert abs(parity["min_cosine"] - np.sqrt(0.5)) < 1e-6
+    assert abs(parity["mean_cosine"] - (1 + np.sqrt(0.5)) / 2) < 1e-6
+
+    def reranker(scores):
+        return SimpleNamespace(cross_encoder=SimpleNamespace(predict=lambda pairs: scores[:len(pairs)]))
+
+    parity = check_reranker_parity(reranker([3.0, 2.0, 1.0]), reranker([2.5, 2.0, 1.5]), "q", ["a", "b", "c"])
+    assert parity["top1_agreement"] and parity["rank_correlation"] == 1.0
+    assert abs(parity["max_abs_diff"] - 0.5) < 1e-6
+
+    parity = check_reranker_parity(reranker([3.0, 2.0, 1.0]), reranker([1.0, 2.0, 3.0]), "q", ["a", "b", "c"])
+    assert not parity["top1_agreement"] and parity["rank_correlation"] == -1.0
+
+
+if __name__ == "__main__":
+    test_find_quantized_onnx_file()
+    test_build_model_options()
+    test_construction_skips_hub_lookup()
+    test_parity_helpers()
+    print("✓ ONNX后端测试通过")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""测试查询嵌入微批处理器"""
+
+import os
+import sys
+import time
+import queue
+import asyncio
+import threading
+from concurrent.futures import Future
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.query_batcher import _STOP, QueryBatcher
+
+
+class FakeEmbeddingService:
+    """记录每次批量调用大小的假嵌入服务，向量第一维为文本长度"""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def embed_batch_array(self, texts):
+        self.batch_sizes.append(len(texts))
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+def test_concurrent_queries_are_batched():
+    """测试并发查询被合并，且每个查询拿到自己的向量"""
+    service = FakeEmbeddingService()
+    batcher = QueryBatcher(service, max_batch_size=16, max_wait_ms=50)
+    results = {}
+
+    def worker(i):
+        results[i] = batcher.embed("问" * i)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(1, 33)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.close()
+
+    assert all(results[i][0] == i for i in range(1, 33))
+    assert sum(service.batch_sizes) == 32
+    assert max(service.batch_sizes) <= 16
+    assert len(service.batch_sizes) < 32
+
+
+def test_async_embed():
+    """测试asyncio接口"""
+    service = FakeEmbeddingService()
+    batcher = QueryBatcher(service, max_wait_ms=20)
+
+    async def run():
+        return await asyncio.gather(*(batcher.aembed("问" * i) for i in range(1, 9)))
+
+    vectors = asyncio.run(run())
+    batcher.close()
+
+    assert [vector[0] for vector in vectors] == list(range(1, 9))
+    assert len(service.batch_sizes) < 8
+
+
+class SlowPutQueue(queue.Queue):
+    """普通查询入队前最多等待0.2秒、直到停止标记入队，用于制造提交与关闭交错的时序"""
+
+    def __init__(self):
+        super().__init__()
+        self.stop_queued = threading.Event()
+
+    def put(self, item, *args, **kwargs):
+        if item is _STOP:
+            super().put(item, *args, **kwargs)
+            self.stop_queued.set()
+        else:
+            self.stop_queued.wait(0.2)
+            super().put(item, *args, **kwargs)
+
+
+def test_submit_during_close():
+    """测试与 close() 交错的提交不会排在停止标记之后，返回的Future一定会完成"""
+    batcher = QueryBatcher(FakeEmbeddingService(), max_batch_size=4, max_wait_ms=1)
+    # 换用慢速队列，并用一个查询唤醒正在等待旧队列的后台线程
+    old_queue, batcher._queue = batcher._queue, SlowPutQueue()
+    wake = Future()
+    old_queue.put(("唤醒", wake))
+    wake.result(timeout=5)
+
+    futures = []
+    submitter = threading.Thread(target=lambda: futures.append(batcher.submit("问题")))
+    submitter.start()
+    time.sleep(0.05)
+    batcher.close()
+    submitter.join()
+
+    assert futures[0].result(timeout=5)[0] == 2
+    try:
+        batcher.submit("关闭之后")
+        assert False, "关闭后应拒绝提交"
+    except RuntimeError:
+        pass
+
+
+if __name__ == "__main__":
+    test_concurrent_queries_are_batched()
+    test_async_embed()
+    test_submit_during_close()
+    print("✓ 微批处理测试通过")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""测试多查询批量重排序与 retrieve_batch 的重排序选项"""
+
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from core.rag_system import RAGSystem
+from services.reranker import Reranker
+
+
+class CountingCrossEncoder:
+    """以文档长度为分数，并记录实际推理的查询-文档对"""
+
+    def __init__(self):
+        self.pairs = []
+        self.calls = 0
+
+    def predict(self, pairs, batch_size=32):
+        self.calls += 1
+        self.pairs.extend(pairs)
+        return [float(len(doc)) for _, doc in pairs]
+
+
+def make_reranker(score_cache_size=10000):
+    reranker = Reranker("fake-model", score_cache_size=score_cache_size)
+    reranker._cross_encoder = CountingCrossEncoder()
+    return reranker
+
+
+def test_rerank_batch_matches_rerank():
+    """测试批量重排序与逐个重排序结果一致，且只调用一次推理"""
+    queries = ["q1", "q2", "q3"]
+    candidate_lists = [["aa", "b", "cccc", "ddd"], [], ["x", "yy", "x"]]
+    expected = [make_reranker().rerank_with_scores(q, docs, 2) for q, docs in zip(queries, candidate_lists)]
+
+    reranker = make_reranker()
+    results = reranker.rerank_batch(queries, candidate_lists, top_k=2)
+    assert results == expected
+    assert reranker._cross_encoder.calls == 1
+    # 同一查询中重复的文档只推理一次
+    assert len(reranker._cross_encoder.pairs) == 6
+
+    indices = reranker.rerank_batch(queries, candidate_lists, top_k=10, return_indices=True)
+    assert [i for i, _ in indices[0]] == [2, 3, 0, 1]
+    assert reranker._cross_encoder.calls == 1
+
+
+def test_retrieve_batch_with_rerank():
+    """测试 retrieve_batch 的 rerank_k 选项"""
+    class FakeEmbeddingService:
+        def embed_batch_array(self, texts):
+            return np.array([[1.0, float(len(text))] for text in texts], dtype=np.float32)
+
+    rag = RAGSystem(vector_backend="numpy", collection_name="rerank-batch")
+    rag.embedding_service = FakeEmbeddingService()
+    rag.reranker = make_reranker()
+    rag.add_documents_from_texts(["a", "bbb", "cc", "dddd"])
+
+    results = rag.retrieve_batch(["q", "qq"], top_k=4, rerank_k=2)
+    for item in results:
+        assert item["documents"] == ["dddd", "bbb"]
+        assert item["scores"] == [4.0, 3.0]
+        assert len(item["ids"]) == len(item["distances"]) == 2
+    assert rag.reranker._cross_encoder.calls == 1
+
+
+if __name__ == "__main__":
+    test_rerank_batch_matches_rerank()
+    test_retrieve_batch_with_rerank()
+    print("✓ 批量重排序测试通过")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""测试重排序分数缓存"""
+
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.reranker import Reranker
+
+
+class CountingCrossEncoder:
+    """以文档长度为分数，并记录实际推理的查询-文档对"""
+
+    def __init__(self):
+        self.pairs = []
+        self.calls = 0
+
+    def predict(self, pairs, batch_size=32):
+        self.calls += 1
+        self.pairs.extend(pairs)
+        return [float(len(doc)) for _, doc in pairs]
+
+
+def make_reranker(score_cache_size=10000):
+    reranker = Reranker("fake-model", score_cache_size=score_cache_size)
+    reranker._cross_encoder = CountingCrossEncoder()
+    return reranker
+
+
+def test_only_uncached_pairs_are_scored():
+    """测试重复查询只对新文档推理，且结果与不缓存一致"""
+    reranker = make_reranker()
+    documents = ["a", "bbb", "cc"]
+    assert reranker.rerank("问题", documents, top_k=2) == ["bbb", "cc"]
+    assert len(reranker._cross_encoder.pairs) == 3
+
+    results = reranker.rerank_with_scores("问题", documents + ["dddd", "dddd"], top_k=5)
+    assert [doc for doc, _ in results] == ["dddd", "dddd", "bbb", "cc", "a"]
+    assert [float(score) for _, score in results] == [4.0, 4.0, 3.0, 2.0, 1.0]
+    # 只有 "dddd" 被推理，且同一批中的重复文档只推理一次
+    assert reranker._cross_encoder.pairs[3:] == [("问题", "dddd")]
+
+    reranker.rerank("另一个问题", ["a"], top_k=1)
+    assert len(reranker._cross_encoder.pairs) == 5
+    stats = reranker.get_cache_stats()
+    assert stats["hits"] == 3 and stats["misses"] == 6
+
+
+def test_lru_eviction_and_disabled_cache():
+    """测试缓存容量上限与关闭缓存"""
+    reranker = make_reranker(score_cache_size=2)
+    reranker.rerank("q", ["a", "bb", "ccc"], top_k=3)
+    assert reranker.get_cache_stats()["entries"] == 2
+    reranker.rerank("q", ["a"], top_k=1)
+    assert len(reranker._cross_encoder.pairs) == 4
+
+    reranker = make_reranker(score_cache_size=0)
+    reranker.rerank("q", ["a", "bb"], top_k=2)
+    reranker.rerank("q", ["a", "bb"], top_k=2)
+    assert len(reranker._cross_encoder.pairs) == 4
+    assert reranker.get_cache_stats()["entries"] == 0
+
+
+if __name__ == "__main__":
+    test_only_uncached_pairs_are_scored()
+    test_lru_eviction_and_disabled_cache()
+    print("✓ 重排序分数缓存测试通过")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""测试语义查询缓存"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.numpy_vector_store import NumpyVectorStore
+from core.rag_system import RAGSystem
+from core.semantic_cache import SemanticCache
+from core.vector_store import VectorStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeEmbeddingService:
+    """“竹蜻蜓”相关的问法映射到相近的向量"""
+
+    def embed_batch_array(self, texts):
+        return np.stack([self._vector(text) for text in texts])
+
+    def embed_text(self, text):
+        return self._vector(text).tolist()
+
+    @staticmethod
+    def _vector(text):
+        if "竹蜻蜓" in text:
+            return np.array([1.0, 0.01 * len(text), 0.0], dtype=np.float32)
+        return np.array([0.0, 1.0, 0.1 * len(text)], dtype=np.float32)
+
+
+class CountingReranker:
+    def __init__(self):
+        self.calls = 0
+
+    def rerank(self, query, documents, top_k=3):
+        self.calls += 1
+        return documents[:top_k]
+
+
+class EchoGenerator:
+    def generate_answer(self, query, chunks, show_prompt=False):
+        return f"{query}|{'/'.join(chunks)}"
+
+
+def test_threshold_namespace_and_lru():
+    """测试相似度阈值、参数空间隔离与LRU淘汰"""
+    cache = SemanticCache(threshold=0.9, max_entries=2, ttl_seconds=None)
+    cache.put([1.0, 0.0], "a", namespace="k5")
+    assert cache.get([0.99, 0.05], namespace="k5") == "a"
+    assert cache.get([0.99, 0.05], namespace="k3") is None
+    assert cache.get([0.0, 1.0], namespace="k5") is None
+
+    cache.put([0.0, 1.0], "b", namespace="k5")
+    cache.get([1.0, 0.0], namespace="k5")
+    cache.put([0.7, 0.7], "c", namespace="k5")
+    # "b" 最久未使用，被淘汰
+    assert cache.get([0.0, 1.0], namespace="k5") is None
+    assert cache.get([1.0, 0.0], namespace="k5") == "a"
+    assert len(cache) == 2
+    assert cache.get_stats()["hits"] == 3
+
+
+def test_ttl_and_version_invalidation():
+    """测试过期与语料版本变化导致失效"""
+    clock = FakeClock()
+    cache = SemanticCache(threshold=0.9, ttl_seconds=10, clock=clock)
+    cache.sync_version(1)
+    cache.put([1.0, 0.0], "a")
+    clock.now = 5
+    assert cache.get([1.0, 0.0]) == "a"
+    clock.now = 11
+    assert cache.get([1.0, 0.0]) is None
+
+    cache.put([1.0, 0.0], "a")
+    cache.sync_version(1)
+    assert cache.get([1.0, 0.0]) == "a"
+    cache.sync_version(2)
+    assert cache.get([1.0, 0.0]) is None
+
+
+def test_store_versions_change_and_persist():
+    """测试向量存储的版本号在写入、删除、清空后递增并随持久化保留"""
+    vectors = np.eye(3, dtype=np.float32)
+    with tempfile.TemporaryDirectory() as directory:
+        for make_store in (lambda: NumpyVectorStore("versions", directory),
+                           lambda: VectorStore("versions", directory)):
+            store = make_store()
+            start = store.get_version()
+            store.add_documents(["a", "b"], vectors[:2], ids=["1", "2"])
+            store.delete(["1"])
+            assert store.get_version() == start + 2
+            assert make_store().get_version() == start + 2
+            store.clear()
+            assert store.get_version() == start + 3
+            assert make_store().get_version() == start + 3
+
+
+def test_rag_query_reuses_reranked_chunks():
+    """测试相近问法复用检索和重排序结果，导入新文档后缓存失效"""
+    rag = RAGSystem(vector_backend="numpy", collection_name="semantic", semantic_cache_threshold=0.95)
+    rag.embedding_service = FakeEmbeddingService()
+    rag.reranker = CountingReranker()
+    rag._generator = EchoGenerator()
+    rag.add_documents_from_texts(["竹蜻蜓可以飞", "任意门可以去任何地方"])
+
+    first = rag.query("竹蜻蜓是什么", retrieve_k=2, rerank_k=1)
+    second = rag.query("竹蜻蜓是什么东西", retrieve_k=2, rerank_k=1)
+    assert rag.reranker.calls == 1
+    assert first.split("|")[1] == second.split("|")[1] == "竹蜻蜓可以飞"
+
+    rag.query("竹蜻蜓是什么", retrieve_k=2, rerank_k=2)
+    assert rag.reranker.calls == 2
+
+    assert rag.retrieve("竹蜻蜓是什么", top_k=1) == rag.retrieve("竹蜻蜓是什么呢", top_k=1)
+    assert rag.semantic_cache.get_stats()["hits"] == 2
+
+    rag.add_documents_from_texts(["竹蜻蜓戴在头上"])
+    rag.query("竹蜻蜓是什么", retrieve_k=2, rerank_k=1)
+    assert rag.reranker.calls == 3
+
+
+if __name__ == "__main__":
+    test_threshold_namespace_and_lru()
+    test_ttl_and_version_invalidation()
+    test_store_versions_change_and_persist()
+    test_rag_query_reuses_reranked_chunks()
+    print("✓ 语义缓存测试通过")
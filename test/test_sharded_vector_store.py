@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""测试分片向量存储的路由、并行检索与合并"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.numpy_vector_store import NumpyVectorStore
+from core.sharded_vector_store import ShardedVectorStore
+
+
+def _random_vectors(n: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+def test_sharded_search_matches_single_store():
+    """测试合并后的top-k与不分片的精确检索一致"""
+    vectors = _random_vectors(300)
+    documents = [f"doc{i}" for i in range(300)]
+    single = NumpyVectorStore("single")
+    single.add_documents(documents, vectors)
+    sharded = ShardedVectorStore("numpy", "sharded", num_shards=4)
+    sharded.add_documents(documents, vectors)
+
+    assert sharded.count() == 300
+    assert all(count > 0 for count in sharded.get_shard_counts())
+
+    queries = _random_vectors(5, seed=1)
+    expected = single.search_batch(queries, top_k=7)
+    merged = sharded.search_batch(queries, top_k=7)
+    assert merged["ids"] == expected["ids"]
+    assert np.allclose(merged["distances"], expected["distances"], atol=1e-5)
+    assert sharded.search(queries[0].tolist(), top_k=7)["documents"][0] == expected["documents"][0]
+    sharded.close()
+
+
+def test_sharded_chroma_persistence_and_layout_check():
+    """测试chroma分片的持久化、增量接口以及分片数量校验"""
+    vectors = _random_vectors(40)
+    documents = [f"doc{i}" for i in range(40)]
+    with tempfile.TemporaryDirectory() as directory:
+        store = ShardedVectorStore("chroma", "sharded", directory, num_shards=3)
+        store.add_documents(documents, vectors, [{"source": "a.md"} for _ in documents])
+        ids = store.search(vectors[5].tolist(), top_k=3)["ids"][0]
+        assert store.search(vectors[5].tolist(), top_k=3)["documents"][0][0] == "doc5"
+        assert store.get_existing_ids(ids + ["missing"]) == set(ids)
+        assert len(store.get_ids_by_source("a.md")) == 40
+
+        store.delete(ids[:1])
+        store.close()
+
+        reopened = ShardedVectorStore("chroma", "sharded", directory, num_shards=3)
+        assert reopened.count() == 39
+        assert reopened.search(vectors[5].tolist(), top_k=1)["documents"][0] != ["doc5"]
+
+        try:
+            ShardedVectorStore("chroma", "sharded", directory, num_shards=2)
+            assert False, "分片数量不一致时应报错"
+        except ValueError:
+            pass
+
+
+if __name__ == "__main__":
+    test_sharded_search_matches_single_store()
+    test_sharded_chroma_persistence_and_layout_check()
+    print("✓ 分片向量存储测试通过")
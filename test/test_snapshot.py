@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""测试集合快照的导出与导入"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.numpy_vector_store import NumpyVectorStore
+from core.snapshot import Snapshot
+from core.vector_store import VectorStore
+
+
+def _source_store() -> NumpyVectorStore:
+    vectors = np.random.default_rng(0).standard_normal((30, 8)).astype(np.float32)
+    store = NumpyVectorStore("source")
+    store.add_documents([f"文档{i}" for i in range(20)], vectors[:20],
+                        [{"source": "a.md", "n": i} for i in range(20)])
+    store.add_documents([f"文档{i}" for i in range(20, 30)], vectors[20:])
+    store.delete(store.search(vectors[0].tolist(), top_k=1)["ids"][0])
+    return store
+
+
+def test_snapshot_roundtrip_zero_copy():
+    """测试快照保留ID、文本、元数据和嵌入，且嵌入是mmap上的视图"""
+    store = _source_store()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "collection.snap")
+        assert store.snapshot(path, page_size=7) == 29
+
+        with Snapshot(path) as snapshot:
+            assert len(snapshot) == 29 and snapshot.dimension == 8
+            assert snapshot.embeddings.base is not None and not snapshot.embeddings.flags.writeable
+            pages = list(snapshot.iter_pages(page_size=10))
+            assert [len(page["ids"]) for page in pages] == [10, 10, 9]
+
+        restored = NumpyVectorStore("restored")
+        assert restored.restore(path) == 29
+        original = list(store.iter_documents(include_embeddings=True))[0]
+        copy = list(restored.iter_documents(include_embeddings=True))[0]
+        assert copy["ids"] == original["ids"]
+        assert copy["documents"] == original["documents"]
+        assert copy["metadatas"] == original["metadatas"]
+        assert np.allclose(copy["embeddings"], original["embeddings"], atol=1e-6)
+
+
+def test_numpy_restore_maps_snapshot():
+    """测试空的NumPy存储直接使用快照矩阵：内存存储零拷贝，持久化存储复制文件后映射"""
+    store = _source_store()
+    queries = np.random.default_rng(1).standard_normal((5, 8)).astype(np.float32)
+    expected = store.search_batch(queries, top_k=3)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "collection.snap")
+        store.snapshot(path)
+
+        in_memory = NumpyVectorStore("mapped")
+        assert in_memory.restore(path) == 29
+        assert not in_memory._vectors.flags.writeable
+        assert not in_memory.get_memory_usage()["float32_resident"]
+        assert in_memory.search_batch(queries, top_k=3) == expected
+
+        # 追加时复制到内存，快照中的数据保持不变
+        in_memory.add_documents(["新文档"], queries[:1])
+        assert in_memory.count() == 30 and in_memory._vectors.flags.writeable
+        assert in_memory.search(queries[0].tolist(), top_k=1)["documents"][0] == ["新文档"]
+
+        persisted = NumpyVectorStore("mapped", os.path.join(directory, "store"))
+        version = persisted.get_version()
+        assert persisted.restore(path) == 29
+        assert isinstance(persisted._vectors, np.memmap)
+        assert persisted.get_version() > version
+        assert persisted.search_batch(queries, top_k=3) == expected
+
+        reopened = NumpyVectorStore("mapped", os.path.join(directory, "store"))
+        assert reopened.search_batch(queries, top_k=3) == expected
+        assert reopened.get_corpus_id() == persisted.get_corpus_id()
+
+        # 非空集合仍按页导入（upsert）
+        assert reopened.restore(path) == 29
+        assert reopened.count() == 29
+
+
+def test_float16_snapshot_into_chroma():
+    """测试float16快照体积更小，并可导入chroma后端"""
+    store = _source_store()
+    with tempfile.TemporaryDirectory() as directory:
+        full = os.path.join(directory, "full.snap")
+        half = os.path.join(directory, "half.snap")
+        store.snapshot(full)
+        store.snapshot(half, dtype="float16")
+        assert os.path.getsize(half) < os.path.getsize(full)
+
+        target = VectorStore("snapshot_target")
+        target.clear()
+        target.restore(half)
+        assert target.count() == 29
+        query = next(store.iter_documents(include_embeddings=True))["embeddings"][3]
+        assert target.search(query.tolist(), top_k=1)["ids"][0] == store.search(query.tolist(), top_k=1)["ids"][0]
+
+
+def test_invalid_snapshot_rejected():
+    """测试损坏的快照文件会被拒绝"""
+    with tempfile.NamedTemporaryFile(suffix=".snap", delete=False) as file:
+        file.write(b"not a snapshot" * 10)
+    try:
+        Snapshot(file.name)
+        assert False, "应拒绝无效的快照文件"
+    except ValueError:
+        pass
+    finally:
+        os.remove(file.name)
+
+
+if __name__ == "__main__":
+    test_snapshot_roundtrip_zero_copy()
+    test_numpy_restore_maps_snapshot()
+    test_float16_snapshot_into_chroma()
+    test_invalid_snapshot_rejected()
+    print("✓ 快照测试通过")
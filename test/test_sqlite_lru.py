@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""测试SQLite LRU表的读写、淘汰、删除和条目计数"""
+
+import os
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.sqlite_lru import SqliteLRU
+
+
+def test_put_get_and_eviction():
+    """测试覆盖写入不增加条目数，超过容量时淘汰最久未访问的条目"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        store = SqliteLRU(os.path.join(cache_dir, "lru.sqlite3"), "items",
+                          ["value TEXT NOT NULL", "size INTEGER NOT NULL"], max_entries=3)
+        store.put_many({"a": ("甲", 1), "b": ("乙", 2)})
+        store.put("a", ("甲2", 3))
+        assert len(store) == 2
+        assert store.get("a") == ("甲2", 3)
+        assert store.get("missing") is None
+
+        store.put("c", ("丙", 4))
+        store.get("b")
+        store.put_many({"d": ("丁", 5), "e": ("戊", 6)})
+        assert len(store) == 3
+        assert set(store.get_many(["a", "b", "c", "d", "e"])) == {"b", "d", "e"}
+        store.close()
+
+
+def test_running_count_matches_table():
+    """测试删除、按条件删除和清空后计数与表中行数一致，重新打开后从表中恢复"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        path = os.path.join(cache_dir, "lru.sqlite3")
+        store = SqliteLRU(path, "items", ["value INTEGER NOT NULL"], max_entries=100)
+        store.put_many({str(i): (i,) for i in range(10)})
+        assert store.delete(["0", "1", "missing"]) == 2
+        assert store.delete_where("value >= ?", (8,)) == 2
+        assert len(store) == 6
+        assert store.get_stats() == {"cache_path": path, "entries": 6, "max_entries": 100}
+        store.close()
+
+        reopened = SqliteLRU(path, "items", ["value INTEGER NOT NULL"], max_entries=4)
+        assert len(reopened) == 6
+        assert reopened.evict() == 2 and len(reopened) == 4
+        reopened.clear()
+        assert len(reopened) == 0 and reopened.get("5") is None
+        reopened.close()
+
+
+if __name__ == "__main__":
+    test_put_get_and_eviction()
+    test_running_count_matches_table()
+    print("✓ SQLite LRU表测试通过")
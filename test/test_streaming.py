@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""测试生成器的逐片段流式输出与 RAGSystem.query_stream"""
+
+import os
+import sys
+import json
+import asyncio
+import threading
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.answer_cache import AnswerCache
+from core.rag_system import RAGSystem
+from services.generator import DeepSeekGenerator, Generator, TokenStream
+
+
+class SlowSSEHandler(BaseHTTPRequestHandler):
+    """先发送第一个数据块，等测试确认收到后再发送其余数据块"""
+
+    protocol_version = "HTTP/1.1"
+
+    def send_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, token in enumerate(("大雄", "的", "竹蜻蜓")):
+            event = {"choices": [{"delta": {"content": token}}]}
+            self.send_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+            if i == 0:
+                self.server.received_in_time = self.server.first_token_received.wait(5)
+        self.send_chunk(b"data: [DONE]\n\n")
+        self.send_chunk(b"")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_deepseek_yields_tokens_as_they_arrive():
+    """测试第一个片段在服务端发送完全部内容之前就能读到"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowSSEHandler)
+    server.first_token_received = threading.Event()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    generator = DeepSeekGenerator(api_key="test",
+                                  api_url=f"http://127.0.0.1:{server.server_port}/v1/chat/completions")
+    try:
+        stream = TokenStream(generator.generate_answer_stream("问题", ["片段"]))
+        assert next(stream) == "大雄"
+        assert stream.time_to_first_token is not None and stream.total_latency is None
+        server.first_token_received.set()
+        assert stream.read() == "大雄的竹蜻蜓"
+        assert server.received_in_time
+        stats = stream.get_stats()
+        assert stats["tokens"] == 3
+        assert stats["total_latency"] >= stats["time_to_first_token"]
+    finally:
+        server.first_token_received.set()
+        generator.close()
+        server.shutdown()
+
+
+def test_gemini_stream():
+    """测试Gemini生成器使用 generate_content_stream 并跳过空片段"""
+    chunks = [SimpleNamespace(text="你"), SimpleNamespace(text=None), SimpleNamespace(text="好")]
+    generator = Generator()
+    generator._client = SimpleNamespace(models=SimpleNamespace(
+        generate_content_stream=lambda model, contents: iter(chunks)))
+    assert list(generator.generate_answer_stream("问题", ["片段"])) == ["你", "好"]
+
+
+class FakeEmbeddingService:
+    def embed_batch_array(self, texts):
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+    def embed_text(self, text):
+        return [float(len(text)), 1.0]
+
+
+class PassthroughReranker:
+    def rerank(self, query, documents, top_k=3):
+        return documents[:top_k]
+
+
+class StreamingGenerator:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_answer_stream(self, query, chunks, show_prompt=False):
+        self.calls += 1
+        yield from chunks[0]
+
+
+def test_query_stream():
+    """测试 query_stream 的同步、异步迭代与回答缓存"""
+    rag = RAGSystem(vector_backend="numpy", collection_name="stream", answer_cache=AnswerCache())
+    rag.embedding_service = FakeEmbeddingService()
+    rag.reranker = PassthroughReranker()
+    rag._generator = StreamingGenerator()
+    rag.add_documents_from_texts(["任意门"])
+
+    stream = rag.query_stream("任意门是什么？", rerank_k=1)
+    assert list(stream) == ["任", "意", "门"]
+    assert stream.get_stats()["time_to_first_token"] <= stream.get_stats()["total_latency"]
+
+    # 读完的回答写入缓存，再次查询不调用生成器
+    cached = rag.query_stream("任意门是什么？", rerank_k=1)
+    assert cached.read() == "任意门"
+    assert rag._generator.calls == 1
+
+    async def collect():
+        return [token async for token in rag.query_stream("任意门？", rerank_k=1)]
+
+    assert asyncio.run(collect()) == ["任", "意", "门"]
+    assert rag._generator.calls == 2
+
+
+if __name__ == "__main__":
+    test_deepseek_yields_tokens_as_they_arrive()
+    test_gemini_stream()
+    test_query_stream()
+    print("✓ 流式输出测试通过")